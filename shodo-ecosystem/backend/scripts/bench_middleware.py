@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+ミドルウェアスタックのベンチマーク
+純粋ASGI化する前（ベースラインのコミット）の BaseHTTPMiddleware 実装と、
+現在のツリーの実装のリクエスト/秒を比較する
+
+- ベースラインのミドルウェアは git archive で取り出したソースをそのまま import する
+- 同名パッケージ（src）を読み分けるため、スタックごとに別プロセスで計測する
+- 参考値としてミドルウェアなしのアプリも計測する
+
+使い方:
+    python scripts/bench_middleware.py --requests 5000
+    python scripts/bench_middleware.py --baseline <commit>
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_PATH = "/bench"
+GIT = shutil.which("git") or "/usr/bin/git"
+# git rev-parse の出力（SHA-1 / SHA-256）
+COMMIT_HASH = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+# 各スタックのミドルウェア（main.py での add_middleware の順。後から追加したものが外側）
+STACKS = {
+    "none": [],
+    "baseline": ["MetricsMiddleware", "LPREnforcerMiddleware", "RateLimitMiddleware", "SecurityHeadersMiddleware", "CSRFMiddleware"],
+    "current": ["MetricsMiddleware", "RateLimitMiddleware", "LPREnforcerMiddleware", "SecurityHeadersMiddleware", "CSRFMiddleware"],
+}
+
+def git(*args: str, stdout=subprocess.PIPE) -> str:
+    """
+    固定の git 実行ファイルを引数リストで呼ぶ（シェルを介さない）
+    利用者の入力は resolve_commit で検証したコミットハッシュとしてだけ渡す
+    """
+    result = subprocess.run(  # noqa: S603 - 実行ファイル固定、引数はリテラルか検証済みハッシュ
+        [GIT, *args], cwd=BACKEND_DIR, check=True, stdout=stdout, text=stdout is subprocess.PIPE,
+    )
+    return result.stdout.strip() if stdout is subprocess.PIPE else ""
+
+def resolve_commit(rev: str) -> str:
+    """リビジョンをコミットの完全なハッシュへ解決（以降の git 呼び出しにはハッシュだけを渡す）"""
+    commit = git("rev-parse", "--verify", "--end-of-options", f"{rev}^{{commit}}")
+    if not COMMIT_HASH.fullmatch(commit):
+        raise SystemExit(f"not a commit: {rev}")
+    return commit
+
+def default_baseline() -> str:
+    """純粋ASGI化（src/middleware/context.py の追加）の直前のコミット"""
+    added = git("log", "--diff-filter=A", "--format=%H", "-1", "--", "src/middleware/context.py")
+    if not added:
+        raise SystemExit("could not locate the pure ASGI middleware commit; pass --baseline")
+    return f"{added}^"
+
+def export_baseline(commit: str, dest: Path) -> Path:
+    """ベースラインの backend/src を dest へ取り出す（dest が import 時のルートになる）"""
+    archive = dest / "baseline.tar"
+    with open(archive, "wb") as f:
+        git("archive", commit, "src", stdout=f)
+    with tarfile.open(archive) as tar:
+        tar.extractall(dest, filter="data")
+    return dest
+
+# === 計測（子プロセス） ===
+
+def build_app(stack: str):
+    from fastapi import FastAPI, Request
+
+    from src.middleware.csrf import CSRFMiddleware
+    from src.middleware.lpr_enforcer import LPREnforcerMiddleware
+    from src.middleware.rate_limit import RateLimitMiddleware
+    from src.middleware.security import SecurityHeadersMiddleware
+    from src.monitoring.metrics import MetricsMiddleware
+
+    classes = {
+        "CSRFMiddleware": CSRFMiddleware,
+        "LPREnforcerMiddleware": LPREnforcerMiddleware,
+        "RateLimitMiddleware": RateLimitMiddleware,
+        "SecurityHeadersMiddleware": SecurityHeadersMiddleware,
+        "MetricsMiddleware": MetricsMiddleware,
+    }
+    app = FastAPI()
+
+    @app.get(BENCH_PATH)
+    async def bench(request: Request):
+        return {"ok": True}
+
+    for name in STACKS[stack]:
+        app.add_middleware(classes[name])
+    return app
+
+async def call(app, scope_template) -> int:
+    scope = dict(scope_template)
+    scope["state"] = {}
+    sent = []
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    completed = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # 本文の後は応答の送信完了を待って切断を返す（uvicorn と同じ振る舞い）
+        await completed.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body", False):
+            completed.set()
+
+    await app(scope, receive, send)
+    return sent[0]["status"]
+
+async def measure(stack: str, requests: int, concurrency: int) -> float:
+    app = build_app(stack)
+    scope_template = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": BENCH_PATH,
+        "raw_path": BENCH_PATH.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    # ウォームアップ
+    for _ in range(50):
+        await call(app, scope_template)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await call(app, scope_template)
+
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    if any(s != 200 for s in statuses):
+        raise RuntimeError(f"unexpected non-200 response: {set(statuses)}")
+    return requests / elapsed
+
+def run_child(stack: str, root: str, requests: int, concurrency: int) -> None:
+    sys.path.insert(0, root)
+    from src.core.config import settings
+
+    # ベンチマーク中はレート制限に掛からず、Redis も使わない（両スタック共通）
+    settings.cache_enabled = False
+    settings.rate_limit_endpoint_limits[BENCH_PATH] = {
+        "per_minute": 10 ** 9, "per_hour": 10 ** 9, "burst": 10 ** 9
+    }
+    settings.rate_limit_burst = 10 ** 9
+    settings.rate_limit_hh_enabled = False
+
+    rps = asyncio.run(measure(stack, requests, concurrency))
+    print(json.dumps({"stack": stack, "rps": rps}))
+
+def spawn(stack: str, root: Path, args) -> float:
+    # 自分自身を同じインタープリタで起動（stack は choices 内、数値は int で検証済み）
+    output = subprocess.run(  # noqa: S603
+        [
+            sys.executable, __file__,
+            "--stack", stack, "--root", str(root),
+            "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+        ],
+        cwd=root, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["rps"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Middleware stack benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--baseline", help="commit with the BaseHTTPMiddleware stack (default: before the pure ASGI rewrite)")
+    parser.add_argument("--stack", choices=sorted(STACKS), help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stack:
+        run_child(args.stack, args.root, args.requests, args.concurrency)
+        return
+
+    baseline = resolve_commit(args.baseline or default_baseline())
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_root = export_baseline(baseline, Path(tmp))
+        results = {
+            "none": spawn("none", BACKEND_DIR, args),
+            "baseline": spawn("baseline", baseline_root, args),
+            "current": spawn("current", BACKEND_DIR, args),
+        }
+
+    print(f"Baseline: {baseline[:12]}")
+    print(f"No middleware:                     {results['none']:10.1f} req/s")
+    print(f"Baseline stack (BaseHTTPMiddleware): {results['baseline']:8.1f} req/s")
+    print(f"Current stack (pure ASGI):         {results['current']:10.1f} req/s")
+    print(f"Speedup:                           {results['current'] / results['baseline']:10.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+InputSanitizer のマイクロベンチマーク
+旧実装（1文字ずつ unicodedata.category を呼ぶ）と高速パスを日本語テキストで比較し、
+結果が一致することも確認する
+
+使い方:
+    python scripts/bench_sanitizer.py --iterations 2000
+"""
+
+import argparse
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.core.security_utils import InputSanitizer
+
+def legacy_sanitize_string(value: str, max_length: int = 1000) -> str:
+    """旧実装（比較用）"""
+    if len(value) > max_length * 2:
+        value = value[: max_length * 2]
+    cleaned_chars = []
+    for ch in value:
+        cat = unicodedata.category(ch)
+        if ch in ('\n', '\t'):
+            cleaned_chars.append(ch)
+            continue
+        if cat in ("Cc", "Cf"):
+            continue
+        cleaned_chars.append(ch)
+    cleaned = "".join(cleaned_chars)
+    if len(cleaned) > max_length:
+        cleaned = cleaned[:max_length]
+    return cleaned.strip()
+
+SAMPLES = {
+    "japanese_clean": "Shopifyの商品一覧から在庫が10個以下のものを抽出して、価格を5%値上げしてください。" * 60,
+    "japanese_mixed": "注文番号\u200b12345の配送先を変更\n\tお客様：山田太郎\x00様\u3000（緊急）" * 60,
+    "ascii": "Update the hero banner color to #336699 and set padding to 24px. " * 60,
+}
+
+def bench(func, text: str, max_length: int, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(text, max_length)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="InputSanitizer microbenchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--max-length", type=int, default=5000)
+    args = parser.parse_args()
+
+    # 初回のみ制御文字テーブルを構築（計測から除外）
+    InputSanitizer.sanitize_string("\x00")
+
+    for name, text in SAMPLES.items():
+        expected = legacy_sanitize_string(text, args.max_length)
+        actual = InputSanitizer.sanitize_string(text, args.max_length)
+        assert actual == expected, f"result mismatch for {name}"
+        legacy = bench(legacy_sanitize_string, text, args.max_length, args.iterations)
+        fast = bench(InputSanitizer.sanitize_string, text, args.max_length, args.iterations)
+        print(f"{name:16s} len={len(text):5d}  legacy {legacy * 1e6 / args.iterations:9.1f} us"
+              f"  fast {fast * 1e6 / args.iterations:8.1f} us  speedup {legacy / fast:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -9,15 +9,17 @@ import uuid
 import hashlib
 from fastapi import APIRouter, HTTPException, Depends, status, Request
 from pydantic import BaseModel, EmailStr, Field, validator
-from passlib.context import CryptContext
 from jose import jwt
 
 from ...schemas.base import BaseResponse
 from ...core.config import settings
 from ...services.database import get_db_session
-from ...middleware.auth import get_current_user, CurrentUser
+from ...middleware.auth import get_current_user, require_roles, CurrentUser
 from ...services.auth.refresh_manager import RefreshTokenManager
-from ...services.auth.jti_manager import JTIRevocationStore
+from ...services.auth.jti_manager import get_jti_revocation_store
+from ...services.auth.password_hasher import get_password_hasher, PasswordHasherBusy
+from ...services.auth.credentials import find_user_by_email, verify_user_password
+from ...services.auth.user_admin import update_user_access
 import secrets
 import logging
 
@@ -25,9 +27,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
-# パスワードハッシュ設定
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # ===== リクエスト/レスポンスモデル =====
 
 class UserRegisterRequest(BaseModel):
@@ -76,6 +75,11 @@ class UserResponse(BaseModel):
     created_at: datetime
     last_login: Optional[datetime] = None
 
+class UserAccessUpdateRequest(BaseModel):
+    """ロール・有効状態の変更（管理者用）"""
+    role: Optional[str] = Field(None, pattern="^(user|admin|superadmin)$")
+    is_active: Optional[bool] = None
+
 class AuthResponse(BaseModel):
     """認証成功レスポンス"""
     access_token: str
@@ -143,13 +147,13 @@ def create_access_token(
     
     return token, expires_in
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """パスワード検証"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """パスワード検証（専用プールで実行）"""
+    return await get_password_hasher().verify(plain_password, hashed_password)
 
-def hash_password(password: str) -> str:
-    """パスワードハッシュ化"""
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    """パスワードハッシュ化（専用プールで実行）"""
+    return await get_password_hasher().hash(password)
 
 def generate_device_fingerprint(request: Request) -> str:
     """デバイスフィンガープリント生成"""
@@ -177,7 +181,7 @@ async def register(
         # TODO: 実際のDBクエリに置き換え
         
         # パスワードのハッシュ化
-        _ = hash_password(request.password)  # 実DB保存実装時に使用
+        _ = await hash_password(request.password)  # 実DB保存実装時に使用
         
         # ユーザー作成
         user_id = str(uuid.uuid4())
@@ -203,6 +207,8 @@ async def register(
             message="User registered successfully"
         )
         
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         logger.error(f"Registration error: {e}")
         raise HTTPException(
@@ -224,17 +230,31 @@ async def login(
         # デバイスフィンガープリント生成
         device_id = request.device_fingerprint or generate_device_fingerprint(req)
         
-        # TODO: 実際のDB認証処理
-        # 開発用のダミー認証
-        if request.email == "admin@example.com" and request.password == "admin":
+        # DBのユーザーを専用プールで検証（古いパラメータのハッシュはレスポンス後に再ハッシュ）
+        user = await find_user_by_email(db, request.email)
+        if user is not None:
+            authenticated = await verify_user_password(user, request.password)
+            user_id = str(user.id)
+            username = user.username
+            full_name = user.full_name
+            roles = [user.role] if user.role else []
+        # 開発用のダミー認証（DBに存在しないアカウントのみ、本番では無効）
+        elif not settings.is_production() and request.email == "admin@example.com" and request.password == "admin":
+            authenticated = True
             user_id = "admin-user-id"
             username = "admin"
+            full_name = "Administrator"
             roles = ["admin", "user"]
-        elif request.email == "user@example.com" and request.password == "password":
+        elif not settings.is_production() and request.email == "user@example.com" and request.password == "password":
+            authenticated = True
             user_id = "normal-user-id"
             username = "user"
+            full_name = "Test User"
             roles = ["user"]
         else:
+            authenticated = False
+        
+        if not authenticated:
             logger.warning(f"Failed login attempt for {request.email}")
             return BaseResponse(
                 success=False,
@@ -256,7 +276,7 @@ async def login(
             user_id=user_id,
             email=request.email,
             username=username,
-            full_name="Test User" if username == "user" else "Administrator",
+            full_name=full_name,
             roles=roles,
             is_active=True,
             created_at=datetime.now(timezone.utc),
@@ -330,6 +350,8 @@ async def login(
         )
         return response
         
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         logger.error(f"Login error: {e}")
         return BaseResponse(
@@ -351,7 +373,7 @@ async def logout(
         try:
             # 現在のリクエストからJTIを推測: middleware/auth.verify_jwt_tokenで検証済み
             # このスコープでは生トークンやexpを持たないため、即時失効登録（TTLは既定）
-            rev = JTIRevocationStore()
+            rev = get_jti_revocation_store()
             # JTIは current_user には含まれないため、将来: request.state から取得する拡張も検討
             # 安全側: 何もできない場合はスキップ
             _ = await rev.revoke_jti(None)
@@ -407,13 +429,15 @@ async def refresh_token(
         token_in_cookie = req.cookies.get(cookie_name)
         token_from_body = (body.refresh_token if body else None)
         token_value = token_from_body or token_in_cookie
-        payload = await mgr.validate(token_value)
-        if not payload:
+        # リフレッシュトークンをローテーション（検証・旧トークン削除・新規発行を原子的に実行）
+        rotated = await mgr.rotate(token_value)
+        if not rotated:
             return BaseResponse(
                 success=False,
                 error="Invalid refresh token",
                 message="Authentication failed"
             )
+        new_refresh, payload = rotated
         # 新しいアクセストークン
         access_token, expires_in = create_access_token(
             user_id=payload["user_id"],
@@ -422,15 +446,6 @@ async def refresh_token(
             device_id=payload.get("device_id"),
             expires_delta=timedelta(minutes=30)
         )
-        # リフレッシュトークンをローテーション
-        rotated = await mgr.rotate(token_value)
-        if not rotated:
-            return BaseResponse(
-                success=False,
-                error="Rotation failed",
-                message="Authentication failed"
-            )
-        new_refresh, new_payload = rotated
         # レスポンス
         from fastapi.responses import JSONResponse
         resp = JSONResponse(
@@ -519,6 +534,27 @@ async def verify_token(
         message="Token is valid"
     )
 
+@router.patch("/users/{user_id}/access", response_model=BaseResponse[Dict])
+async def update_access(
+    user_id: str,
+    request: UserAccessUpdateRequest,
+    current_user: CurrentUser = Depends(require_roles(["admin"])),
+    db = Depends(get_db_session)
+):
+    """
+    ユーザーのロール・有効状態を変更（管理者用）
+    - 変更は全ワーカーのユーザーID解決キャッシュへ即時に反映される
+    """
+    user = await update_user_access(db, user_id, role=request.role, is_active=request.is_active)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    logger.info(f"User access updated by {current_user.user_id}: {user_id}")
+    return BaseResponse(
+        success=True,
+        data={"user_id": user_id, "role": user.role, "is_active": user.is_active},
+        message="User access updated"
+    )
+
 @router.get("/csrf", response_model=BaseResponse[Dict])
 async def issue_csrf_token():
     """
@@ -553,19 +553,17 @@ async def batch_revoke_tokens(
     """複数のLPRトークンを一括失効"""
     
     try:
-        results = []
-        
+        # パイプラインで一括失効（JTIごとの結果を返す）
         lpr = await get_lpr_service()
-        for jti in jtis:
-            success = await lpr.revoke_token(
-                jti=jti,
-                reason=reason,
-                user_id=current_user["sub"],
-            )
-            results.append({
-                "jti": jti,
-                "revoked": success,
-            })
+        revoked = await lpr.revoke_tokens(
+            jtis,
+            reason=reason,
+            user_id=current_user["sub"],
+        )
+        results = [
+            {"jti": jti, "revoked": revoked.get(jti, False)}
+            for jti in jtis
+        ]
         
         # 監査ログ
         await audit_logger.log(
@@ -579,6 +577,7 @@ async def batch_revoke_tokens(
             details={
                 "count": len(jtis),
                 "jtis": jtis,
+                "failed_jtis": [r["jti"] for r in results if not r["revoked"]],
                 "reason": reason,
             }
         )
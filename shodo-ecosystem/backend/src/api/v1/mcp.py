@@ -4,11 +4,20 @@ MCP (Model Context Protocol) APIエンドポイント
 
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime
+import asyncio
+import uuid
+
+from sqlalchemy import select, and_
 
 from .auth import get_current_user
 from ...middleware.auth import require_roles
+from ...connectors.manager import build_connector_for_connection
+from ...services.export.streaming_export import (
+    CONTENT_TYPES, export_file_name, get_export_storage, write_export
+)
 
 router = APIRouter()
 
@@ -33,6 +42,10 @@ AVAILABLE_TOOLS = {
                     "enum": ["csv", "json", "xlsx"],
                     "description": "出力フォーマット"
                 },
+                "compress": {
+                    "type": "boolean",
+                    "description": "gzip 圧縮（csv / json のみ）"
+                },
                 "date_range": {
                     "type": "object",
                     "properties": {
@@ -164,6 +177,9 @@ AVAILABLE_TOOLS = {
 # ツール実行履歴
 tool_execution_history = {}
 
+# 非同期実行中のタスク（完了まで参照を保持）
+_background_executions = set()
+
 class ToolInfo(BaseModel):
     id: str
     name: str
@@ -183,6 +199,7 @@ class ToolExecutionResult(BaseModel):
     status: str  # "success", "error", "pending"
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
 
@@ -247,34 +264,42 @@ async def invoke_tool(
     execution_result = {
         "execution_id": execution_id,
         "tool_id": tool_id,
-        "status": "pending" if invocation.async_execution else "success",
+        "status": "pending",
         "result": None,
         "error": None,
+        "progress": None,
         "started_at": datetime.utcnow(),
         "completed_at": None,
         "user_id": current_user["id"],
         "parameters": invocation.parameters
     }
     
-    try:
-        # ツール実行のモック
-        result = await execute_tool(tool_id, invocation.parameters)
-        
-        execution_result["result"] = result
-        execution_result["status"] = "success"
-        execution_result["completed_at"] = datetime.utcnow()
-        
-    except Exception as e:
-        execution_result["status"] = "error"
-        execution_result["error"] = str(e)
-        execution_result["completed_at"] = datetime.utcnow()
-    
-    # 履歴に保存
+    # 履歴に保存（実行中の進捗も実行状態の取得で参照できる）
     user_email = current_user["email"]
     if user_email not in tool_execution_history:
         tool_execution_history[user_email] = []
     tool_execution_history[user_email].append(execution_result)
     
+    async def run():
+        try:
+            result = await execute_tool(tool_id, invocation.parameters, current_user, execution_result)
+            
+            execution_result["result"] = result
+            execution_result["status"] = "success"
+            execution_result["completed_at"] = datetime.utcnow()
+            
+        except Exception as e:
+            execution_result["status"] = "error"
+            execution_result["error"] = str(e)
+            execution_result["completed_at"] = datetime.utcnow()
+    
+    if invocation.async_execution:
+        task = asyncio.create_task(run())
+        _background_executions.add(task)
+        task.add_done_callback(_background_executions.discard)
+    else:
+        await run()
+    
     return ToolExecutionResult(**execution_result)
 
 @router.get("/executions/{execution_id}", response_model=ToolExecutionResult)
@@ -336,6 +361,32 @@ async def get_tool_categories(current_user: dict = Depends(get_current_user)):
         ]
     }
 
+@router.get("/exports/{file_name}")
+async def download_export(
+    file_name: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """エクスポートファイルのダウンロード（チャンク単位でストリーミング）"""
+    
+    storage = get_export_storage()
+    try:
+        found = storage.exists(current_user["id"], file_name)
+    except ValueError:
+        found = False
+    if not found:
+        raise HTTPException(status_code=404, detail="Export not found")
+    
+    if file_name.endswith(".gz"):
+        media_type = "application/gzip"
+    else:
+        fmt = {"csv": "csv", "ndjson": "json", "xlsx": "xlsx"}.get(file_name.rsplit(".", 1)[-1], "json")
+        media_type = CONTENT_TYPES[fmt]
+    return StreamingResponse(
+        storage.iter_chunks(current_user["id"], file_name),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{file_name}"'}
+    )
+
 @router.post("/batch")
 async def batch_invoke_tools(
     invocations: List[ToolInvocation],
@@ -366,17 +417,86 @@ async def batch_invoke_tools(
         "results": results
     }
 
-async def execute_tool(tool_id: str, parameters: Dict[str, Any]) -> Dict:
-    """ツールの実行（モック実装）"""
+async def _get_service_connector(user_id: str, service_type: str):
+    """ユーザーのアクティブなサービス接続からコネクタを生成"""
+    from ...services import database
+    from ...models.service_connection import ServiceConnection
+    
+    if database.AsyncSessionLocal is None:
+        raise RuntimeError("Database is not initialized")
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ServiceConnection).where(
+                and_(
+                    ServiceConnection.user_id == user_id,
+                    ServiceConnection.service_type == service_type,
+                    ServiceConnection.connection_status == "active"
+                )
+            )
+        )
+        connection = result.scalars().first()
+        if connection is None:
+            raise ValueError(f"No active {service_type} connection")
+        return await build_connector_for_connection(db, connection)
+
+def _date_range_search(date_range: Optional[Dict[str, str]]) -> Optional[str]:
+    """date_range を Shopify 検索構文に変換"""
+    if not date_range:
+        return None
+    terms = []
+    if date_range.get("start"):
+        terms.append(f"created_at:>={date_range['start']}")
+    if date_range.get("end"):
+        terms.append(f"created_at:<={date_range['end']}")
+    return " ".join(terms) or None
+
+async def _shopify_export(
+    parameters: Dict[str, Any],
+    current_user: Dict[str, Any],
+    execution: Optional[Dict[str, Any]] = None
+) -> Dict:
+    """Shopify バルク操作の結果を指定形式のファイルへ逐次書き出す"""
+    data_type = parameters["data_type"]
+    fmt = parameters["format"]
+    compress = bool(parameters.get("compress"))
+    name = export_file_name(f"shopify_{data_type}_{uuid.uuid4().hex}", fmt, compress)
+    
+    def report(rows: int) -> None:
+        if execution is not None:
+            execution["progress"] = {"rows": rows}
+    
+    connector = await _get_service_connector(current_user["id"], "shopify")
+    try:
+        export = await write_export(
+            connector.bulk_export(data_type, _date_range_search(parameters.get("date_range"))),
+            fmt,
+            owner=current_user["id"],
+            name=name,
+            compress=compress,
+            progress=report
+        )
+    finally:
+        await connector.close()
+    
+    return {
+        "file_url": f"/exports/{export.name}",
+        "row_count": export.row_count,
+        "file_size": export.size,
+        "content_type": export.content_type
+    }
+
+async def execute_tool(
+    tool_id: str,
+    parameters: Dict[str, Any],
+    current_user: Optional[Dict[str, Any]] = None,
+    execution: Optional[Dict[str, Any]] = None
+) -> Dict:
+    """ツールの実行（shopify_export 以外はモック実装）"""
     
-    # 各ツールのモック実装
     if tool_id == "shopify_export":
-        return {
-            "file_url": f"/exports/shopify_{parameters['data_type']}.{parameters['format']}",
-            "row_count": 150,
-            "file_size": "2.5MB"
-        }
+        return await _shopify_export(parameters, current_user or {}, execution)
     
+    # 各ツールのモック実装
     elif tool_id == "gmail_send":
         return {
             "message_id": f"msg_{datetime.utcnow().timestamp()}",
@@ -74,12 +74,15 @@ async def generate_preview(
         # Convert request changes to engine format
         engine_changes = []
         for change in request.changes:
+            target, prop, new_value = InputSanitizer.sanitize_many(
+                (change.target, change.property, change.new_value)
+            )
             engine_changes.append(Change(
                 type=change.type,
-                target=InputSanitizer.sanitize_string(change.target),
-                property=InputSanitizer.sanitize_string(change.property),
+                target=target,
+                property=prop,
                 old_value=change.old_value,
-                new_value=InputSanitizer.sanitize_string(change.new_value),
+                new_value=new_value,
                 metadata=change.metadata
             ))
         
@@ -6,13 +6,16 @@ LPR (Limited Permission Receipt) 認証システム
 import json
 import hashlib
 import secrets
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, field
 import asyncio
 from playwright.async_api import async_playwright, Page
 import httpx
 
+from ..utils.expiring_map import ExpiringMap
+from ..connectors.transport import create_client
+
 @dataclass
 class LPR:
     """
@@ -449,7 +452,7 @@ class LPRSession:
         # 追加の認証ヘッダーがあれば追加
         headers.update(self.lpr.auth_headers)
         
-        self.client = httpx.AsyncClient(
+        self.client = create_client(
             headers=headers,
             follow_redirects=True,
             timeout=30.0
@@ -533,12 +536,15 @@ class LPRManager:
     """
     
     def __init__(self):
-        self.active_lprs: Dict[str, LPR] = {}
+        # 有効期限順のヒープで管理（クリーンアップは期限切れ分のみ処理）
+        self.active_lprs: ExpiringMap[str, LPR] = ExpiringMap()
         self.revoked_lprs: List[str] = []
     
     def register(self, lpr: LPR):
         """LPRを登録"""
-        self.active_lprs[lpr.lpr_id] = lpr
+        # expires_at は naive UTC
+        expires_ts = lpr.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        self.active_lprs.set(lpr.lpr_id, lpr, expires_ts)
     
     def get(self, lpr_id: str) -> Optional[LPR]:
         """LPRを取得"""
@@ -546,22 +552,15 @@ class LPRManager:
     
     def revoke(self, lpr_id: str):
         """LPRを無効化"""
-        if lpr_id in self.active_lprs:
-            lpr = self.active_lprs[lpr_id]
+        lpr = self.active_lprs.pop(lpr_id)
+        if lpr is not None:
             lpr.is_active = False
             lpr.revoked_at = datetime.utcnow()
             self.revoked_lprs.append(lpr_id)
-            del self.active_lprs[lpr_id]
     
     def cleanup_expired(self):
         """期限切れLPRをクリーンアップ"""
-        expired = []
-        for lpr_id, lpr in self.active_lprs.items():
-            if not lpr.is_valid():
-                expired.append(lpr_id)
-        
-        for lpr_id in expired:
-            del self.active_lprs[lpr_id]
+        self.active_lprs.purge()
     
     def get_audit_log(self, lpr_id: str) -> List[Dict[str, Any]]:
         """監査ログを取得"""
@@ -3,12 +3,12 @@ SaaS自動検出・連携システム
 URLから自動的にSaaSを識別し、適切なコネクタを選択または生成
 """
 
-import httpx
 from typing import Dict, Any, Optional, List, Type
 from urllib.parse import urlparse
 
 
 from .base import BaseSaaSConnector, ConnectorCredentials
+from .transport import create_client
 from .shopify import ShopifyConnector
 from .stripe import StripeConnector
 from .universal import UniversalSaaSConnector
@@ -185,7 +185,7 @@ class SaaSIdentifier:
     async def _identify_from_headers(cls, url: str) -> Optional[Dict[str, Any]]:
         """HTTPヘッダーからSaaSを識別"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with create_client() as client:
                 response = await client.head(url, follow_redirects=True)
                 headers = response.headers
                 
@@ -231,7 +231,7 @@ class SaaSIdentifier:
     async def _identify_from_content(cls, url: str) -> Optional[Dict[str, Any]]:
         """HTMLコンテンツからSaaSを識別"""
         try:
-            async with httpx.AsyncClient() as client:
+            async with create_client() as client:
                 response = await client.get(url, follow_redirects=True)
                 content = response.text.lower()
                 
@@ -4,16 +4,22 @@ SaaSコネクタ基底クラス
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, AsyncGenerator
+from typing import Dict, Any, List, Optional, AsyncGenerator, Awaitable, Callable
 from datetime import datetime
 from enum import Enum
 from dataclasses import dataclass
 import asyncio
-import time
 import random
 import structlog
 import httpx
 
+from .circuit_breaker import BreakerTransport, CircuitOpenError
+from .http_cache import CachingTransport, get_response_cache
+from .loader import ResourceLoader
+from .pagination import Page, iterate_pages
+from .rate_governor import RateGovernor, GovernedTransport, credential_scope, get_rate_governor
+from .transport import get_shared_transport
+
 class ConnectorType(str, Enum):
     """コネクタタイプ"""
     ECOMMERCE = "ecommerce"
@@ -40,6 +46,9 @@ class ConnectorConfig:
     base_url: str
     api_version: Optional[str] = None
     rate_limit: Optional[int] = 100  # requests per minute
+    rate_limit_burst: Optional[int] = None  # bucket capacity (default: one second of requests)
+    batch_concurrency: int = 8  # max in-flight operations for batch_read / batch_write
+    cache_resources: Optional[List[str]] = None  # resource types whose GETs go through the response cache
     timeout: int = 30  # seconds
     retry_count: int = 3
     retry_delay: int = 1  # seconds
@@ -84,18 +93,22 @@ class BaseSaaSConnector(ABC):
     すべてのSaaSコネクタはこのクラスを継承して実装する
     """
     
+    # stream_resources の既定ページサイズ（API の上限）
+    MAX_PAGE_SIZE = 100
+    # 差分同期のウォーターマークに使うフィールドと、その値以降に絞り込む一覧フィルター
+    INCREMENTAL_FIELD: Optional[str] = None
+    INCREMENTAL_FILTER: Optional[str] = None
+    # 差分同期のターゲットとしてソースのIDを保持できるフィールド（一覧で返るもの。None なら保持できない）
+    EXTERNAL_ID_FIELD: Optional[str] = None
+    
     def __init__(self, config: ConnectorConfig, credentials: ConnectorCredentials):
         self.config = config
         self.credentials = credentials
         self._session = None
         self._rate_limiter = None
+        self._loader: Optional[ResourceLoader] = None
         self._initialized = False
         self._logger = structlog.get_logger().bind(connector=self.__class__.__name__, name=self.config.name)
-        # Circuit breaker state
-        self._cb_failure_count: int = 0
-        self._cb_open_until_ts: float = 0.0
-        self._cb_threshold: int = 5
-        self._cb_open_seconds: int = 30
         
     @abstractmethod
     async def initialize(self) -> bool:
@@ -142,6 +155,56 @@ class BaseSaaSConnector(ABC):
         単一リソースの取得
         """
     
+    async def load_resource(
+        self,
+        resource_type: str,
+        resource_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        単一リソースの取得（同一周回の取得をまとめて batch_read で一括取得）
+        """
+        if self._loader is None:
+            self._loader = ResourceLoader(self.batch_read)
+        return await self._loader.load(resource_type, resource_id)
+    
+    async def list_page(
+        self,
+        resource_type: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """
+        1ページ分の一覧取得
+        既定は offset をカーソルとして扱う（カーソル型APIのコネクタは上書きする）
+        """
+        offset = int(cursor) if cursor else 0
+        items = await self.list_resources(resource_type, filters, limit, offset)
+        return Page(items, str(offset + len(items)) if items else None)
+    
+    async def _list_via_pages(
+        self,
+        resource_type: str,
+        filters: Optional[Dict[str, Any]],
+        limit: int,
+        offset: int
+    ) -> List[Dict[str, Any]]:
+        """
+        offset 指定の一覧取得をカーソルで実現（offset 分はページを辿って読み飛ばす）
+        """
+        results: List[Dict[str, Any]] = []
+        skip = offset
+        cursor: Optional[str] = None
+        while len(results) < limit:
+            page = await self.list_page(resource_type, filters, limit, cursor)
+            items = page.items[skip:]
+            skip = max(0, skip - len(page.items))
+            results.extend(items[:limit - len(results)])
+            cursor = page.next_cursor
+            if not page.items or cursor is None:
+                break
+        return results
+    
     @abstractmethod
     async def search_resources(
         self,
@@ -293,79 +356,166 @@ class BaseSaaSConnector(ABC):
     
     # === バッチ操作 ===
     
+    async def _run_batch(
+        self,
+        operations: List[Dict[str, Any]],
+        worker: Callable[[Dict[str, Any]], Awaitable[Any]],
+        fail_fast: bool = False
+    ) -> List[Any]:
+        """
+        バッチ操作を並行実行（同時実行数はレートガバナーの容量以下に制限）
+        結果は入力順。失敗した操作は {"error": ...}、fail_fast=True なら最初の失敗で中断して送出
+        """
+        limit = max(1, min(self.config.batch_concurrency, int(self._get_rate_governor().capacity)))
+        semaphore = asyncio.Semaphore(limit)
+        
+        async def run(op: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await worker(op)
+        
+        tasks = [asyncio.create_task(run(op)) for op in operations]
+        if fail_fast:
+            try:
+                return list(await asyncio.gather(*tasks))
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        return [
+            {"error": str(outcome)} if isinstance(outcome, Exception) else outcome
+            for outcome in outcomes
+        ]
+    
     async def batch_read(
         self,
-        operations: List[Dict[str, Any]]
+        operations: List[Dict[str, Any]],
+        fail_fast: bool = False
     ) -> List[Dict[str, Any]]:
         """
         バッチ読み取り
         """
-        results = []
-        for op in operations:
-            result = await self.get_resource(
-                op["resource_type"],
-                op["resource_id"]
-            )
-            results.append(result)
-        return results
+        async def read(op: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            return await self.get_resource(op["resource_type"], op["resource_id"])
+        
+        return await self._run_batch(operations, read, fail_fast)
     
     async def batch_write(
         self,
-        operations: List[Dict[str, Any]]
+        operations: List[Dict[str, Any]],
+        fail_fast: bool = False
     ) -> List[Dict[str, Any]]:
         """
         バッチ書き込み
         """
-        results = []
-        for op in operations:
+        async def write(op: Dict[str, Any]) -> Any:
             if op["action"] == "create":
-                result = await self.create_resource(
+                return await self.create_resource(
                     op["resource_type"],
                     op["data"]
                 )
             elif op["action"] == "update":
-                result = await self.update_resource(
+                return await self.update_resource(
                     op["resource_type"],
                     op["resource_id"],
                     op["data"]
                 )
             elif op["action"] == "delete":
-                result = await self.delete_resource(
+                return await self.delete_resource(
                     op["resource_type"],
                     op["resource_id"]
                 )
-            else:
-                result = {"error": f"Unknown action: {op['action']}"}
-            results.append(result)
-        return results
+            raise ValueError(f"Unknown action: {op['action']}")
+        
+        return await self._run_batch(operations, write, fail_fast)
     
     # === ストリーミング ===
     
     async def stream_resources(
         self,
         resource_type: str,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        page_size: Optional[int] = None,
+        prefetch: int = 2
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """
         リソースのストリーミング取得
+        カーソルでページを辿り、消費中に次の prefetch ページまでを先読みする
         """
-        offset = 0
-        limit = 100
-        while True:
-            resources = await self.list_resources(
-                resource_type,
-                filters,
-                limit,
-                offset
-            )
-            if not resources:
-                break
-            for resource in resources:
-                yield resource
-            offset += limit
+        limit = page_size or self.MAX_PAGE_SIZE
+        
+        async def fetch(cursor: Optional[str]) -> Page:
+            return await self.list_page(resource_type, filters, limit, cursor)
+        
+        async for resource in iterate_pages(fetch, prefetch):
+            yield resource
     
     # === ユーティリティ ===
     
+    def _credential_scope(self) -> str:
+        """認証情報を識別するキー（ガバナー・応答キャッシュの単位）"""
+        c = self.credentials
+        return credential_scope(c.access_token, c.api_key, c.username, c.client_id)
+    
+    def _get_rate_governor(self) -> RateGovernor:
+        """（コネクタ, 認証情報）単位のレートガバナー"""
+        if self._rate_limiter is None:
+            self._rate_limiter = get_rate_governor(
+                self.config.name,
+                self._credential_scope(),
+                self.config.rate_limit or 100,
+                self.config.rate_limit_burst
+            )
+        return self._rate_limiter
+    
+    def _route_rate_governor(self, request: httpx.Request) -> Optional[RateGovernor]:
+        """既定のガバナーと別の制限を受けるリクエストのガバナー（なければ None）"""
+        return None
+    
+    def _endpoint(self, resource_type: str) -> str:
+        """リソース種別に対応するエンドポイント名"""
+        return getattr(self, "RESOURCE_TYPES", {}).get(resource_type, resource_type)
+    
+    def _resource_from_url(self, base_path: str, url: httpx.URL) -> Optional[str]:
+        """リクエスト URL のエンドポイント名（base_url 直下の最初のパス要素）"""
+        path = url.path
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        segment = path.lstrip("/").split("/", 1)[0]
+        return segment[:-5] if segment.endswith(".json") else segment or None
+    
+    def _create_session(self, **kwargs) -> httpx.AsyncClient:
+        """
+        共有接続プール + レートガバナー + サーキットブレーカー（+ 応答キャッシュ）経由の HTTP クライアントを生成
+        引数は httpx.AsyncClient と同じ（認証ヘッダー等はコネクタ固有）
+        """
+        base_path = httpx.URL(str(kwargs.get("base_url") or self.config.base_url)).path.rstrip("/")
+        transport: httpx.AsyncBaseTransport = GovernedTransport(
+            get_shared_transport(), self._get_rate_governor(), route=self._route_rate_governor
+        )
+        # ブレーカーは（ホスト, エンドポイント）単位で全インスタンス共有。OPEN 中はガバナーの枠も消費しない
+        transport = BreakerTransport(transport, lambda url: self._resource_from_url(base_path, url))
+        if self.config.cache_resources:
+            # キャッシュ命中時はガバナー・ブレーカーを通らない（上流へのリクエストにならないため）
+            transport = CachingTransport(
+                transport,
+                get_response_cache(),
+                name=self.config.name,
+                scope=f"{self.config.name}:{self._credential_scope()}",
+                resource_of=lambda url: self._resource_from_url(base_path, url),
+                cacheable={self._endpoint(t) for t in self.config.cache_resources},
+            )
+        return httpx.AsyncClient(transport=transport, **kwargs)
+    
+    def invalidate_cache(self, resource_type: Optional[str] = None) -> int:
+        """
+        応答キャッシュを破棄（Webhook 受信時など。省略時はこの認証情報の全エントリ）
+        """
+        scope = f"{self.config.name}:{self._credential_scope()}"
+        endpoint = self._endpoint(resource_type) if resource_type else None
+        return get_response_cache().invalidate(scope, endpoint)
+    
     async def _resilient_request(
         self,
         method: str,
@@ -376,32 +526,29 @@ class BaseSaaSConnector(ABC):
         retry_on_status: Optional[List[int]] = None,
         **kwargs,
     ) -> httpx.Response:
-        """HTTP要求にリトライ/バックオフ/サーキットブレーカを適用して実行する。
+        """HTTP要求にリトライ/バックオフを適用して実行する。
         - 429/5xxでリトライ
-        - 失敗が閾値を超えると一定時間オープン
+        - サーキットブレーカー（セッションのトランスポートで共有）がオープンなら即座に失敗
         """
-        # Circuit breaker check
-        now = time.time()
-        if self._cb_open_until_ts and now < self._cb_open_until_ts:
-            raise RuntimeError("circuit_open")
         retry_count = self.config.retry_count if retry_count is None else retry_count
         base_delay = self.config.retry_delay if retry_delay is None else retry_delay
         retry_on_status = retry_on_status or [429, 500, 502, 503, 504]
         attempt = 0
         while True:
+            delay: Optional[float] = None
             try:
                 resp = await self._session.request(method, url, **kwargs)
                 if resp.status_code in retry_on_status:
-                    # Honor Retry-After if present
-                    ra = resp.headers.get('Retry-After')
-                    delay = float(ra) if ra else None
+                    if resp.status_code == 429:
+                        # The rate governor already holds further sends for Retry-After
+                        delay = 0.0
                     raise httpx.HTTPStatusError("retryable status", request=resp.request, response=resp)
-                # Success path
-                self._cb_failure_count = 0
                 return resp
+            except CircuitOpenError:
+                # Retrying here would only spin against the open breaker
+                raise
             except Exception as e:
                 attempt += 1
-                self._cb_failure_count += 1
                 self._logger.warning(
                     "request_failed",
                     method=method,
@@ -410,24 +557,16 @@ class BaseSaaSConnector(ABC):
                     error=str(e)
                 )
                 if attempt > retry_count:
-                    # Open circuit if persistent failures
-                    if self._cb_failure_count >= self._cb_threshold:
-                        self._cb_open_until_ts = time.time() + self._cb_open_seconds
-                        self._logger.error("circuit_opened", open_seconds=self._cb_open_seconds)
                     raise
                 # Exponential backoff with jitter
                 sleep_sec = base_delay * (2 ** (attempt - 1)) + random.uniform(0, 0.2)
-                await asyncio.sleep(sleep_sec)
+                await asyncio.sleep(sleep_sec if delay is None else delay)
 
     async def get_rate_limit_status(self) -> Dict[str, Any]:
         """
         レート制限の状態取得
         """
-        return {
-            "limit": self.config.rate_limit,
-            "remaining": self.config.rate_limit,
-            "reset_at": datetime.utcnow()
-        }
+        return self._get_rate_governor().status()
     
     async def get_api_status(self) -> Dict[str, Any]:
         """
@@ -443,8 +582,9 @@ class BaseSaaSConnector(ABC):
         """
         コネクタのクローズ
         """
+        # 共有接続プールは閉じない（クライアント固有の状態のみ解放）
         if self._session:
-            await self._session.close()
+            await self._session.aclose()
         self._initialized = False
     
     def __str__(self) -> str:
@@ -0,0 +1,249 @@
+"""
+コネクタ共有サーキットブレーカー
+（上流ホスト, エンドポイント種別）単位でプロセス内の全コネクタインスタンスが状態を共有する
+
+- 直近 window 秒のエラー率（5xx / 接続エラー）が閾値を超えたら OPEN
+  （最低リクエスト数に満たない間は判定しない。429 はテナントごとのクォータなのでレートガバナーに任せ、数えない）
+- OPEN の期間はジッター付き（全テナントが同時に復帰して上流へ殺到しない）。
+  HALF_OPEN で再び失敗するたびに倍になり、上限で頭打ち
+- 期間明けは HALF_OPEN となり、同時に probes 件までの試行リクエストだけを通す。
+  試行が probes 件連続で成功したら CLOSED、1件でも失敗したら再び OPEN
+- 状態は Prometheus のゲージ（0=closed, 1=half_open, 2=open）で公開する
+"""
+
+import random
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, List, Optional
+
+import httpx
+import structlog
+
+from ..core.config import settings
+from ..monitoring.metrics import MetricsCollector
+
+logger = structlog.get_logger()
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+class CircuitOpenError(RuntimeError):
+    """ブレーカーが開いているため送信しなかった"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__("circuit_open")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """ローリングウィンドウのエラー率で開閉するブレーカー"""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: int = 30,
+        min_requests: int = 20,
+        error_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        jitter: float = 0.2,
+        probes: int = 3,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            name: ブレーカー名（ホスト:エンドポイント種別）
+            window_seconds: エラー率を集計する直近の秒数
+            min_requests: 判定に必要な最低リクエスト数
+            error_rate: OPEN にするエラー率
+            open_seconds: 最初の OPEN 期間
+            max_open_seconds: OPEN 期間の上限
+            jitter: OPEN 期間に掛けるジッターの割合（±）
+            probes: HALF_OPEN で同時に通す試行数（連続成功でこの数に達したら CLOSED）
+        """
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.jitter = jitter
+        self.probes = probes
+        self._clock = clock
+        self.state = BreakerState.CLOSED
+        # [秒, 件数, 失敗数] のバケット
+        self._buckets: Deque[List[int]] = deque()
+        self._total = 0
+        self._failures = 0
+        self._open_until = 0.0
+        self._reopen_count = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def _trim(self, now: float) -> None:
+        horizon = int(now) - self.window_seconds
+        while self._buckets and self._buckets[0][0] <= horizon:
+            _, total, failures = self._buckets.popleft()
+            self._total -= total
+            self._failures -= failures
+
+    def _record(self, now: float, failed: bool) -> None:
+        second = int(now)
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        self._total += 1
+        if failed:
+            bucket[2] += 1
+            self._failures += 1
+        self._trim(now)
+
+    def _transition(self, state: BreakerState) -> None:
+        if state != self.state:
+            logger.warning("Circuit breaker state changed", breaker=self.name, state=state.value, previous=self.state.value)
+            self.state = state
+            MetricsCollector.record_circuit_state(self.name, state.value)
+
+    def _open(self, now: float) -> None:
+        duration = min(self.open_seconds * (2 ** self._reopen_count), self.max_open_seconds)
+        duration *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._open_until = now + duration
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._transition(BreakerState.OPEN)
+
+    def _close(self) -> None:
+        self._buckets.clear()
+        self._total = self._failures = 0
+        self._reopen_count = 0
+        self._transition(BreakerState.CLOSED)
+
+    @property
+    def failure_rate(self) -> float:
+        self._trim(self._clock())
+        return self._failures / self._total if self._total else 0.0
+
+    def acquire(self) -> bool:
+        """
+        送信可否を判定して枠を確保（OPEN 中は CircuitOpenError）
+
+        Returns:
+            HALF_OPEN の試行リクエストなら True（結果を record で必ず返す）
+        """
+        now = self._clock()
+        if self.state == BreakerState.OPEN:
+            if now < self._open_until:
+                raise CircuitOpenError(self.name, self._open_until - now)
+            self._transition(BreakerState.HALF_OPEN)
+        if self.state == BreakerState.HALF_OPEN:
+            if self._probes_in_flight >= self.probes:
+                raise CircuitOpenError(self.name, 1.0)
+            self._probes_in_flight += 1
+            return True
+        return False
+
+    def record(self, success: bool, probe: bool = False) -> None:
+        """リクエスト結果を記録"""
+        now = self._clock()
+        if probe:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if self.state != BreakerState.HALF_OPEN:
+                return
+            if not success:
+                self._reopen_count += 1
+                self._open(now)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.probes:
+                self._close()
+            return
+
+        self._record(now, not success)
+        if (
+            self.state == BreakerState.CLOSED
+            and self._total >= self.min_requests
+            and self._failures / self._total >= self.error_rate
+        ):
+            self._open(now)
+
+    def release(self, probe: bool) -> None:
+        """結果を判定できなかった試行（キャンセル等）の枠を戻す"""
+        if probe:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def status(self) -> Dict[str, object]:
+        now = self._clock()
+        return {
+            "state": self.state.value,
+            "failure_rate": round(self.failure_rate, 3),
+            "requests": self._total,
+            "retry_after": round(max(0.0, self._open_until - now), 3) if self.state == BreakerState.OPEN else 0.0,
+        }
+
+def is_failure(response: httpx.Response) -> bool:
+    """ブレーカーで失敗として数える応答（上流の不調を示すもの）"""
+    return response.status_code >= 500
+
+class BreakerTransport(httpx.AsyncBaseTransport):
+    """（ホスト, エンドポイント種別）のブレーカーを通して送信するトランスポート"""
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        endpoint_class: Callable[[httpx.URL], Optional[str]]
+    ):
+        self.inner = inner
+        self.endpoint_class = endpoint_class
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        breaker = get_circuit_breaker(request.url.host, self.endpoint_class(request.url) or "root")
+        probe = breaker.acquire()
+        try:
+            response = await self.inner.handle_async_request(request)
+        except httpx.TransportError:
+            breaker.record(False, probe)
+            raise
+        except BaseException:
+            breaker.release(probe)
+            raise
+        breaker.record(not is_failure(response), probe)
+        return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_circuit_breaker(host: str, endpoint_class: str = "root") -> CircuitBreaker:
+    """（ホスト, エンドポイント種別）のブレーカーを取得（全コネクタインスタンスで共有）"""
+    name = f"{host}:{endpoint_class}"
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name,
+            window_seconds=settings.connector_breaker_window_seconds,
+            min_requests=settings.connector_breaker_min_requests,
+            error_rate=settings.connector_breaker_error_rate,
+            open_seconds=settings.connector_breaker_open_seconds,
+            max_open_seconds=settings.connector_breaker_max_open_seconds,
+            probes=settings.connector_breaker_half_open_probes,
+        )
+        _breakers[name] = breaker
+    return breaker
+
+def circuit_breaker_status() -> Dict[str, Dict[str, object]]:
+    """全ブレーカーの状態"""
+    return {name: breaker.status() for name, breaker in _breakers.items()}
+
+__all__ = [
+    'BreakerState',
+    'BreakerTransport',
+    'CircuitBreaker',
+    'CircuitOpenError',
+    'circuit_breaker_status',
+    'get_circuit_breaker',
+]
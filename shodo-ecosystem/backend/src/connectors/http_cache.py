@@ -0,0 +1,254 @@
+"""
+コネクタ GET 応答キャッシュ
+（認証情報スコープ, URL, Vary 対象ヘッダー）単位で応答本文を保持し、条件付きリクエストで再検証する
+
+- Cache-Control: max-age の間は上流に問い合わせずに返す（no-store は保存しない、no-cache は毎回再検証）
+- 期限切れ後は If-None-Match / If-Modified-Since で再検証し、304 なら本文を転送せず保存済みの本文を返す
+- 同じスコープでの書き込み（GET/HEAD 以外）が成功したら、そのリソース種別のエントリを破棄する
+- Webhook 受信時は invalidate で同様に破棄する
+- キャッシュ対象はコネクタごとにリソース種別で指定する（ConnectorConfig.cache_resources）
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import httpx
+import structlog
+from cachetools import LRUCache
+
+from ..core.config import settings
+from ..monitoring.metrics import MetricsCollector
+
+logger = structlog.get_logger()
+
+CacheKey = Tuple[str, str]
+
+# 保存した本文は復号済みのため、転送時の符号化・長さに関するヘッダーは持たない
+_DROP_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+@dataclass
+class CachedResponse:
+    """保存済みの応答"""
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    resource: str
+    vary: Dict[str, str]
+    fresh_until: float
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """再検証用の条件付きヘッダー"""
+        conditions = {}
+        if "etag" in self.headers:
+            conditions["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            conditions["If-Modified-Since"] = self.headers["last-modified"]
+        return conditions
+
+def _cache_control(headers: httpx.Headers) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in headers.get("cache-control", "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+def _freshness(headers: httpx.Headers) -> Optional[float]:
+    """鮮度の秒数（保存不可なら None）"""
+    directives = _cache_control(headers)
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    try:
+        max_age = float(directives.get("max-age") or 0)
+        age = float(headers.get("age") or 0)
+    except ValueError:
+        return 0.0
+    return max(0.0, max_age - age)
+
+class _Entries(LRUCache):
+    """LRU から追い出したキーを索引からも外す"""
+
+    def __init__(self, maxsize: int, on_evict: Callable[[CacheKey, "CachedResponse"], None]):
+        super().__init__(maxsize=maxsize)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_evict(key, value)
+        return key, value
+
+class ResponseCache:
+    """プロセス共有の応答キャッシュ（LRU）"""
+
+    def __init__(self, maxsize: int = 2048, max_body_bytes: int = 1048576):
+        self.max_body_bytes = max_body_bytes
+        self._entries = _Entries(maxsize, self._unindex)
+        self._by_resource: Dict[Tuple[str, str], Set[CacheKey]] = {}
+
+    def _unindex(self, key: CacheKey, entry: CachedResponse) -> None:
+        keys = self._by_resource.get((key[0], entry.resource))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_resource[(key[0], entry.resource)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey, request: httpx.Request) -> Optional[CachedResponse]:
+        """Vary 対象ヘッダーが一致するエントリを取得"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if any(request.headers.get(name, "") != value for name, value in entry.vary.items()):
+            return None
+        return entry
+
+    def store(self, key: CacheKey, request: httpx.Request, response: httpx.Response, resource: str) -> None:
+        """200 応答を保存（検証子か鮮度がなければ保存しない）"""
+        freshness = _freshness(response.headers)
+        vary_names = [v.strip().lower() for v in response.headers.get("vary", "").split(",") if v.strip()]
+        if (
+            freshness is None
+            or "*" in vary_names
+            or len(response.content) > self.max_body_bytes
+            or not (freshness or "etag" in response.headers or "last-modified" in response.headers)
+        ):
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._unindex(key, entry)
+            return
+        headers = {k.lower(): v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS}
+        self._entries[key] = CachedResponse(
+            status_code=response.status_code,
+            headers=headers,
+            content=response.content,
+            resource=resource,
+            vary={name: request.headers.get(name, "") for name in vary_names},
+            fresh_until=time.monotonic() + freshness,
+        )
+        self._by_resource.setdefault((key[0], resource), set()).add(key)
+
+    def refresh(self, entry: CachedResponse, response: httpx.Response) -> None:
+        """304 応答のヘッダーで鮮度と検証子を更新"""
+        freshness = _freshness(response.headers)
+        for name in ("etag", "last-modified", "cache-control", "expires", "date"):
+            if name in response.headers:
+                entry.headers[name] = response.headers[name]
+        entry.fresh_until = time.monotonic() + (freshness or 0.0)
+
+    def invalidate(self, scope: str, resource: Optional[str] = None) -> int:
+        """スコープ内の指定リソース種別（省略時は全種別）のエントリを破棄"""
+        groups = [
+            group for group in list(self._by_resource)
+            if group[0] == scope and (resource is None or group[1] == resource)
+        ]
+        removed = 0
+        for group in groups:
+            for key in self._by_resource.pop(group):
+                if self._entries.pop(key, None) is not None:
+                    removed += 1
+        return removed
+
+def _response(entry: CachedResponse, request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        status_code=entry.status_code,
+        headers=entry.headers,
+        content=entry.content,
+        request=request,
+    )
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """対象リソースの GET を応答キャッシュ経由で送るトランスポート"""
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        cache: ResponseCache,
+        name: str,
+        scope: str,
+        resource_of: Callable[[httpx.URL], Optional[str]],
+        cacheable: Set[str]
+    ):
+        """
+        Args:
+            inner: 実際に送信するトランスポート
+            cache: 応答キャッシュ
+            name: コネクタ名（メトリクス用）
+            scope: 認証情報スコープ（テナント間でエントリを共有しない）
+            resource_of: URL からリソース種別（エンドポイント名）を求める関数
+            cacheable: キャッシュ対象のエンドポイント名
+        """
+        self.inner = inner
+        self.cache = cache
+        self.name = name
+        self.scope = scope
+        self.resource_of = resource_of
+        self.cacheable = cacheable
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        resource = self.resource_of(request.url)
+        if request.method not in ("GET", "HEAD"):
+            response = await self.inner.handle_async_request(request)
+            if resource and response.status_code < 400:
+                self.cache.invalidate(self.scope, resource)
+            return response
+        if request.method != "GET" or resource not in self.cacheable:
+            return await self.inner.handle_async_request(request)
+
+        key = (self.scope, str(request.url))
+        entry = self.cache.get(key, request)
+        if entry is not None and entry.fresh_until > time.monotonic():
+            MetricsCollector.record_connector_cache(self.name, "hit")
+            return _response(entry, request)
+        if entry is not None:
+            for name, value in entry.validators.items():
+                request.headers[name] = value
+
+        response = await self.inner.handle_async_request(request)
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.cache.refresh(entry, response)
+            MetricsCollector.record_connector_cache(self.name, "revalidated")
+            return _response(entry, request)
+
+        MetricsCollector.record_connector_cache(self.name, "miss")
+        if response.status_code != 200:
+            return response
+        # 本文を読み切って保存（復号済みの本文で応答を作り直す）
+        await response.aread()
+        self.cache.store(key, request, response, resource)
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROP_HEADERS]
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=headers,
+            content=response.content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """プロセス共有の応答キャッシュを取得（設定値から初期化）"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            maxsize=settings.connector_cache_max_entries,
+            max_body_bytes=settings.connector_cache_max_body_bytes,
+        )
+    return _response_cache
+
+__all__ = [
+    'CachedResponse',
+    'ResponseCache',
+    'CachingTransport',
+    'get_response_cache',
+]
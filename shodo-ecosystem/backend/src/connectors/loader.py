@@ -0,0 +1,77 @@
+"""
+コネクタ読み取りの合流（DataLoader 方式）
+同一イベントループ周回内の単一リソース取得を集め、重複を除いて batch_read の一回にまとめる
+
+- Shopify は batch_read が ids= フィルタで一括取得するため、N 件の取得が数回の上流呼び出しになる
+- 一括取得のない API（Stripe 等）でも同一IDの同時取得は一回にまとまる
+- 呼び出し元ごとに自身の結果を受け取る（取得失敗・未検出は get_resource と同じく None）
+- 結果はキャッシュしない（周回をまたいだ取得は常に上流へ問い合わせる）
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+BatchReader = Callable[[List[Dict[str, Any]]], Awaitable[List[Any]]]
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, dict) and set(result) == {"error"}
+
+class ResourceLoader:
+    """同一周回の (resource_type, resource_id) 取得をまとめて batch_read に渡す"""
+
+    def __init__(self, batch_read: BatchReader, max_batch: int = 250):
+        """
+        Args:
+            batch_read: 入力順に結果を返す一括取得関数（BaseSaaSConnector.batch_read）
+            max_batch: 一回の batch_read に渡す最大件数
+        """
+        self._batch_read = batch_read
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[str, str], Tuple[Dict[str, Any], asyncio.Future]] = {}
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, resource_type: str, resource_id: Any) -> Optional[Dict[str, Any]]:
+        """単一リソースを取得（同一周回の他の取得と合流）"""
+        key = (resource_type, str(resource_id))
+        entry = self._pending.get(key)
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            entry = ({"resource_type": resource_type, "resource_id": resource_id}, loop.create_future())
+            self._pending[key] = entry
+            if not self._scheduled:
+                self._scheduled = True
+                # 現在の周回で実行待ちのタスクがすべて取得要求を出した後に発行する
+                loop.call_soon(self._dispatch)
+        # 一人の呼び出し元のキャンセルが共有の Future に波及しないよう保護
+        return await asyncio.shield(entry[1])
+
+    def _dispatch(self) -> None:
+        self._scheduled = False
+        pending, self._pending = list(self._pending.values()), {}
+        for i in range(0, len(pending), self.max_batch):
+            task = asyncio.ensure_future(self._run(pending[i:i + self.max_batch]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            results = await self._batch_read([op for op, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        logger.debug("Coalesced resource reads", count=len(batch))
+        results = list(results) + [None] * (len(batch) - len(results))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(None if _is_error(result) else result)
+
+__all__ = [
+    'ResourceLoader',
+]
@@ -282,7 +282,7 @@ class LPRUniversalConnector(BaseSaaSConnector):
         """
         スナップショット作成
         """
-        resource = await self.get_resource(resource_type, resource_id)
+        resource = await self.load_resource(resource_type, resource_id)
         if not resource:
             raise ValueError(f"Resource {resource_type}/{resource_id} not found")
         
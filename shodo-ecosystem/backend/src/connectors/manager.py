@@ -10,6 +10,8 @@ from datetime import datetime
 from .base import BaseSaaSConnector, ConnectorCredentials
 from .shopify import ShopifyConnector
 from .stripe import StripeConnector
+from .sync_engine import SyncEngine, SyncSpec, WatermarkStore, apply_mapping
+from .transport import get_shared_transport
 
 class ConnectorManager:
     """
@@ -25,6 +27,7 @@ class ConnectorManager:
     def __init__(self):
         self.connectors: Dict[str, BaseSaaSConnector] = {}
         self.credentials_store: Dict[str, ConnectorCredentials] = {}
+        self.sync_watermarks = WatermarkStore()
         
     async def register_connector(
         self,
@@ -172,16 +175,18 @@ class ConnectorManager:
         source_connector: str,
         target_connector: str,
         resource_type: str,
-        mapping: Optional[Dict[str, str]] = None
+        mapping: Optional[Dict[str, str]] = None,
+        full: bool = False
     ) -> Dict[str, Any]:
         """
-        リソースの同期
+        リソースの同期（差分同期エンジンを使用）
         
         Args:
             source_connector: ソースコネクタ名
             target_connector: ターゲットコネクタ名
             resource_type: リソースタイプ
             mapping: フィールドマッピング
+            full: ウォーターマークを無視して全件を同期
         
         Returns:
             Dict: 同期結果
@@ -192,52 +197,8 @@ class ConnectorManager:
         if not source or not target:
             raise ValueError("Invalid connector names")
         
-        # ソースからリソース取得
-        source_resources = await source.list_resources(resource_type)
-        
-        sync_results = {
-            "total": len(source_resources),
-            "synced": 0,
-            "failed": 0,
-            "errors": []
-        }
-        
-        for resource in source_resources:
-            try:
-                # フィールドマッピング適用
-                if mapping:
-                    mapped_resource = self._apply_mapping(resource, mapping)
-                else:
-                    mapped_resource = resource
-                
-                # ターゲットに作成または更新
-                existing = await target.search_resources(
-                    resource_type,
-                    query=resource.get("id", "")
-                )
-                
-                if existing:
-                    await target.update_resource(
-                        resource_type,
-                        existing[0]["id"],
-                        mapped_resource
-                    )
-                else:
-                    await target.create_resource(
-                        resource_type,
-                        mapped_resource
-                    )
-                
-                sync_results["synced"] += 1
-                
-            except Exception as e:
-                sync_results["failed"] += 1
-                sync_results["errors"].append({
-                    "resource_id": resource.get("id"),
-                    "error": str(e)
-                })
-        
-        return sync_results
+        engine = SyncEngine(source, target, self.sync_watermarks, target_id=target_connector)
+        return await engine.run(SyncSpec(resource_type=resource_type, mapping=mapping), full=full)
     
     def _apply_mapping(self, resource: Dict[str, Any], mapping: Dict[str, str]) -> Dict[str, Any]:
         """
@@ -250,29 +211,7 @@ class ConnectorManager:
         Returns:
             Dict: マッピング適用後のリソース
         """
-        mapped = {}
-        
-        for source_field, target_field in mapping.items():
-            # ネストされたフィールドのサポート
-            if "." in source_field:
-                value = resource
-                for key in source_field.split("."):
-                    value = value.get(key, {})
-                    if not isinstance(value, dict):
-                        break
-            else:
-                value = resource.get(source_field)
-            
-            if "." in target_field:
-                keys = target_field.split(".")
-                target = mapped
-                for key in keys[:-1]:
-                    target = target.setdefault(key, {})
-                target[keys[-1]] = value
-            else:
-                mapped[target_field] = value
-        
-        return mapped
+        return apply_mapping(resource, mapping)
     
     async def create_unified_preview(
         self,
@@ -289,29 +228,27 @@ class ConnectorManager:
         Returns:
             Dict: 統合プレビュー結果
         """
-        previews = {}
-        
-        for name in connectors:
-            if name not in changes:
-                continue
-            
-            connector = self.get_connector(name)
-            if not connector:
-                continue
-            
-            # 各コネクタでプレビュー生成
-            resource_changes = changes[name]
+        async def build(connector: BaseSaaSConnector, resource_changes: Dict[str, Any]) -> Dict[str, Any]:
             snapshot = await connector.create_snapshot(
                 resource_changes["resource_type"],
                 resource_changes["resource_id"]
             )
-            
-            preview = await connector.generate_preview(
+            return await connector.generate_preview(
                 snapshot,
                 resource_changes["changes"]
             )
-            
-            previews[name] = preview
+        
+        # 各コネクタのプレビューを並行生成（同一コネクタへの取得は load_resource で合流）
+        targets = [
+            (name, self.get_connector(name))
+            for name in connectors
+            if name in changes
+        ]
+        targets = [(name, connector) for name, connector in targets if connector]
+        results = await asyncio.gather(*(
+            build(connector, changes[name]) for name, connector in targets
+        ))
+        previews = dict(zip((name for name, _ in targets), results))
         
         # 統合HTMLの生成
         combined_html = self._generate_combined_preview_html(previews)
@@ -391,6 +328,15 @@ class ConnectorManager:
         
         return base_css + "\n" + "\n".join(connector_css)
     
+    def get_pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        共有接続プールの利用状況（オリジン単位）
+        
+        Returns:
+            Dict: オリジン -> 接続数 / アクティブ / アイドル / 実行中リクエスト数
+        """
+        return get_shared_transport().stats()
+    
     async def health_check(self) -> Dict[str, Any]:
         """
         全コネクタのヘルスチェック
@@ -425,4 +371,36 @@ class ConnectorManager:
                     "timestamp": datetime.utcnow().isoformat()
                 }
         
-        return results
\ No newline at end of file
+        return results
+
+async def build_connector_for_connection(db, connection) -> BaseSaaSConnector:
+    """
+    サービス接続（ServiceConnection）とアクティブなAPIキーから初期化済みのコネクタを生成
+    """
+    from ..models.api_key import ServiceType
+    from ..services.auth.api_key_manager_db import DatabaseAPIKeyManager
+    
+    key = await DatabaseAPIKeyManager(db).get_active_key_for_user(
+        connection.user_id,
+        ServiceType(connection.service_type)
+    )
+    if not key:
+        raise ValueError(f"No active API key for connection {connection.id}")
+    
+    settings = connection.settings or {}
+    if connection.service_type == "shopify":
+        connector: BaseSaaSConnector = ShopifyConnector(
+            store_domain=settings.get("store_domain") or connection.service_account_id,
+            credentials=ConnectorCredentials(access_token=key)
+        )
+    elif connection.service_type == "stripe":
+        connector = StripeConnector(
+            credentials=ConnectorCredentials(api_key=key),
+            test_mode=settings.get("test_mode", False)
+        )
+    else:
+        raise ValueError(f"Unsupported service type: {connection.service_type}")
+    
+    if not await connector.initialize():
+        raise ConnectionError(f"Failed to connect {connection.service_type} for {connection.id}")
+    return connector
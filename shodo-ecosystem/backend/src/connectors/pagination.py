@@ -0,0 +1,108 @@
+"""
+コネクタのページネーション
+コネクタ固有のカーソル（Shopify の Link ヘッダー page_info、Stripe の starting_after、
+GraphQL の endCursor）を Page に統一し、先読み付きの非同期ジェネレーターで流す
+
+- 各ページの取得は直前ページのカーソルのみに依存する（offset による読み飛ばしをしない）
+- 先読みはバックグラウンドのタスクが有界キューへ積み、消費側がページ N を処理中に
+  ページ N+1 を取得する（キューが満杯なら取得側が待機し、メモリは prefetch ページ分に収まる）
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+_LINK_NEXT = re.compile(r'<([^>]+)>\s*;\s*rel="?next"?')
+
+@dataclass
+class Page:
+    """1ページ分の結果と次ページのカーソル（最終ページは None）"""
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    @classmethod
+    def from_graphql(cls, connection: Optional[Dict[str, Any]]) -> "Page":
+        """GraphQL の Relay コネクション（nodes または edges + pageInfo）から生成"""
+        connection = connection or {}
+        if "nodes" in connection:
+            items = connection["nodes"] or []
+        else:
+            items = [edge.get("node") for edge in connection.get("edges") or []]
+        page_info = connection.get("pageInfo") or {}
+        cursor = page_info.get("endCursor") if page_info.get("hasNextPage") else None
+        return cls(items=[item for item in items if item is not None], next_cursor=cursor)
+
+def next_link_param(response: httpx.Response, param: str = "page_info") -> Optional[str]:
+    """Link ヘッダーの rel="next" から指定パラメータ（Shopify の page_info 等）を取り出す"""
+    match = _LINK_NEXT.search(response.headers.get("link", ""))
+    if not match:
+        return None
+    values = parse_qs(urlparse(match.group(1)).query).get(param)
+    return values[0] if values else None
+
+PageFetcher = Callable[[Optional[str]], Awaitable[Page]]
+
+_DONE = object()
+
+async def iterate_pages(
+    fetch_page: PageFetcher,
+    prefetch: int = 2,
+    cursor: Optional[str] = None
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    カーソルを辿って全件を流す（最大 prefetch ページを先読み）
+
+    Args:
+        fetch_page: カーソルを受け取りページを返す関数（初回は cursor）
+        prefetch: 先読みするページ数（0 なら先読みしない）
+        cursor: 開始カーソル
+    """
+    if prefetch <= 0:
+        while True:
+            page = await fetch_page(cursor)
+            for item in page.items:
+                yield item
+            cursor = page.next_cursor
+            if not page.items or cursor is None:
+                return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=prefetch)
+
+    async def produce() -> None:
+        next_cursor = cursor
+        try:
+            while True:
+                page = await fetch_page(next_cursor)
+                await queue.put(page)
+                next_cursor = page.next_cursor
+                if not page.items or next_cursor is None:
+                    break
+            await queue.put(_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            page = await queue.get()
+            if page is _DONE:
+                break
+            if isinstance(page, Exception):
+                raise page
+            for item in page.items:
+                yield item
+    finally:
+        # 途中で打ち切られた場合も先読みタスクを残さない
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+__all__ = [
+    'Page',
+    'PageFetcher',
+    'iterate_pages',
+    'next_link_param',
+]
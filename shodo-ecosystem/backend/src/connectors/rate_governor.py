@@ -0,0 +1,220 @@
+"""
+コネクタのレートガバナー
+（コネクタ, 認証情報）ごとのトークンバケットで送信前に待機し、429 を起こさずに上限直下で流す
+
+- 初期値は ConnectorConfig.rate_limit（毎分）/ rate_limit_burst から設定
+- 上流のレスポンスヘッダーで継続的に補正する
+  - X-Shopify-Shop-Api-Call-Limit（"使用量/容量"。補充速度は設定値に戻す）
+  - Shopify GraphQL の extensions.cost.throttleStatus（REST とは別のコストバケット）
+  - Retry-After（Stripe 等の 429/503）
+  - 汎用の X-RateLimit-* / RateLimit-*（protocol_analyzer._detect_rate_limit と同じヘッダー）
+- 待機は asyncio.Lock（FIFO）で直列化し、到着順に公平に払い出す
+- REST と GraphQL のように上流の制限が別なら、GovernedTransport の route でリクエストごとにガバナーを選ぶ
+"""
+
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+_LIMIT_HEADERS = ("x-ratelimit-limit", "ratelimit-limit", "rate-limit-limit")
+_REMAINING_HEADERS = ("x-ratelimit-remaining", "ratelimit-remaining", "rate-limit-remaining")
+_RESET_HEADERS = ("x-ratelimit-reset", "ratelimit-reset", "rate-limit-reset")
+
+def _header_float(headers: httpx.Headers, names: Tuple[str, ...]) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value.split(",")[0].split(";")[0])
+            except ValueError:
+                continue
+    return None
+
+class RateGovernor:
+    """トークンバケット（上流ヘッダーで容量・残量・補充速度を補正）"""
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float, headroom: float = 1.0):
+        """
+        Args:
+            name: ログ/状態表示用の名前
+            capacity: バケット容量（バースト上限）
+            refill_per_second: 毎秒の補充量
+            headroom: 上流の残量から差し引く余裕分
+        """
+        self.name = name
+        self.capacity = max(1.0, float(capacity))
+        self.refill_per_second = max(0.01, float(refill_per_second))
+        self._configured_refill = self.refill_per_second
+        self.headroom = headroom
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_per_second)
+            self._updated = now
+
+    async def acquire(self, cost: float = 1.0) -> None:
+        """送信枠を確保（足りなければ到着順に待機）"""
+        cost = min(cost, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                self.throttled += 1
+                await asyncio.sleep((cost - self._tokens) / self.refill_per_second)
+
+    def _set_remaining(self, remaining: float) -> None:
+        """上流の残量に合わせる（ローカルの見積もりより少ない場合のみ）"""
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, max(0.0, remaining - self.headroom))
+
+    def block_for(self, seconds: float) -> None:
+        """指定秒数は送信しない（Retry-After）"""
+        if seconds > 0:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            # 補充は待機明けから再開
+            self._updated = self._blocked_until
+
+    def observe(self, response: httpx.Response) -> None:
+        """レスポンスヘッダーから上流の制限状態を取り込む"""
+        headers = response.headers
+
+        retry_after = headers.get("retry-after")
+        if retry_after and response.status_code in (429, 503):
+            try:
+                self.block_for(float(retry_after))
+            except ValueError:
+                self.block_for(1.0)
+        elif response.status_code == 429:
+            self.block_for(1.0)
+
+        call_limit = headers.get("x-shopify-shop-api-call-limit")
+        if call_limit:
+            try:
+                used, capacity = (float(v) for v in call_limit.split("/", 1))
+                self.capacity = capacity
+                self.refill_per_second = self._configured_refill
+                self._set_remaining(capacity - used)
+            except ValueError:
+                pass
+            return
+
+        limit = _header_float(headers, _LIMIT_HEADERS)
+        remaining = _header_float(headers, _REMAINING_HEADERS)
+        if limit:
+            self.capacity = max(1.0, limit)
+        if remaining is not None:
+            self._set_remaining(remaining)
+            reset = _header_float(headers, _RESET_HEADERS)
+            if reset is not None and remaining <= self.headroom:
+                # エポック秒または残り秒数のどちらの形式も受け付ける
+                wait = reset - time.time() if reset > 1e9 else reset
+                self.block_for(min(wait, 3600.0))
+
+    def observe_graphql_cost(self, extensions: Optional[Dict[str, Any]]) -> None:
+        """Shopify GraphQL の cost.throttleStatus を取り込む"""
+        status = ((extensions or {}).get("cost") or {}).get("throttleStatus")
+        if not status:
+            return
+        try:
+            self.capacity = float(status["maximumAvailable"])
+            self.refill_per_second = float(status["restoreRate"])
+            self._set_remaining(float(status["currentlyAvailable"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    def status(self) -> Dict[str, Any]:
+        """現在の状態（get_rate_limit_status 用）"""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self._blocked_until - now)
+        until_full = (self.capacity - self._tokens) / self.refill_per_second
+        return {
+            "limit": self.capacity,
+            "remaining": int(self._tokens),
+            "refill_per_second": self.refill_per_second,
+            "blocked_seconds": round(wait, 3),
+            "throttled": self.throttled,
+            "reset_at": datetime.fromtimestamp(time.time() + wait + until_full, timezone.utc),
+        }
+
+class GovernedTransport(httpx.AsyncBaseTransport):
+    """送信前にガバナーで待機し、応答ヘッダーをガバナーへ反映するトランスポート"""
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        governor: RateGovernor,
+        route: Optional[Callable[[httpx.Request], Optional[RateGovernor]]] = None
+    ):
+        """
+        Args:
+            inner: 送信先トランスポート
+            governor: 既定のガバナー
+            route: リクエストごとに別のガバナーを選ぶ関数（None を返したら既定を使う）
+        """
+        self.inner = inner
+        self.governor = governor
+        self.route = route
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        governor = (self.route(request) if self.route else None) or self.governor
+        await governor.acquire()
+        response = await self.inner.handle_async_request(request)
+        governor.observe(response)
+        return response
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+_governors: Dict[Tuple[str, str], RateGovernor] = {}
+
+def credential_scope(*secrets: Optional[str]) -> str:
+    """認証情報を識別するキー（秘密値そのものは保持しない）"""
+    material = "\0".join(s or "" for s in secrets)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+def get_rate_governor(
+    connector: str,
+    scope: str,
+    rate_limit_per_minute: int,
+    burst: Optional[int] = None
+) -> RateGovernor:
+    """（コネクタ, 認証情報）ごとのガバナーを取得（同一テナントのインスタンス間で共有）"""
+    key = (connector, scope)
+    governor = _governors.get(key)
+    if governor is None:
+        refill = rate_limit_per_minute / 60.0
+        governor = RateGovernor(
+            name=f"{connector}:{scope}",
+            capacity=burst or max(1, int(refill)),
+            refill_per_second=refill,
+        )
+        _governors[key] = governor
+    return governor
+
+__all__ = [
+    'RateGovernor',
+    'GovernedTransport',
+    'credential_scope',
+    'get_rate_governor',
+]
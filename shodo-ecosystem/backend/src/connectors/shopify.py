@@ -3,21 +3,34 @@ Shopifyコネクタ実装
 Eコマースプラットフォーム連携
 """
 
-import httpx
 import hashlib
 import hmac
 import json
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncGenerator
 from datetime import datetime
 
+import httpx
+
 from .base import (
     BaseSaaSConnector, ConnectorConfig, ConnectorCredentials,
     ConnectorType, AuthMethod, ResourceSnapshot, ChangeSet
 )
+from .rate_governor import RateGovernor, get_rate_governor
+from .pagination import Page, next_link_param
+from .shopify_bulk import ShopifyBulkExporter
 
 class ShopifyConnector(BaseSaaSConnector):
     """Shopify API連携コネクタ"""
     
+    MAX_PAGE_SIZE = 250
+    INCREMENTAL_FIELD = "updated_at"
+    INCREMENTAL_FILTER = "updated_at_min"
+    # REST の一覧は metadata を持たず、メタフィールドも一覧に含まれないためソースのIDを保持できない
+    EXTERNAL_ID_FIELD = None
+    # GraphQL のコストバケット（標準プラン。throttleStatus で補正）
+    GRAPHQL_BUCKET = 1000
+    GRAPHQL_RESTORE_RATE = 50
+    
     RESOURCE_TYPES = {
         "product": "products",
         "order": "orders",
@@ -38,7 +51,9 @@ class ShopifyConnector(BaseSaaSConnector):
             auth_method=AuthMethod.BEARER,
             base_url=f"https://{store_domain}/admin/api/2024-01",
             api_version="2024-01",
-            rate_limit=40,  # Shopify Plus rate limit
+            rate_limit=120,  # REST leaky bucket: 2 requests/second
+            rate_limit_burst=40,  # bucket size (corrected from X-Shopify-Shop-Api-Call-Limit)
+            cache_resources=["product", "collection", "customer", "page", "blog", "article", "theme"],
             timeout=30,
             retry_count=3,
             retry_delay=1
@@ -48,7 +63,7 @@ class ShopifyConnector(BaseSaaSConnector):
         
     async def initialize(self) -> bool:
         """初期化"""
-        self._session = httpx.AsyncClient(
+        self._session = self._create_session(
             base_url=self.config.base_url,
             headers=self._get_headers(),
             timeout=self.config.timeout
@@ -56,6 +71,20 @@ class ShopifyConnector(BaseSaaSConnector):
         self._initialized = await self.validate_connection()
         return self._initialized
     
+    def _get_graphql_governor(self) -> RateGovernor:
+        """GraphQL のコストバケット（REST のバケットとは上流で別管理のため分ける）"""
+        return get_rate_governor(
+            f"{self.config.name}:graphql",
+            self._credential_scope(),
+            self.GRAPHQL_RESTORE_RATE * 60,
+            self.GRAPHQL_BUCKET
+        )
+    
+    def _route_rate_governor(self, request: httpx.Request) -> Optional[RateGovernor]:
+        if request.url.path.endswith("/graphql.json"):
+            return self._get_graphql_governor()
+        return None
+    
     async def authenticate(self) -> bool:
         """認証"""
         try:
@@ -91,25 +120,37 @@ class ShopifyConnector(BaseSaaSConnector):
         limit: Optional[int] = 50,
         offset: Optional[int] = 0
     ) -> List[Dict[str, Any]]:
-        """リソース一覧取得"""
-        endpoint = self.RESOURCE_TYPES.get(resource_type, resource_type)
-        params = {
-            "limit": min(limit or 50, 250),  # Shopify max is 250
-            "page": (offset // (limit or 50)) + 1 if offset else 1
-        }
-        
-        if filters:
-            params.update(filters)
-        
+        """リソース一覧取得（page パラメータは廃止済みのため page_info カーソルで辿る）"""
         try:
-            response = await self._session.get(f"/{endpoint}.json", params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data.get(endpoint, [])
+            return await self._list_via_pages(
+                resource_type, filters, min(limit or 50, self.MAX_PAGE_SIZE), offset or 0
+            )
         except Exception as e:
             print(f"Error listing {resource_type}: {e}")
             return []
     
+    async def list_page(
+        self,
+        resource_type: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """1ページ取得（次ページは Link ヘッダーの page_info）"""
+        endpoint = self.RESOURCE_TYPES.get(resource_type, resource_type)
+        params: Dict[str, Any] = {"limit": min(limit or 50, self.MAX_PAGE_SIZE)}
+        if cursor:
+            # page_info と併用できるのは limit / fields のみ（他の条件はカーソルに含まれる）
+            params["page_info"] = cursor
+            if filters and "fields" in filters:
+                params["fields"] = filters["fields"]
+        elif filters:
+            params.update(filters)
+        
+        response = await self._session.get(f"/{endpoint}.json", params=params)
+        response.raise_for_status()
+        return Page(response.json().get(endpoint, []), next_link_param(response))
+    
     async def get_resource(
         self,
         resource_type: str,
@@ -158,6 +199,77 @@ class ShopifyConnector(BaseSaaSConnector):
             print(f"Error searching {resource_type}: {e}")
             return []
     
+    # ids= フィルタで一括取得できるリソース（追加パラメータ付き）
+    BULK_READ_PARAMS = {
+        "product": {},
+        "customer": {},
+        "order": {"status": "any"},
+    }
+    BULK_READ_MAX_IDS = 250
+    
+    async def batch_read(
+        self,
+        operations: List[Dict[str, Any]],
+        fail_fast: bool = False
+    ) -> List[Dict[str, Any]]:
+        """バッチ読み取り（対応リソースは ids= で最大250件ずつ一括取得）"""
+        results: List[Any] = [None] * len(operations)
+        grouped: Dict[str, Dict[str, List[int]]] = {}
+        rest: List[int] = []
+        for i, op in enumerate(operations):
+            if op["resource_type"] in self.BULK_READ_PARAMS:
+                grouped.setdefault(op["resource_type"], {}).setdefault(str(op["resource_id"]), []).append(i)
+            else:
+                rest.append(i)
+        
+        async def fetch(resource_type: str, ids: List[str]) -> Dict[str, Any]:
+            endpoint = self.RESOURCE_TYPES[resource_type]
+            params = {"ids": ",".join(ids), "limit": len(ids), **self.BULK_READ_PARAMS[resource_type]}
+            response = await self._session.get(f"/{endpoint}.json", params=params)
+            response.raise_for_status()
+            return {"items": {str(item.get("id")): item for item in response.json().get(endpoint, [])}}
+        
+        chunks = [
+            (resource_type, ids[i:i + self.BULK_READ_MAX_IDS])
+            for resource_type, by_id in grouped.items()
+            for ids in [list(by_id)]
+            for i in range(0, len(ids), self.BULK_READ_MAX_IDS)
+        ]
+        fetched = await self._run_batch(
+            [{"resource_type": t, "ids": ids} for t, ids in chunks],
+            lambda op: fetch(op["resource_type"], op["ids"]),
+            fail_fast
+        )
+        for (resource_type, ids), found in zip(chunks, fetched):
+            for resource_id in ids:
+                # 見つからないIDは None（個別取得と同じ）、チャンク失敗はエラーを各操作へ
+                value = found["items"].get(resource_id) if "items" in found else found
+                for i in grouped[resource_type][resource_id]:
+                    results[i] = value
+        
+        if rest:
+            others = await super().batch_read([operations[i] for i in rest], fail_fast)
+            for i, value in zip(rest, others):
+                results[i] = value
+        return results
+    
+    async def bulk_export(
+        self,
+        data_type: str,
+        search: Optional[str] = None,
+        **options
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        バルク操作で全件エクスポート（JSONL を1件ずつ流す、子は親オブジェクトに格納）
+        
+        Args:
+            data_type: products / orders / customers / inventory
+            search: Shopify 検索構文の絞り込み（例: "created_at:>=2024-01-01"）
+            **options: ShopifyBulkExporter のオプション
+        """
+        async for obj in ShopifyBulkExporter(self, **options).export(data_type, search):
+            yield obj
+    
     # === スナップショット・プレビュー ===
     
     async def create_snapshot(
@@ -166,7 +278,7 @@ class ShopifyConnector(BaseSaaSConnector):
         resource_id: str
     ) -> ResourceSnapshot:
         """スナップショット作成"""
-        resource = await self.get_resource(resource_type, resource_id)
+        resource = await self.load_resource(resource_type, resource_id)
         if not resource:
             raise ValueError(f"Resource {resource_type}/{resource_id} not found")
         
@@ -531,4 +643,17 @@ class ShopifyConnector(BaseSaaSConnector):
             hashlib.sha256
         ).hexdigest()
         
-        return hmac.compare_digest(calculated_hmac, hmac_header)
\ No newline at end of file
+        return hmac.compare_digest(calculated_hmac, hmac_header)
+    
+    async def process_webhook(
+        self,
+        payload: Dict[str, Any],
+        headers: Dict[str, str]
+    ) -> bool:
+        """Webhook処理（トピックのリソース種別の応答キャッシュを破棄）"""
+        topic = next((v for k, v in headers.items() if k.lower() == "x-shopify-topic"), "")
+        endpoint = topic.split("/", 1)[0]
+        if endpoint:
+            resource_type = next((t for t, e in self.RESOURCE_TYPES.items() if e == endpoint), endpoint)
+            self.invalidate_cache(resource_type)
+        return True
@@ -0,0 +1,239 @@
+"""
+Shopify Bulk Operations エクスポート
+GraphQL の bulkOperationRunQuery で全件エクスポートを依頼し、完了後の JSONL を1行ずつ流す
+
+- 完了待ちはバックオフ付きのポーリング（間隔を倍々に伸ばし上限で頭打ち）
+- 結果の JSONL は親の行の直後に子の行（__parentId 付き）が並ぶため、
+  保持するのは処理中の親オブジェクト1件のツリーのみ（件数によらずメモリ一定）
+- 結果ファイルは署名付き URL のため、Shopify の認証ヘッダーを持たないクライアントで取得する
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Optional
+
+import httpx
+import structlog
+
+from .transport import create_client
+
+logger = structlog.get_logger()
+
+# データ種別ごとのクエリ（{search} に検索条件）と、子オブジェクトの型 → 親での格納キー
+BULK_QUERIES: Dict[str, Dict[str, Any]] = {
+    "products": {
+        "query": """
+        {{
+          products{search} {{
+            edges {{ node {{
+              id title handle vendor productType status tags createdAt updatedAt
+              variants {{ edges {{ node {{ id title sku price inventoryQuantity }} }} }}
+            }} }}
+          }}
+        }}
+        """,
+        "children": {"ProductVariant": "variants"},
+    },
+    "orders": {
+        "query": """
+        {{
+          orders{search} {{
+            edges {{ node {{
+              id name email createdAt updatedAt displayFinancialStatus displayFulfillmentStatus
+              totalPriceSet {{ shopMoney {{ amount currencyCode }} }}
+              lineItems {{ edges {{ node {{ id title sku quantity }} }} }}
+            }} }}
+          }}
+        }}
+        """,
+        "children": {"LineItem": "lineItems"},
+    },
+    "customers": {
+        "query": """
+        {{
+          customers{search} {{
+            edges {{ node {{
+              id email firstName lastName phone state createdAt updatedAt numberOfOrders
+            }} }}
+          }}
+        }}
+        """,
+        "children": {},
+    },
+    "inventory": {
+        "query": """
+        {{
+          inventoryItems{search} {{
+            edges {{ node {{
+              id sku tracked createdAt updatedAt
+              inventoryLevels {{ edges {{ node {{ id quantities(names: ["available"]) {{ name quantity }} location {{ id name }} }} }} }}
+            }} }}
+          }}
+        }}
+        """,
+        "children": {"InventoryLevel": "inventoryLevels"},
+    },
+}
+
+_RUN_MUTATION = """
+mutation($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+_STATUS_QUERY = """
+query($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation { id status errorCode objectCount url partialDataUrl }
+  }
+}
+"""
+
+class BulkOperationError(RuntimeError):
+    """バルク操作の失敗"""
+
+def build_bulk_query(data_type: str, search: Optional[str] = None) -> str:
+    """データ種別と検索条件（Shopify 検索構文）からバルククエリを生成"""
+    definition = BULK_QUERIES.get(data_type)
+    if definition is None:
+        raise ValueError(f"Unsupported bulk export type: {data_type}")
+    return definition["query"].format(search=f"(query: {json.dumps(search)})" if search else "")
+
+def _gid_type(gid: str) -> str:
+    # "gid://shopify/ProductVariant/123" → "ProductVariant"
+    parts = gid.split("/")
+    return parts[3] if len(parts) > 4 else ""
+
+async def iter_bulk_objects(
+    lines: AsyncIterator[str],
+    children: Optional[Dict[str, str]] = None
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    JSONL の行から親子を組み立てたオブジェクトを流す
+
+    子の行（__parentId 付き）は直前までに現れた親の children キー配下のリストへ追加する。
+    次のトップレベル行が来た時点で前の親を確定して返す。
+    """
+    children = children or {}
+    current: Optional[Dict[str, Any]] = None
+    # 処理中のツリー内の id → オブジェクト（孫の親探索用）
+    nodes: Dict[str, Dict[str, Any]] = {}
+
+    async for line in lines:
+        if not line.strip():
+            continue
+        obj = json.loads(line)
+        parent_id = obj.pop("__parentId", None)
+        if parent_id is None:
+            if current is not None:
+                yield current
+            current = obj
+            nodes = {obj["id"]: obj} if "id" in obj else {}
+            continue
+        parent = nodes.get(parent_id)
+        if parent is None:
+            logger.warning("Bulk export child without parent", parent_id=parent_id)
+            continue
+        child_type = _gid_type(obj.get("id", ""))
+        key = children.get(child_type) or (child_type[:1].lower() + child_type[1:] + "s" if child_type else "children")
+        parent.setdefault(key, []).append(obj)
+        if "id" in obj:
+            nodes[obj["id"]] = obj
+
+    if current is not None:
+        yield current
+
+class ShopifyBulkExporter:
+    """Shopify のバルク操作を実行して結果を流す"""
+
+    def __init__(
+        self,
+        connector,
+        download_client: Optional[httpx.AsyncClient] = None,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 30.0,
+        timeout: float = 3600.0
+    ):
+        """
+        Args:
+            connector: 初期化済みの ShopifyConnector
+            download_client: 結果ファイル取得用クライアント（省略時は共有プールの認証なしクライアント）
+            poll_interval: 初回のポーリング間隔（秒）
+            max_poll_interval: ポーリング間隔の上限（秒）
+            timeout: 完了待ちの上限（秒）
+        """
+        self.connector = connector
+        self.download_client = download_client
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+
+    async def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.connector._session.post(
+            "/graphql.json",
+            json={"query": query, "variables": variables}
+        )
+        response.raise_for_status()
+        body = response.json()
+        self.connector._get_graphql_governor().observe_graphql_cost(body.get("extensions"))
+        if body.get("errors"):
+            raise BulkOperationError(str(body["errors"]))
+        return body.get("data") or {}
+
+    async def submit(self, query: str) -> str:
+        """バルク操作を開始して ID を返す"""
+        data = await self._graphql(_RUN_MUTATION, {"query": query})
+        result = data.get("bulkOperationRunQuery") or {}
+        if result.get("userErrors"):
+            raise BulkOperationError(str(result["userErrors"]))
+        return result["bulkOperation"]["id"]
+
+    async def wait(self, operation_id: str) -> Optional[str]:
+        """完了まで待機して結果 URL を返す（結果0件なら None）"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        interval = self.poll_interval
+        while True:
+            data = await self._graphql(_STATUS_QUERY, {"id": operation_id})
+            operation = data.get("node") or {}
+            status = operation.get("status")
+            if status == "COMPLETED":
+                logger.info("Shopify bulk operation completed", id=operation_id, objects=operation.get("objectCount"))
+                return operation.get("url")
+            if status in ("FAILED", "CANCELED", "EXPIRED"):
+                raise BulkOperationError(f"Bulk operation {status.lower()}: {operation.get('errorCode')}")
+            if loop.time() + interval > deadline:
+                raise BulkOperationError("Bulk operation timed out")
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+
+    async def _lines(self, url: str) -> AsyncGenerator[str, None]:
+        client = self.download_client or create_client(timeout=httpx.Timeout(60.0, read=300.0))
+        try:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    yield line
+        finally:
+            if self.download_client is None:
+                await client.aclose()
+
+    async def export(self, data_type: str, search: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """データ種別を全件エクスポートして1オブジェクトずつ流す"""
+        operation_id = await self.submit(build_bulk_query(data_type, search))
+        url = await self.wait(operation_id)
+        if not url:
+            return
+        async for obj in iter_bulk_objects(self._lines(url), BULK_QUERIES[data_type]["children"]):
+            yield obj
+
+__all__ = [
+    'BULK_QUERIES',
+    'BulkOperationError',
+    'ShopifyBulkExporter',
+    'build_bulk_query',
+    'iter_bulk_objects',
+]
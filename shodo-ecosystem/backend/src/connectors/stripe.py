@@ -3,7 +3,6 @@ Stripeコネクタ実装
 決済プラットフォーム連携
 """
 
-import httpx
 import hashlib
 import hmac
 import json
@@ -15,10 +14,18 @@ from .base import (
     BaseSaaSConnector, ConnectorConfig, ConnectorCredentials,
     ConnectorType, AuthMethod, ResourceSnapshot, ChangeSet
 )
+from .pagination import Page
 
 class StripeConnector(BaseSaaSConnector):
     """Stripe API連携コネクタ"""
     
+    MAX_PAGE_SIZE = 100
+    # Stripe の一覧は更新日時で絞り込めないため作成日時を使う。既存レコードの更新は増分では拾えず、
+    # 定期同期の全件パス（SyncEngine.run の full_every）で回収する
+    INCREMENTAL_FIELD = "created"
+    INCREMENTAL_FILTER = "created[gte]"
+    EXTERNAL_ID_FIELD = "metadata.source_id"
+    
     RESOURCE_TYPES = {
         "customer": "customers",
         "payment_intent": "payment_intents",
@@ -41,7 +48,8 @@ class StripeConnector(BaseSaaSConnector):
             auth_method=AuthMethod.BEARER,
             base_url="https://api.stripe.com/v1",
             api_version="2023-10-16",
-            rate_limit=100,  # Stripe default rate limit
+            rate_limit=1500 if test_mode else 6000,  # 25 / 100 requests per second
+            rate_limit_burst=25 if test_mode else 100,
             timeout=30,
             retry_count=3,
             retry_delay=1
@@ -51,7 +59,7 @@ class StripeConnector(BaseSaaSConnector):
         
     async def initialize(self) -> bool:
         """初期化"""
-        self._session = httpx.AsyncClient(
+        self._session = self._create_session(
             base_url=self.config.base_url,
             headers=self._get_headers(),
             timeout=self.config.timeout,
@@ -113,28 +121,37 @@ class StripeConnector(BaseSaaSConnector):
         limit: Optional[int] = 10,
         offset: Optional[int] = 0
     ) -> List[Dict[str, Any]]:
-        """リソース一覧取得"""
-        endpoint = self.RESOURCE_TYPES.get(resource_type, resource_type)
-        params = {
-            "limit": min(limit or 10, 100),  # Stripe max is 100
-        }
-        
-        if offset:
-            # Stripeはcursor-based pagination
-            params["starting_after"] = offset
-        
-        if filters:
-            params.update(filters)
-        
+        """リソース一覧取得（Stripe は offset を持たないため starting_after で辿る）"""
         try:
-            response = await self._session.get(f"/{endpoint}", params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("data", [])
+            return await self._list_via_pages(
+                resource_type, filters, min(limit or 10, self.MAX_PAGE_SIZE), offset or 0
+            )
         except Exception as e:
             print(f"Error listing {resource_type}: {e}")
             return []
     
+    async def list_page(
+        self,
+        resource_type: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """1ページ取得（次ページは最後のオブジェクトIDを starting_after に指定）"""
+        endpoint = self.RESOURCE_TYPES.get(resource_type, resource_type)
+        params: Dict[str, Any] = {"limit": min(limit or 10, self.MAX_PAGE_SIZE)}
+        if filters:
+            params.update(filters)
+        if cursor:
+            params["starting_after"] = cursor
+        
+        response = await self._session.get(f"/{endpoint}", params=params)
+        response.raise_for_status()
+        data = response.json()
+        items = data.get("data", [])
+        next_cursor = items[-1].get("id") if data.get("has_more") and items else None
+        return Page(items, next_cursor)
+    
     async def get_resource(
         self,
         resource_type: str,
@@ -191,7 +208,7 @@ class StripeConnector(BaseSaaSConnector):
         resource_id: str
     ) -> ResourceSnapshot:
         """スナップショット作成"""
-        resource = await self.get_resource(resource_type, resource_id)
+        resource = await self.load_resource(resource_type, resource_id)
         if not resource:
             raise ValueError(f"Resource {resource_type}/{resource_id} not found")
         
@@ -757,4 +774,19 @@ class StripeConnector(BaseSaaSConnector):
             hashlib.sha256
         ).hexdigest()
         
-        return any(hmac.compare_digest(expected_signature, sig) for sig in signatures)
\ No newline at end of file
+        return any(hmac.compare_digest(expected_signature, sig) for sig in signatures)
+    
+    async def process_webhook(
+        self,
+        payload: Dict[str, Any],
+        headers: Dict[str, str]
+    ) -> bool:
+        """Webhook処理（イベント対象のリソース種別の応答キャッシュを破棄）"""
+        event_type = payload.get("type", "")
+        if event_type:
+            # "customer.subscription.updated" → subscription, "invoice.paid" → invoice
+            parts = event_type.split(".")[:-1]
+            resource_type = next((p for p in reversed(parts) if p in self.RESOURCE_TYPES), parts[0] if parts else None)
+            if resource_type:
+                self.invalidate_cache(resource_type)
+        return True
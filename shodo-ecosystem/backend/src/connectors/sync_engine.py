@@ -0,0 +1,260 @@
+"""
+コネクタ間の差分同期エンジン
+ソースをストリーミングで読み、ターゲットの索引と内容ハッシュで突き合わせて変更分だけを書き込む
+
+- ターゲットは最初に一度だけ全件をストリーミングし、外部ID（ソースのID）→（ターゲットID, 内容ハッシュ）の索引を作る
+  （従来の1件ごとの search_resources による N+1 検索をしない）
+- マッピング後の内容ハッシュが索引と一致するレコードは書き込まない
+  （マッピングも比較フィールドもなければ、ソースの id 以外のトップレベルフィールドをフィールド単位で比較する）
+- 外部IDの保存先はターゲットコネクタの EXTERNAL_ID_FIELD（保持できないターゲットへは同期しない）
+- 書き込みは同時実行数を制限して並行実行し、実行中の件数分しかメモリに保持しない
+- （ソース, ターゲット, リソース種別）ごとに更新日時/カーソルのウォーターマークを保存し、
+  次回以降はソースの増分フィルター（Shopify: updated_at_min 等）で変更分だけを読む
+- 失敗があった回はウォーターマークを進めない（次回に再試行される）
+- 増分フィールドが作成日時のソース（Stripe）は既存レコードの更新を増分で拾えないため、
+  full_every で定期的に全件パスを行う
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+import structlog
+
+from .base import BaseSaaSConnector
+
+logger = structlog.get_logger()
+
+_MISSING = object()
+
+# 結果に含めるエラーの最大件数（件数自体は failed に全件数える）
+MAX_REPORTED_ERRORS = 100
+
+def get_path(resource: Dict[str, Any], path: str, default: Any = None) -> Any:
+    """ドット区切りのパスで値を取得"""
+    value: Any = resource
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return default
+        value = value.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+    return value
+
+def set_path(resource: Dict[str, Any], path: str, value: Any) -> None:
+    """ドット区切りのパスに値を設定（途中の辞書は作成）"""
+    keys = path.split(".")
+    target = resource
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+def apply_mapping(resource: Dict[str, Any], mapping: Dict[str, str]) -> Dict[str, Any]:
+    """フィールドマッピングを適用（ソースのパス → ターゲットのパス）"""
+    mapped: Dict[str, Any] = {}
+    for source_field, target_field in mapping.items():
+        set_path(mapped, target_field, get_path(resource, source_field))
+    return mapped
+
+def content_hash(record: Dict[str, Any], fields: Optional[List[str]] = None) -> str:
+    """比較対象フィールドの内容ハッシュ（fields 省略時は全体）"""
+    if fields is not None:
+        record = {field: get_path(record, field) for field in fields}
+    data = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def field_hashes(record: Dict[str, Any]) -> Dict[str, str]:
+    """トップレベルフィールドごとの内容ハッシュ（比較フィールド未指定時の索引用）"""
+    return {key: _value_hash(value) for key, value in record.items() if key != "id"}
+
+def _value_hash(value: Any) -> str:
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+# 索引の内容ハッシュ（比較フィールド指定時は全体のハッシュ、未指定時はフィールドごと）
+Digest = Union[str, Dict[str, str]]
+
+@dataclass
+class SyncSpec:
+    """同期の定義"""
+    resource_type: str
+    target_resource_type: Optional[str] = None
+    mapping: Optional[Dict[str, str]] = None
+    # ターゲット側でソースのIDを保持するフィールド（ドット区切り可。省略時はターゲットの EXTERNAL_ID_FIELD）
+    external_id_field: Optional[str] = None
+    # 変更判定に使うターゲットのフィールド（省略時はマッピング先すべて、マッピングもなければソースの id 以外）
+    compare_fields: Optional[List[str]] = None
+    concurrency: int = 8
+
+    @property
+    def target_type(self) -> str:
+        return self.target_resource_type or self.resource_type
+
+    @property
+    def fields(self) -> Optional[List[str]]:
+        if self.compare_fields is not None:
+            return self.compare_fields
+        return list(self.mapping.values()) if self.mapping else None
+
+class WatermarkStore:
+    """ウォーターマークの保存先（既定はプロセス内）"""
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None):
+        self.values: Dict[str, Any] = dict(initial or {})
+
+    async def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self.values[key] = value
+
+class SyncEngine:
+    """ソースからターゲットへの差分同期"""
+
+    def __init__(
+        self,
+        source: BaseSaaSConnector,
+        target: BaseSaaSConnector,
+        store: Optional[WatermarkStore] = None,
+        target_id: Optional[str] = None
+    ):
+        """
+        Args:
+            source: ソースコネクタ
+            target: ターゲットコネクタ
+            store: ウォーターマークの保存先
+            target_id: ターゲットの識別子（接続IDなど。同じ種別のターゲットが複数ある場合に
+                ウォーターマークを分けるため。省略時はコネクタ名）
+        """
+        self.source = source
+        self.target = target
+        self.store = store or WatermarkStore()
+        self.target_id = target_id or target.config.name
+
+    def watermark_key(self, spec: SyncSpec) -> str:
+        return f"{self.source.config.name}:{self.target_id}:{spec.resource_type}"
+
+    def external_id_field(self, spec: SyncSpec) -> str:
+        """ターゲットでソースのIDを保持するフィールド"""
+        field = spec.external_id_field or getattr(self.target, "EXTERNAL_ID_FIELD", None)
+        if not field:
+            raise ValueError(
+                f"{self.target.config.name} cannot store source IDs; "
+                "set external_id_field to a field the target returns in its listings"
+            )
+        return field
+
+    async def load_index(self, spec: SyncSpec) -> Dict[str, Tuple[Any, Digest]]:
+        """ターゲットの索引（外部ID → (ターゲットID, 内容ハッシュ)）"""
+        external_id_field = self.external_id_field(spec)
+        fields = spec.fields
+        index: Dict[str, Tuple[Any, Digest]] = {}
+        async for record in self.target.stream_resources(spec.target_type):
+            external_id = get_path(record, external_id_field)
+            if external_id is not None:
+                digest = content_hash(record, fields) if fields is not None else field_hashes(record)
+                index[str(external_id)] = (record.get("id"), digest)
+        return index
+
+    @staticmethod
+    def _unchanged(spec: SyncSpec, payload: Dict[str, Any], digest: Digest) -> bool:
+        fields = spec.fields
+        if fields is not None:
+            return digest == content_hash(payload, fields)
+        # ターゲットに余分なフィールド（ターゲット側の ID・タイムスタンプ等）があっても変更とみなさない
+        return all(digest.get(key) == value for key, value in field_hashes(payload).items())
+
+    async def run(self, spec: SyncSpec, full: bool = False, full_every: Optional[float] = None) -> Dict[str, Any]:
+        """
+        同期を実行
+
+        Args:
+            spec: 同期の定義
+            full: ウォーターマークを無視して全件を読む
+            full_every: 前回の全件パスからこの秒数が経っていれば全件を読む
+                （増分フィールドで更新を拾えないソース向け）
+        """
+        key = self.watermark_key(spec)
+        full_key = f"{key}:full_at"
+        if not full and full_every is not None:
+            last_full = await self.store.get(full_key)
+            full = last_full is None or time.time() - last_full >= full_every
+        field, source_filter = self.source.INCREMENTAL_FIELD, self.source.INCREMENTAL_FILTER
+        watermark = None if full else await self.store.get(key)
+        filters = {source_filter: watermark} if watermark is not None and source_filter else None
+        started = time.time()
+
+        external_id_field = self.external_id_field(spec)
+        index = await self.load_index(spec)
+        results: Dict[str, Any] = {"total": 0, "synced": 0, "skipped": 0, "failed": 0, "errors": []}
+        semaphore = asyncio.Semaphore(max(1, spec.concurrency))
+        tasks: Set[asyncio.Task] = set()
+        high_water = watermark
+
+        async def write(source_id: str, payload: Dict[str, Any], existing: Optional[Tuple[Any, Digest]]) -> None:
+            try:
+                if existing:
+                    await self.target.update_resource(spec.target_type, existing[0], payload)
+                else:
+                    await self.target.create_resource(spec.target_type, payload)
+                results["synced"] += 1
+            except Exception as e:
+                results["failed"] += 1
+                if len(results["errors"]) < MAX_REPORTED_ERRORS:
+                    results["errors"].append({"resource_id": source_id, "error": str(e)})
+            finally:
+                semaphore.release()
+
+        try:
+            async for resource in self.source.stream_resources(spec.resource_type, filters):
+                results["total"] += 1
+                source_id = str(resource.get("id"))
+                updated = resource.get(field) if field else None
+                if updated is not None and (high_water is None or updated > high_water):
+                    high_water = updated
+
+                payload = apply_mapping(resource, spec.mapping) if spec.mapping else copy.deepcopy(resource)
+                set_path(payload, external_id_field, source_id)
+                existing = index.get(source_id)
+                if existing and self._unchanged(spec, payload, existing[1]):
+                    results["skipped"] += 1
+                    continue
+
+                # 実行中の書き込みが上限に達していればソースの読み進めも待つ
+                await semaphore.acquire()
+                task = asyncio.create_task(write(source_id, payload, existing))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            # ソースの読み取りが失敗しても開始済みの書き込みは完了させる
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        if results["failed"] == 0 and high_water is not None and high_water != watermark:
+            await self.store.set(key, high_water)
+        if full and full_every is not None and results["failed"] == 0:
+            await self.store.set(full_key, started)
+        results["watermark"] = high_water
+        results["full"] = full
+        logger.info(
+            "Connector sync completed",
+            key=key,
+            total=results["total"],
+            synced=results["synced"],
+            skipped=results["skipped"],
+            failed=results["failed"],
+        )
+        return results
+
+__all__ = [
+    'SyncSpec',
+    'SyncEngine',
+    'WatermarkStore',
+    'apply_mapping',
+    'content_hash',
+    'field_hashes',
+]
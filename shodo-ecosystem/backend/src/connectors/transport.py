@@ -0,0 +1,196 @@
+"""
+コネクタ共有トランスポート
+オリジン（scheme://host:port）単位で keep-alive 接続プールをプロセス全体で共有する
+
+- 各コネクタは従来どおり自身の httpx.AsyncClient（認証ヘッダー・Cookie・タイムアウト）を持ち、
+  接続プールだけを共有する（Cookie ジャーはクライアント単位のためテナント間で混ざらない）
+- 同一ホスト（*.myshopify.com / api.stripe.com 等）への多数のテナントコネクタが接続を再利用する
+- SSLContext は全プールで共有し、CA バンドルの読み込みを一度に抑える
+- HTTP/2 で多重化する（httpx[http2] の h2 が必要。未導入なら HTTP/1.1 にフォールバック）
+- プール数はオリジン数の上限で抑え、超えたら最も長く使われていないアイドルなプールを閉じる
+  （任意のオリジンへ接続する自動検出・ユニバーサルコネクタでプールが増え続けないように）
+"""
+
+import asyncio
+import importlib.util
+import ssl
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, Any, Optional, Set
+
+import httpx
+import structlog
+
+from ..core.config import settings
+from ..monitoring.metrics import MetricsCollector
+
+logger = structlog.get_logger()
+
+# httpx の http2 extra（h2）が入っていれば HTTP/2 を使う
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+def _origin(url: httpx.URL) -> str:
+    port = url.port or (443 if url.scheme == "https" else 80)
+    return f"{url.scheme}://{url.host}:{port}"
+
+class _OriginPool:
+    """オリジン単位の接続プールと実行中リクエスト数"""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport):
+        self.transport = transport
+        self.in_flight = 0
+        self.requests = 0
+
+class _PoolStream(httpx.AsyncByteStream):
+    """応答本文を読み終える（閉じる）までプールを実行中として数える"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, pool: _OriginPool):
+        self.stream = stream
+        self.pool = pool
+        self.closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.pool.in_flight -= 1
+        await self.stream.aclose()
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """
+    リクエスト先オリジンに応じて共有プールへ振り分けるトランスポート
+
+    クライアントの aclose() ではプールを閉じない（プロセス終了時に close_all で閉じる）
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        max_origins: int = 256
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and _HTTP2_AVAILABLE
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.max_origins = max_origins
+        self._pools: "OrderedDict[str, _OriginPool]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+
+    def _pool(self, url: httpx.URL) -> _OriginPool:
+        origin = _origin(url)
+        pool = self._pools.get(origin)
+        if pool is not None:
+            self._pools.move_to_end(origin)
+        else:
+            if self._ssl_context is None:
+                self._ssl_context = httpx.create_ssl_context()
+            pool = _OriginPool(httpx.AsyncHTTPTransport(
+                verify=self._ssl_context,
+                http2=self.http2,
+                limits=self.limits,
+            ))
+            self._pools[origin] = pool
+            logger.debug("Connector pool created", origin=origin, http2=self.http2)
+            self._evict(keep=origin)
+        return pool
+
+    def _evict(self, keep: str) -> None:
+        """上限を超えた分、最も長く使われていないアイドルなプールを閉じる（実行中のプールは残す）"""
+        excess = len(self._pools) - self.max_origins
+        for origin in list(self._pools):
+            if excess <= 0:
+                break
+            pool = self._pools[origin]
+            if origin == keep or pool.in_flight:
+                continue
+            del self._pools[origin]
+            excess -= 1
+            task = asyncio.get_running_loop().create_task(pool.transport.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+            logger.debug("Connector pool evicted", origin=origin)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        pool = self._pool(request.url)
+        pool.in_flight += 1
+        pool.requests += 1
+        try:
+            response = await pool.transport.handle_async_request(request)
+        except BaseException:
+            pool.in_flight -= 1
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_PoolStream(response.stream, pool),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        """個々のクライアントからのクローズは無視（プールは共有）"""
+
+    async def close_all(self) -> None:
+        """全プールを閉じる（シャットダウン時）"""
+        pools, self._pools = self._pools, OrderedDict()
+        await asyncio.gather(
+            *(pool.transport.aclose() for pool in pools.values()),
+            *self._closing,
+            return_exceptions=True
+        )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """オリジンごとのプール利用状況"""
+        result: Dict[str, Dict[str, Any]] = {}
+        for origin, pool in self._pools.items():
+            connections = getattr(getattr(pool.transport, "_pool", None), "connections", [])
+            idle = sum(1 for c in connections if c.is_idle())
+            stats = {
+                "connections": len(connections),
+                "active": len(connections) - idle,
+                "idle": idle,
+                "in_flight": pool.in_flight,
+                "requests": pool.requests,
+                "max_connections": self.limits.max_connections,
+            }
+            MetricsCollector.record_connector_pool(origin, stats["active"], idle, pool.in_flight)
+            result[origin] = stats
+        return result
+
+_shared_transport: Optional[SharedTransport] = None
+
+def get_shared_transport() -> SharedTransport:
+    """プロセス共有トランスポートを取得（設定値から初期化）"""
+    global _shared_transport
+    if _shared_transport is None:
+        _shared_transport = SharedTransport(
+            max_connections=settings.connector_pool_max_connections,
+            max_keepalive_connections=settings.connector_pool_max_keepalive,
+            keepalive_expiry=settings.connector_pool_keepalive_expiry_seconds,
+            http2=settings.connector_http2,
+            max_origins=settings.connector_pool_max_origins,
+        )
+    return _shared_transport
+
+def create_client(**kwargs) -> httpx.AsyncClient:
+    """共有プールを使う httpx.AsyncClient を生成（引数は httpx.AsyncClient と同じ）"""
+    return httpx.AsyncClient(transport=get_shared_transport(), **kwargs)
+
+async def close_shared_transport() -> None:
+    """共有プールを閉じる"""
+    if _shared_transport is not None:
+        await _shared_transport.close_all()
+
+__all__ = [
+    'SharedTransport',
+    'get_shared_transport',
+    'create_client',
+    'close_shared_transport',
+]
@@ -3,7 +3,6 @@
 任意のSaaSに動的に接続可能な汎用コネクタ
 """
 
-import httpx
 import json
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -12,6 +11,8 @@ from .base import (
     BaseSaaSConnector, ConnectorConfig, ConnectorCredentials,
     ConnectorType, AuthMethod, ResourceSnapshot, ChangeSet
 )
+from .pagination import Page
+from .transport import create_client
 
 class APISpecification:
     """API仕様の自動解析"""
@@ -31,7 +32,7 @@ class APISpecification:
             '/.well-known/openapi.json'
         ]
         
-        async with httpx.AsyncClient() as client:
+        async with create_client() as client:
             for path in openapi_paths:
                 try:
                     response = await client.get(f"{base_url}{path}")
@@ -72,7 +73,7 @@ class APISpecification:
         ]
         
         discovered = []
-        async with httpx.AsyncClient() as client:
+        async with create_client() as client:
             for endpoint in common_endpoints:
                 try:
                     response = await client.head(f"{base_url}{endpoint}")
@@ -94,7 +95,7 @@ class AuthenticationDetector:
             'details': {}
         }
         
-        async with httpx.AsyncClient() as client:
+        async with create_client() as client:
             # OAuth2の検出
             oauth_endpoints = [
                 '/.well-known/oauth-authorization-server',
@@ -178,7 +179,7 @@ class UniversalSaaSConnector(BaseSaaSConnector):
             self.auth_info = await AuthenticationDetector.detect_auth_method(self.config.base_url)
             
             # HTTPクライアントの初期化
-            self._session = httpx.AsyncClient(
+            self._session = self._create_session(
                 base_url=self.config.base_url,
                 headers=self._build_headers(),
                 timeout=self.config.timeout
@@ -274,7 +275,7 @@ class UniversalSaaSConnector(BaseSaaSConnector):
         
         if 'token_endpoint' in details:
             # Client Credentials Grant
-            async with httpx.AsyncClient() as client:
+            async with create_client() as client:
                 response = await client.post(
                     details['token_endpoint'],
                     data={
@@ -367,6 +368,39 @@ class UniversalSaaSConnector(BaseSaaSConnector):
             print(f"Error listing resources: {e}")
             return []
     
+    async def list_page(
+        self,
+        resource_type: str,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Page:
+        """1ページ取得（GraphQL は Relay コネクションの endCursor で辿る）"""
+        resource_info = self.discovered_resources.get(resource_type)
+        if not (resource_info and resource_info.get('type') == 'graphql'):
+            return await super().list_page(resource_type, filters, limit, cursor)
+        
+        query = f"""
+        query List{resource_type.capitalize()}($first: Int!, $after: String) {{
+            {resource_type}(first: $first, after: $after) {{
+                nodes {{
+                    id
+                    __typename
+                }}
+                pageInfo {{
+                    hasNextPage
+                    endCursor
+                }}
+            }}
+        }}
+        """
+        response = await self._session.post(
+            "/graphql",
+            json={"query": query, "variables": {"first": limit or self.MAX_PAGE_SIZE, "after": cursor}}
+        )
+        response.raise_for_status()
+        return Page.from_graphql((response.json().get('data') or {}).get(resource_type))
+    
     async def get_resource(
         self,
         resource_type: str,
@@ -473,7 +507,7 @@ class UniversalSaaSConnector(BaseSaaSConnector):
         resource_id: str
     ) -> ResourceSnapshot:
         """スナップショット作成"""
-        resource = await self.get_resource(resource_type, resource_id)
+        resource = await self.load_resource(resource_type, resource_id)
         if not resource:
             raise ValueError(f"Resource {resource_type}/{resource_id} not found")
         
@@ -102,6 +102,13 @@ class Settings(BaseSettings):
     )
     rate_limit_fail_open: bool = Field(default=False, env="RATE_LIMIT_FAIL_OPEN")
     rate_limit_degraded_mode_headers: bool = Field(default=True, env="RATE_LIMIT_DEGRADED_MODE_HEADERS")
+    # レート制限テレメトリ（ヘビーヒッター検出）
+    rate_limit_hh_enabled: bool = Field(default=True, env="RATE_LIMIT_HH_ENABLED")
+    rate_limit_hh_top_k: int = Field(default=20, env="RATE_LIMIT_HH_TOP_K")
+    rate_limit_hh_sketch_width: int = Field(default=2048, env="RATE_LIMIT_HH_SKETCH_WIDTH")
+    rate_limit_hh_sketch_depth: int = Field(default=4, env="RATE_LIMIT_HH_SKETCH_DEPTH")
+    rate_limit_hh_window_seconds: int = Field(default=300, env="RATE_LIMIT_HH_WINDOW_SECONDS")
+    rate_limit_hh_flush_interval_seconds: float = Field(default=10.0, env="RATE_LIMIT_HH_FLUSH_INTERVAL_SECONDS")
     
     # CSRF 設定（Cookieベース認証用）
     csrf_enabled: bool = Field(default=True, env="CSRF_ENABLED")
@@ -134,6 +141,33 @@ class Settings(BaseSettings):
     lpr_device_binding: bool = Field(default=True, env="LPR_DEVICE_BINDING")
     lpr_scope_minimization: bool = Field(default=True, env="LPR_SCOPE_MINIMIZATION")
     lpr_audit_logging: bool = Field(default=True, env="LPR_AUDIT_LOGGING")
+    # LPR署名鍵リング（kid によるローテーション、ファイル / 環境変数 / Vault から一度だけ読込）
+    lpr_keyring_file: Optional[str] = Field(default=None, env="LPR_KEYRING_FILE")
+    lpr_keyring_json: Optional[SecretStr] = Field(default=None, env="LPR_KEYRING_JSON")
+    lpr_signing_algorithm: str = Field(default="ES256", env="LPR_SIGNING_ALGORITHM")
+    # 検証済みクレームのプロセス内キャッシュ（署名検証の省略、exp は常に尊重）
+    lpr_verify_cache_size: int = Field(default=10000, env="LPR_VERIFY_CACHE_SIZE")
+    lpr_verify_cache_ttl_seconds: int = Field(default=60, env="LPR_VERIFY_CACHE_TTL_SECONDS")
+    # LPRレスポンスのPIIマスキング対象とする最大ボディサイズ
+    # （Content-Length で超過が分かる応答はそのまま返し、長さ未宣言のストリーミング応答は超過時点で打ち切る）
+    lpr_mask_max_body_bytes: int = Field(default=50 * 1024 * 1024, env="LPR_MASK_MAX_BODY_BYTES")
+    # 利用状況（最終利用時刻/回数）の write-behind フラッシュ条件
+    lpr_usage_flush_interval_ms: int = Field(default=500, env="LPR_USAGE_FLUSH_INTERVAL_MS")
+    lpr_usage_flush_max_entries: int = Field(default=1000, env="LPR_USAGE_FLUSH_MAX_ENTRIES")
+    # 認証ID解決キャッシュ（検証済みJWTクレーム / ユーザーレコード）
+    auth_claims_cache_size: int = Field(default=10000, env="AUTH_CLAIMS_CACHE_SIZE")
+    auth_claims_cache_ttl_seconds: int = Field(default=300, env="AUTH_CLAIMS_CACHE_TTL_SECONDS")
+    auth_user_cache_size: int = Field(default=10000, env="AUTH_USER_CACHE_SIZE")
+    auth_user_cache_ttl_seconds: int = Field(default=30, env="AUTH_USER_CACHE_TTL_SECONDS")
+    # パスワードハッシュ（bcrypt）の専用スレッドプールと受付制御
+    password_hash_workers: int = Field(default=4, env="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(default=64, env="PASSWORD_HASH_MAX_PENDING")
+    password_hash_queue_timeout_seconds: float = Field(default=5.0, env="PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS")
+    # 失効リストのワーカー内レプリカ（Bloom + 正確な集合、Pub/Sub で同期）
+    revocation_replica_enabled: bool = Field(default=True, env="REVOCATION_REPLICA_ENABLED")
+    revocation_bloom_capacity: int = Field(default=100000, env="REVOCATION_BLOOM_CAPACITY")
+    revocation_bloom_error_rate: float = Field(default=0.001, env="REVOCATION_BLOOM_ERROR_RATE")
+    revocation_resync_interval_seconds: float = Field(default=300.0, env="REVOCATION_RESYNC_INTERVAL_SECONDS")
     
     # 監査設定
     service_name: str = Field(default="shodo-ecosystem", env="SERVICE_NAME")
@@ -166,6 +200,26 @@ class Settings(BaseSettings):
     stripe_api_key: Optional[str] = Field(default=None, env="STRIPE_API_KEY")
     gmail_api_key: Optional[str] = Field(default=None, env="GMAIL_API_KEY")
     slack_api_key: Optional[str] = Field(default=None, env="SLACK_API_KEY")
+    # 外部API接続プール（オリジン単位でプロセス全体共有）
+    connector_pool_max_connections: int = Field(default=100, env="CONNECTOR_POOL_MAX_CONNECTIONS")
+    connector_pool_max_keepalive: int = Field(default=20, env="CONNECTOR_POOL_MAX_KEEPALIVE")
+    connector_pool_keepalive_expiry_seconds: float = Field(default=30.0, env="CONNECTOR_POOL_KEEPALIVE_EXPIRY_SECONDS")
+    connector_http2: bool = Field(default=True, env="CONNECTOR_HTTP2")
+    connector_pool_max_origins: int = Field(default=256, env="CONNECTOR_POOL_MAX_ORIGINS")
+    # コネクタ GET 応答キャッシュ（ETag/Last-Modified で再検証、対象リソースはコネクタごとに指定）
+    connector_cache_max_entries: int = Field(default=2048, env="CONNECTOR_CACHE_MAX_ENTRIES")
+    connector_cache_max_body_bytes: int = Field(default=1048576, env="CONNECTOR_CACHE_MAX_BODY_BYTES")
+    # コネクタ共有サーキットブレーカー（上流ホスト × エンドポイント単位、直近ウィンドウのエラー率で判定）
+    connector_breaker_window_seconds: int = Field(default=30, env="CONNECTOR_BREAKER_WINDOW_SECONDS")
+    connector_breaker_min_requests: int = Field(default=20, env="CONNECTOR_BREAKER_MIN_REQUESTS")
+    connector_breaker_error_rate: float = Field(default=0.5, env="CONNECTOR_BREAKER_ERROR_RATE")
+    connector_breaker_open_seconds: float = Field(default=30.0, env="CONNECTOR_BREAKER_OPEN_SECONDS")
+    connector_breaker_max_open_seconds: float = Field(default=300.0, env="CONNECTOR_BREAKER_MAX_OPEN_SECONDS")
+    connector_breaker_half_open_probes: int = Field(default=3, env="CONNECTOR_BREAKER_HALF_OPEN_PROBES")
+    # 定期同期の全件パス間隔（増分フィールドで更新を拾えないソースの取りこぼしを回収）
+    connector_sync_full_interval_hours: float = Field(default=24.0, env="CONNECTOR_SYNC_FULL_INTERVAL_HOURS")
+    # エクスポートファイルの出力先（MCP エクスポートツール）
+    export_dir: str = Field(default="/tmp/shodo-exports", env="EXPORT_DIR")
     
     def is_production(self) -> bool:
         """本番環境かどうかを判定"""
@@ -3,7 +3,9 @@ Enterprise Security Configuration
 MUST requirements for production deployment
 """
 
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
+from functools import lru_cache
+import re
 from datetime import datetime
 import secrets
 import hashlib
@@ -12,6 +14,9 @@ from passlib.context import CryptContext
 
 import structlog
 
+# Re-exported: the dependency-free implementation carries the fast path
+from .security_utils import InputSanitizer  # noqa: F401
+
 logger = structlog.get_logger()
 
 # Password hashing
@@ -61,113 +66,99 @@ class SecurityHeaders:
     }
 
 
-class InputSanitizer:
-    """Input sanitization and validation"""
-    
-    @staticmethod
-    def sanitize_string(value: str, max_length: int = 1000) -> str:
-        """Sanitize string input (Unicode-friendly)
-        - NULLや制御文字(カテゴリ=Cc/Cf)の除去
-        - 最大長で切り詰め
-        - 前後空白のトリム
-        日本語・多言語文字は保持
-        """
-        if value is None:
-            return ""
-        if not isinstance(value, str):
-            try:
-                value = str(value)
-            except Exception:
-                return ""
-        
-        # 長さ制限（先に軽く丸めて負荷低減）
-        if len(value) > max_length * 2:
-            value = value[: max_length * 2]
-        
-        # 制御文字の除去（Unicodeカテゴリ）
-        import unicodedata
-        cleaned_chars = []
-        for ch in value:
-            cat = unicodedata.category(ch)
-            # Cc: Other, Control / Cf: Other, Format を除去。タブと改行は許可
-            if ch in ('\n', '\t'):
-                cleaned_chars.append(ch)
-                continue
-            if cat in ("Cc", "Cf"):
-                continue
-            cleaned_chars.append(ch)
-        cleaned = "".join(cleaned_chars)
-        
-        # 最終的な長さ制限
-        if len(cleaned) > max_length:
-            cleaned = cleaned[:max_length]
-        
-        # 前後のホワイトスペースをトリム
-        return cleaned.strip()
-    
-    @staticmethod
-    def sanitize_json(data: dict) -> dict:
-        """Recursively sanitize JSON data"""
-        if not isinstance(data, dict):
-            return {}
-        
-        sanitized = {}
-        for key, value in data.items():
-            if isinstance(value, str):
-                sanitized[key] = InputSanitizer.sanitize_string(value)
-            elif isinstance(value, dict):
-                sanitized[key] = InputSanitizer.sanitize_json(value)
-            elif isinstance(value, list):
-                sanitized[key] = [
-                    InputSanitizer.sanitize_json(item) if isinstance(item, dict)
-                    else InputSanitizer.sanitize_string(item) if isinstance(item, str)
-                    else item
-                    for item in value
-                ]
-            else:
-                sanitized[key] = value
-        
-        return sanitized
-
 class PIIMasking:
-    """PII detection and masking"""
+    """PII detection and masking (single fused pass over each string)"""
     
     PATTERNS = {
         'email': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
-        'phone': r'[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,5}[-\s\.]?[0-9]{1,5}',
+        # Must not end inside the local part of a full email ("555 1234@x.com"):
+        # a match starting earlier than the email would otherwise swallow it.
+        # An "@" alone (e.g. "090-1234-5678@自宅") does not suppress the match.
+        'phone': r'[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,5}[-\s\.]?[0-9]{1,5}(?![a-zA-Z0-9._%+-]*@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})',
         'credit_card': r'\b(?:\d{4}[-\s]?){3}\d{4}\b',
         'ssn': r'\b\d{3}-\d{2}-\d{4}\b',
         'ip_address': r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
     }
     
+    # Keys whose values are always redacted (substring match, case-insensitive)
+    SENSITIVE_FIELDS = ('password', 'token', 'secret', 'api_key', 'email', 'phone')
+    
+    # All patterns in one alternation; earlier patterns win at the same position
+    _FUSED = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in PATTERNS.items()))
+    _REPLACEMENTS = {name: f'[REDACTED_{name.upper()}]' for name in PATTERNS}
+    # Every pattern needs an "@" or a digit; strings without one are clean
+    _HINT = re.compile(r'[@0-9]')
+    
+    @classmethod
+    def _replace(cls, match: 're.Match') -> str:
+        return cls._REPLACEMENTS[match.lastgroup]
+    
+    @classmethod
+    def contains_pii(cls, text: str) -> bool:
+        """Cheap check whether text contains any PII pattern"""
+        return cls._HINT.search(text) is not None and cls._FUSED.search(text) is not None
+    
     @classmethod
     def mask_pii(cls, text: str) -> str:
-        """Mask PII in text"""
-        import re
+        """Mask PII in text (clean strings are returned as-is)"""
+        if cls._HINT.search(text) is None:
+            return text
+        return cls._FUSED.sub(cls._replace, text)
+    
+    @classmethod
+    def is_sensitive_key(cls, key: str, fields_to_mask: List[str] = None) -> bool:
+        """Check whether a key name marks its value as sensitive"""
+        fields = cls.SENSITIVE_FIELDS if fields_to_mask is None else tuple(fields_to_mask)
+        return _sensitive_key(str(key), fields)
+    
+    @classmethod
+    def mask_value(cls, data: Any, fields_to_mask: List[str] = None) -> Any:
+        """Mask PII in any JSON-like value (dicts and lists, iteratively)"""
+        fields = cls.SENSITIVE_FIELDS if fields_to_mask is None else tuple(fields_to_mask)
+        mask_pii = cls.mask_pii
         
-        for pattern_name, pattern in cls.PATTERNS.items():
-            text = re.sub(pattern, f'[REDACTED_{pattern_name.upper()}]', text)
+        def convert(value: Any) -> Any:
+            if isinstance(value, str):
+                return mask_pii(value)
+            if isinstance(value, dict):
+                child = {}
+                stack.append((value, child))
+                return child
+            if isinstance(value, list):
+                child = [None] * len(value)
+                stack.append((value, child))
+                return child
+            return value
         
-        return text
+        stack: List[tuple] = []
+        root = convert(data)
+        while stack:
+            source, target = stack.pop()
+            if isinstance(source, dict):
+                for key, value in source.items():
+                    if _sensitive_key(str(key), fields):
+                        target[key] = '[REDACTED]'
+                    else:
+                        target[key] = convert(value)
+            else:
+                for i, value in enumerate(source):
+                    target[i] = convert(value)
+        return root
     
     @classmethod
     def mask_dict(cls, data: dict, fields_to_mask: List[str] = None) -> dict:
-        """Mask PII in dictionary"""
-        if fields_to_mask is None:
-            fields_to_mask = ['password', 'token', 'secret', 'api_key', 'email', 'phone']
-        
-        masked = {}
-        for key, value in data.items():
-            if any(field in key.lower() for field in fields_to_mask):
-                masked[key] = '[REDACTED]'
-            elif isinstance(value, str):
-                masked[key] = cls.mask_pii(value)
-            elif isinstance(value, dict):
-                masked[key] = cls.mask_dict(value, fields_to_mask)
-            else:
-                masked[key] = value
-        
-        return masked
+        """Mask PII in dictionary (nested dicts and lists included)"""
+        return cls.mask_value(data, fields_to_mask)
+
+@lru_cache(maxsize=64)
+def _sensitive_key_pattern(fields: Tuple[str, ...]) -> 're.Pattern':
+    """Compile sensitive field names into one substring matcher"""
+    return re.compile('|'.join(re.escape(field.lower()) for field in fields))
+
+@lru_cache(maxsize=4096)
+def _sensitive_key(key: str, fields: Tuple[str, ...]) -> bool:
+    # Key names repeat across records, so results are memoized
+    return _sensitive_key_pattern(fields).search(key.lower()) is not None
 
 class SecureTokenGenerator:
     """Cryptographically secure token generation"""
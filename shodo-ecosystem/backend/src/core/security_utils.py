@@ -5,16 +5,40 @@ Includes:
 - PIIMasking
 - SecureTokenGenerator
 """
-from typing import List
+from typing import Iterable, List
+import re
 import secrets
 import hashlib
-import unicodedata
+
+
+# Every Cc/Cf code point except \n and \t (Unicode 14.0, the database of the
+# Python 3.11 runtime). Kept as a literal so no request pays for building it.
+_CONTROL_CHARS = re.compile(
+	r"[\x00-\x08\x0b-\x1f\x7f-\x9f\xad\u0600-\u0605\u061c\u06dd\u070f\u0890-\u0891"
+	r"\u08e2\u180e\u200b-\u200f\u202a-\u202e\u2060-\u2064\u2066-\u206f\ufeff\ufff9-\ufffb"
+	r"\U000110bd\U000110cd\U00013430-\U00013438\U0001bca0-\U0001bca3\U0001d173-\U0001d17a"
+	r"\U000e0001\U000e0020-\U000e007f]"
+)
+
+
+def strip_control_chars(value: str) -> str:
+	"""Remove control chars (Cc/Cf), keeping \\n and \\t"""
+	# Printable strings (incl. typical Japanese text) cannot contain Cc/Cf
+	if value.isprintable():
+		return value
+	return _CONTROL_CHARS.sub("", value)
 
 
 class InputSanitizer:
 	"""Input sanitization and validation (Unicode-friendly)"""
 	@staticmethod
 	def sanitize_string(value: str, max_length: int = 1000) -> str:
+		"""Sanitize string input (Unicode-friendly)
+		- NULLや制御文字(カテゴリ=Cc/Cf)の除去
+		- 最大長で切り詰め
+		- 前後空白のトリム
+		日本語・多言語文字は保持
+		"""
 		if value is None:
 			return ""
 		if not isinstance(value, str):
@@ -26,41 +50,50 @@ class InputSanitizer:
 		if len(value) > max_length * 2:
 			value = value[: max_length * 2]
 		# Remove control chars (Cc/Cf), allow \n and \t
-		cleaned_chars = []
-		for ch in value:
-			cat = unicodedata.category(ch)
-			if ch in ('\n', '\t'):
-				cleaned_chars.append(ch)
-				continue
-			if cat in ("Cc", "Cf"):
-				continue
-			cleaned_chars.append(ch)
-		cleaned = "".join(cleaned_chars)
+		cleaned = strip_control_chars(value)
 		# Final truncate and trim
 		if len(cleaned) > max_length:
 			cleaned = cleaned[:max_length]
 		return cleaned.strip()
 
 	@staticmethod
-	def sanitize_json(data: dict) -> dict:
+	def sanitize_many(values: Iterable, max_length: int = 1000) -> List[str]:
+		"""Sanitize several values in one call (same rules as sanitize_string)"""
+		sanitize = InputSanitizer.sanitize_string
+		return [sanitize(value, max_length) for value in values]
+
+	@staticmethod
+	def sanitize_json(data: dict, max_length: int = 1000) -> dict:
+		"""Sanitize a whole JSON payload (nested dicts and lists of dicts)"""
 		if not isinstance(data, dict):
 			return {}
-		sanitized = {}
-		for key, value in data.items():
-			if isinstance(value, str):
-				sanitized[key] = InputSanitizer.sanitize_string(value)
-			elif isinstance(value, dict):
-				sanitized[key] = InputSanitizer.sanitize_json(value)
-			elif isinstance(value, list):
-				sanitized[key] = [
-					InputSanitizer.sanitize_json(item) if isinstance(item, dict)
-					else InputSanitizer.sanitize_string(item) if isinstance(item, str)
-					else item
-					for item in value
-				]
-			else:
-				sanitized[key] = value
-		return sanitized
+		sanitize = InputSanitizer.sanitize_string
+		root: dict = {}
+		stack = [(data, root)]
+		while stack:
+			source, target = stack.pop()
+			for key, value in source.items():
+				if isinstance(value, str):
+					target[key] = sanitize(value, max_length)
+				elif isinstance(value, dict):
+					child: dict = {}
+					target[key] = child
+					stack.append((value, child))
+				elif isinstance(value, list):
+					items = []
+					for item in value:
+						if isinstance(item, dict):
+							child = {}
+							stack.append((item, child))
+							items.append(child)
+						elif isinstance(item, str):
+							items.append(sanitize(item, max_length))
+						else:
+							items.append(item)
+					target[key] = items
+				else:
+					target[key] = value
+		return root
 
 
 class PIIMasking:
@@ -6,7 +6,7 @@ LPRシステム統合版
 import time
 import logging
 from contextlib import asynccontextmanager
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 from fastapi import FastAPI, Request
@@ -20,10 +20,12 @@ import structlog
 from .core.config import settings
 
 # データベース
-from .services.database import init_db, check_all_connections
+from .services.database import init_db, check_all_connections, get_redis
 
 # LPRシステム
 from .services.auth.lpr_service import get_lpr_service
+from .services.auth.revocation_replica import start_revocation_replicas, stop_revocation_replicas
+from .services.auth.identity_cache import get_user_identity_cache
 from .services.auth.visible_login import init_visible_login, cleanup_visible_login
 from .services.audit.audit_logger import init_audit_logger
 from .middleware.lpr_enforcer import LPREnforcerMiddleware
@@ -83,6 +85,8 @@ async def lifespan(app: FastAPI):
             logger.error(f"LPR cleanup failed: {e}")
     
     add_shutdown_handler(cleanup_lpr_system)
+    add_shutdown_handler(stop_revocation_replicas)
+    add_shutdown_handler(get_user_identity_cache().stop)
     
     # シグナルハンドラー設定
     shutdown_manager.setup_signal_handlers()
@@ -103,6 +107,10 @@ async def lifespan(app: FastAPI):
     # LPRシステム初期化
     try:
         await get_lpr_service()
+        # 失効リストのワーカー内レプリカを同期開始
+        start_revocation_replicas(get_redis())
+        # ユーザー情報キャッシュの無効化通知を購読
+        get_user_identity_cache().start(get_redis())
         await init_audit_logger()
         await init_visible_login()
         logger.info("LPR system initialized successfully")
@@ -163,12 +171,15 @@ app.add_middleware(
     allowed_hosts=["*"] if settings.debug else settings.trusted_hosts
 )
 
-# LPRエンフォーサーミドルウェア（認可と検証を先に実施し、JTI/相関IDをstateに格納）
-app.add_middleware(LPREnforcerMiddleware)
+# ミドルウェアはすべて純粋ASGI実装で、1リクエストにつき1つの RequestContext を共有する。
+# add_middleware は後から追加したものが外側になる点に注意。
 
 # レート制限ミドルウェア（LPR検証後、LPR JTI/ユーザーIDをキーに活用）
 app.add_middleware(RateLimitMiddleware)
 
+# LPRエンフォーサーミドルウェア（認可と検証を先に実施し、JTI/相関IDをstateに格納）
+app.add_middleware(LPREnforcerMiddleware)
+
 # セキュリティヘッダー
 app.add_middleware(SecurityHeadersMiddleware)
 
@@ -361,6 +372,35 @@ async def get_lpr_statistics():
             "error": str(e)
         }
 
+@app.get("/api/admin/rate-limit/top-consumers")
+async def get_rate_limit_top_consumers(
+    tracker: str = "throttled",
+    limit: int = 20,
+    scope: str = "global",
+    client_id: Optional[str] = None,
+):
+    """レート制限の上位消費者（クライアント/ルート別ヘビーヒッター）"""
+    from .monitoring.heavy_hitters import get_heavy_hitter_tracker
+    from .services.database import get_redis
+    if tracker not in ("requests", "throttled"):
+        return {"error": f"Unknown tracker: {tracker}"}
+    hh = get_heavy_hitter_tracker(tracker)
+    redis_client = get_redis()
+    try:
+        if scope == "global" and redis_client is not None:
+            result = await hh.global_snapshot(redis_client, limit)
+            if client_id:
+                result["client_estimate"] = await hh.global_estimate(redis_client, "client", client_id)
+            result["scope"] = "global"
+            return result
+    except Exception as e:
+        logger.warning("Global heavy hitter snapshot failed", error=str(e))
+    result = hh.snapshot(limit)
+    if client_id:
+        result["client_estimate"] = hh.estimate("client", client_id)
+    result["scope"] = "local"
+    return result
+
 # ===== デバッグエンドポイント（開発環境のみ） =====
 
 if settings.debug:
@@ -19,12 +19,15 @@ from .core.config import settings, validate_settings
 from .core.security import SecurityHeaders
 
 # Database
-from .services.database import init_db, close_db
+from .services.database import init_db, close_db, get_redis
 
 # LPR System
 from .services.auth.lpr_service import get_lpr_service
+from .services.auth.revocation_replica import start_revocation_replicas, stop_revocation_replicas
+from .services.auth.identity_cache import get_user_identity_cache
 from .services.audit.audit_logger import init_audit_logger
 from .middleware.lpr_enforcer import LPREnforcerMiddleware
+from .middleware.security import SecurityHeadersMiddleware
 
 # Monitoring
 from .utils.correlation import CorrelationIDMiddleware
@@ -118,6 +121,10 @@ async def lifespan(app: FastAPI):
     # Initialize LPR system
     try:
         await get_lpr_service()
+        # Worker-local replica of the revocation lists
+        start_revocation_replicas(get_redis())
+        # Identity cache invalidations from other workers
+        get_user_identity_cache().start(get_redis())
         await init_audit_logger()
         logger.info("LPR system initialized successfully")
     except Exception as e:
@@ -143,6 +150,13 @@ async def lifespan(app: FastAPI):
     # Cleanup
     logger.info("Shutting down application")
     
+    try:
+        # Stop Redis subscribers before the connection is closed
+        await stop_revocation_replicas()
+        await get_user_identity_cache().stop()
+    except Exception as e:
+        logger.error("Stopping Redis subscribers failed", error=str(e))
+    
     try:
         await close_db()
         logger.info("Cleanup completed")
@@ -185,16 +199,8 @@ app.add_middleware(MetricsMiddleware)
 # LPR enforcement
 app.add_middleware(LPREnforcerMiddleware)
 
-# Security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    """Add security headers to all responses"""
-    response = await call_next(request)
-    
-    for header, value in SecurityHeaders.HEADERS.items():
-        response.headers[header] = value
-    
-    return response
+# Security headers middleware (precomputed raw header pairs)
+app.add_middleware(SecurityHeadersMiddleware, headers=SecurityHeaders.HEADERS)
 
 # Global exception handler
 @app.exception_handler(Exception)
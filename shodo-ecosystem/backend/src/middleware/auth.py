@@ -5,6 +5,9 @@ JWT検証とユーザー認証の中央管理
 
 from typing import Optional
 from datetime import datetime, timezone
+import hashlib
+import time
+from cachetools import TLRUCache
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -12,8 +15,9 @@ from pydantic import BaseModel
 import logging
 
 from ..core.config import settings
-from ..services.database import get_db_session
-from ..services.auth.jti_manager import JTIRevocationStore
+from ..services.auth.jti_manager import get_jti_revocation_store
+from ..services.auth.identity_cache import get_user_identity_cache, load_user_record
+from ..monitoring.metrics import MetricsCollector
 
 logger = logging.getLogger(__name__)
 
@@ -42,11 +46,52 @@ class CurrentUser(BaseModel):
     device_id: Optional[str] = None
     session_id: Optional[str] = None
 
+def _claims_ttu(_key, claims: TokenClaims, now: float) -> float:
+    """クレームキャッシュの有効期限（TTLとトークン有効期限の早い方）"""
+    return min(now + settings.auth_claims_cache_ttl_seconds, claims.exp)
+
+# 署名検証済みクレームのキャッシュ（キーはトークンのSHA-256）
+# 失効チェックはキャッシュせず毎回行う
+_claims_cache: TLRUCache = TLRUCache(
+    maxsize=settings.auth_claims_cache_size,
+    ttu=_claims_ttu,
+    timer=time.time
+)
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
 async def verify_jwt_token(token: str) -> Optional[TokenClaims]:
     """
     JWT トークンの検証
     RS256署名、クレーム検証、有効期限チェック
     """
+    key = _token_key(token)
+    claims = _claims_cache.get(key)
+    MetricsCollector.record_auth_identity_cache("claims", claims is not None)
+    if claims is None:
+        claims = _decode_jwt_token(token)
+        if claims is None:
+            return None
+        _claims_cache[key] = claims
+    
+    # JTI（JWT ID）の検証 - リプレイ攻撃防止
+    # 失効ストアでブラックリストを確認（ワーカー内レプリカを共有）
+    try:
+        rev_store = get_jti_revocation_store()
+        if await rev_store.is_revoked(claims.jti):
+            logger.warning("JWT JTI is revoked", extra={"jti": claims.jti})
+            return None
+    except Exception as e:
+        # 失効チェック失敗時は保守的に拒否（本番）、開発は許容
+        if settings.is_production():
+            logger.error(f"JTI revocation check failed: {e}")
+            return None
+    
+    return claims
+
+def _decode_jwt_token(token: str) -> Optional[TokenClaims]:
+    """署名・クレーム・有効期限の検証（失効チェックは含まない）"""
     try:
         # RS256での検証（本番環境では公開鍵を使用）
         # 開発環境ではHS256にフォールバック
@@ -83,19 +128,6 @@ async def verify_jwt_token(token: str) -> Optional[TokenClaims]:
             logger.warning(f"Token expired for user {claims.sub}")
             return None
         
-        # JTI（JWT ID）の検証 - リプレイ攻撃防止
-        # 失効ストアでブラックリストを確認
-        try:
-            rev_store = JTIRevocationStore()
-            if await rev_store.is_revoked(claims.jti):
-                logger.warning("JWT JTI is revoked", extra={"jti": claims.jti})
-                return None
-        except Exception as e:
-            # 失効チェック失敗時は保守的に拒否（本番）、開発は許容
-            if settings.is_production():
-                logger.error(f"JTI revocation check failed: {e}")
-                return None
-        
         return claims
         
     except JWTError as e:
@@ -110,8 +142,7 @@ async def verify_jwt_token(token: str) -> Optional[TokenClaims]:
 
 async def get_current_user(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db = Depends(get_db_session)
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> CurrentUser:
     """
     現在の認証済みユーザーを取得
@@ -140,23 +171,21 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # データベースからユーザー情報取得
-    # 注: 実際の実装ではユーザーモデルを使用
+    # ユーザー情報取得（プロセス内キャッシュ経由、ミス時のみDB参照）
     try:
-        if db:
-            # ユーザー存在確認とアクティブステータスチェック
-            # TODO: 実際のユーザーモデルクエリに置き換え
+        record = await get_user_identity_cache().get(claims.sub, load_user_record)
+        if record:
             user_data = {
-                "user_id": claims.sub,
-                "username": f"user_{claims.sub}",  # 実際はDBから取得
-                "email": f"{claims.sub}@example.com",  # 実際はDBから取得
-                "roles": claims.roles,
-                "is_active": True,  # 実際はDBから取得
+                "user_id": record.user_id,
+                "username": record.username,
+                "email": record.email,
+                "roles": record.roles or claims.roles,
+                "is_active": record.is_active,
                 "device_id": claims.device_id,
                 "session_id": claims.session_id
             }
         else:
-            # DBなしのフォールバック（開発環境）
+            # DB未接続・未登録時のフォールバック（クレームから構成）
             user_data = {
                 "user_id": claims.sub,
                 "username": f"user_{claims.sub}",
@@ -0,0 +1,146 @@
+"""
+リクエストコンテキスト（純粋ASGIミドルウェア共通）
+各ミドルウェアが同じリクエスト情報を再パースしないよう、1リクエストにつき
+1つのコンテキストを scope["state"] に保持して共有する
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.requests import cookie_parser
+from starlette.responses import JSONResponse
+from starlette.types import Message, Receive, Scope, Send
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+class RequestContext:
+    """
+    リクエスト単位の共有コンテキスト
+
+    値は scope["state"] に格納されるため、ハンドラー側の
+    `request.state.lpr_jti` などからもそのまま参照できる
+    """
+
+    STATE_KEY = "request_context"
+
+    __slots__ = ("scope", "method", "path", "start_time", "_headers", "_cookies", "_query")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.method: str = scope.get("method", "GET")
+        self.path: str = scope.get("path", "")
+        self.start_time = time.time()
+        self._headers: Optional[Dict[str, str]] = None
+        self._cookies: Optional[Dict[str, str]] = None
+        self._query: Optional[Dict[str, str]] = None
+
+    @classmethod
+    def from_scope(cls, scope: Scope) -> "RequestContext":
+        """scopeに紐づくコンテキストを取得（無ければ生成）"""
+        state = scope.setdefault("state", {})
+        ctx = state.get(cls.STATE_KEY)
+        if ctx is None:
+            ctx = cls(scope)
+            state[cls.STATE_KEY] = ctx
+        return ctx
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """request.state と共有される辞書"""
+        return self.scope["state"]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """小文字キーのヘッダー辞書（初回のみデコード、重複時は先頭を優先）"""
+        if self._headers is None:
+            headers: Dict[str, str] = {}
+            for key, value in self.scope.get("headers", ()):
+                name = key.decode("latin-1")
+                if name not in headers:
+                    headers[name] = value.decode("latin-1")
+            self._headers = headers
+        return self._headers
+
+    def header(self, name: str, default: str = "") -> str:
+        """ヘッダー値を取得（nameは小文字）"""
+        return self.headers.get(name, default)
+
+    @property
+    def cookies(self) -> Dict[str, str]:
+        if self._cookies is None:
+            cookie_header = self.header("cookie")
+            self._cookies = cookie_parser(cookie_header) if cookie_header else {}
+        return self._cookies
+
+    def query_param(self, name: str) -> Optional[str]:
+        """クエリパラメータを取得"""
+        if self._query is None:
+            query_string = self.scope.get("query_string", b"").decode("latin-1")
+            self._query = {}
+            for key, value in parse_qsl(query_string, keep_blank_values=True):
+                self._query.setdefault(key, value)
+        return self._query.get(name)
+
+    @property
+    def client_host(self) -> str:
+        client = self.scope.get("client")
+        return client[0] if client else "unknown"
+
+    # === 下流と共有する値（request.state 互換） ===
+
+    @property
+    def correlation_id(self) -> Optional[str]:
+        return self.state.get("correlation_id")
+
+    @correlation_id.setter
+    def correlation_id(self, value: str) -> None:
+        self.state["correlation_id"] = value
+
+    @property
+    def lpr_jti(self) -> Optional[str]:
+        return self.state.get("lpr_jti")
+
+    @property
+    def user(self) -> Any:
+        return self.state.get("user")
+
+    def set_lpr_context(self, jti: str, user_id: str, service: str) -> None:
+        """LPR検証結果を格納"""
+        self.state["lpr_jti"] = jti
+        self.state["lpr_user_id"] = user_id
+        self.state["lpr_service"] = service
+
+def encode_headers(headers: Iterable[Tuple[str, str]]) -> RawHeaders:
+    """ヘッダーをASGIの生バイト列ペアへ変換"""
+    return [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers
+    ]
+
+def set_raw_headers(message: Message, pairs: RawHeaders) -> None:
+    """http.response.start メッセージへヘッダーを設定（同名ヘッダーは置換）"""
+    names = {name for name, _ in pairs}
+    headers = [h for h in message.get("headers", ()) if h[0].lower() not in names]
+    headers.extend(pairs)
+    message["headers"] = headers
+
+async def send_json(
+    scope: Scope,
+    receive: Receive,
+    send: Send,
+    status_code: int,
+    content: Any,
+    headers: Optional[Dict[str, str]] = None
+) -> None:
+    """JSONレスポンスを直接送信（ミドルウェアでの短絡応答用）"""
+    response = JSONResponse(content=content, status_code=status_code, headers=headers)
+    await response(scope, receive, send)
+
+__all__ = [
+    'RequestContext',
+    'RawHeaders',
+    'encode_headers',
+    'set_raw_headers',
+    'send_json',
+]
@@ -4,42 +4,47 @@ CSRF対策ミドルウェア（Double Submit Cookie パターン）
 - 環境変数で有効/無効、Cookie属性、ヘッダ名を設定可能
 """
 
-from fastapi import Request, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from starlette.types import ASGIApp, Receive, Scope, Send
 from ..core.config import settings
+from .context import RequestContext, send_json
 
 SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
 
-class CSRFMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if not settings.csrf_enabled:
-            return await call_next(request)
-        
+# 認証不要な公開エンドポイントは除外（必要に応じて拡張）
+PUBLIC_PATHS = {"/health", "/api/v1/auth/login", "/api/v1/auth/register"}
+
+class CSRFMiddleware:
+    """CSRF検証ミドルウェア（純粋ASGI）"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.csrf_enabled:
+            await self.app(scope, receive, send)
+            return
+
         # 安全なメソッドは検証不要
-        if request.method.upper() in SAFE_METHODS:
-            return await call_next(request)
-        
-        # 認証不要な公開エンドポイントは除外（必要に応じて拡張）
-        public_paths = {"/health", "/api/v1/auth/login", "/api/v1/auth/register"}
-        if request.url.path in public_paths:
-            return await call_next(request)
-        
-        csrf_cookie_name = settings.csrf_cookie_name
-        csrf_header_name = settings.csrf_header_name
-        
-        cookie_token = request.cookies.get(csrf_cookie_name)
-        header_token = request.headers.get(csrf_header_name)
-        
+        if scope["method"].upper() in SAFE_METHODS or scope["path"] in PUBLIC_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        ctx = RequestContext.from_scope(scope)
+        cookie_token = ctx.cookies.get(settings.csrf_cookie_name)
+        header_token = ctx.header(settings.csrf_header_name.lower()) or None
+
         if not cookie_token or not header_token or cookie_token != header_token:
-            return JSONResponse(
+            await send_json(
+                scope, receive, send,
                 status_code=status.HTTP_403_FORBIDDEN,
                 content={
                     "detail": "CSRF token missing or invalid",
                     "code": "CSRF_FAILED"
                 }
             )
-        
-        return await call_next(request)
+            return
+
+        await self.app(scope, receive, send)
 
-__all__ = ["CSRFMiddleware"]
\ No newline at end of file
+__all__ = ["CSRFMiddleware"]
@@ -0,0 +1,203 @@
+"""
+Streaming JSON PII masking
+Tokenizes a JSON body incrementally and masks it on the fly:
+- values under sensitive keys are replaced with "[REDACTED]"
+- every other string value goes through PIIMasking.mask_pii
+Only an incomplete string token is ever buffered between chunks; all other
+bytes (numbers, literals, whitespace, punctuation) are re-emitted untouched.
+"""
+
+import json
+import re
+from typing import Callable, List
+
+import structlog
+
+from ..core.security import PIIMasking
+
+logger = structlog.get_logger()
+
+# Next byte that changes the tokenizer state
+_STRUCTURAL = re.compile(rb'["{}\[\],:]')
+# Remainder of a string token after its opening quote (escape-aware)
+_STRING_END = re.compile(rb'(?:[^"\\]|\\.)*"', re.DOTALL)
+# Bytes that matter while skipping a redacted container
+_CONTAINER = re.compile(rb'["{}\[\]]')
+_WHITESPACE = b" \t\r\n"
+
+_REDACTED = b'"[REDACTED]"'
+_OPEN = b"{["
+_QUOTE = ord('"')
+_LBRACE = ord("{")
+_RBRACE = ord("}")
+_LBRACKET = ord("[")
+_COMMA = ord(",")
+_COLON = ord(":")
+
+class StreamingJSONMasker:
+    """Incremental JSON masking transformer (feed chunks, then close)"""
+
+    def __init__(
+        self,
+        mask_string: Callable[[str], str] = PIIMasking.mask_pii,
+        is_sensitive_key: Callable[[str], bool] = PIIMasking.is_sensitive_key,
+        max_token_bytes: int = 1024 * 1024
+    ):
+        """
+        Args:
+            mask_string: masks PII inside a decoded string value
+            is_sensitive_key: decides whether a key's value is redacted
+            max_token_bytes: largest string token buffered across chunks;
+                beyond it the rest of the body passes through unmodified
+        """
+        self.mask_string = mask_string
+        self.is_sensitive_key = is_sensitive_key
+        self.max_token_bytes = max_token_bytes
+        self._buf = b""
+        # Open containers: b"{" / b"[" code points
+        self._stack: List[int] = []
+        self._expect_key = False
+        self._sensitive_key = False
+        # Next value (after ":") must be replaced
+        self._redact = False
+        # Depth of a redacted container being skipped
+        self._skip_depth = 0
+        # Dropping the tail of a redacted scalar
+        self._skip_scalar = False
+        self._passthrough = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        """Consume a chunk and return the masked bytes that are ready"""
+        if self._passthrough:
+            return chunk
+        data = self._buf + chunk if self._buf else chunk
+        self._buf = b""
+        out: List[bytes] = []
+        pos = 0
+        end = len(data)
+
+        while pos < end:
+            if self._skip_depth:
+                pos = self._skip_container(data, pos)
+                continue
+
+            m = _STRUCTURAL.search(data, pos)
+            stop = m.start() if m else end
+
+            if stop > pos:
+                gap = data[pos:stop]
+                scalar = gap.lstrip(_WHITESPACE) if self._redact else b""
+                if self._skip_scalar:
+                    pass
+                elif scalar:
+                    # Redacted scalar (number / true / false / null)
+                    out.append(gap[:len(gap) - len(scalar)])
+                    out.append(_REDACTED)
+                    self._redact = False
+                    self._skip_scalar = m is None
+                else:
+                    out.append(gap)
+            if m is None:
+                break
+            self._skip_scalar = False
+            pos = stop
+            c = data[pos]
+
+            if c == _QUOTE:
+                s = _STRING_END.match(data, pos + 1)
+                if s is None:
+                    # Incomplete string: keep it for the next chunk
+                    self._buf = data[pos:]
+                    if len(self._buf) > self.max_token_bytes:
+                        return self._give_up(out)
+                    break
+                token = data[pos:s.end()]
+                pos = s.end()
+                out.append(self._string_token(token))
+                continue
+
+            if self._redact and c in _OPEN:
+                out.append(_REDACTED)
+                self._redact = False
+                self._skip_depth = 1
+                pos += 1
+                continue
+
+            if c == _LBRACE:
+                self._stack.append(c)
+                self._expect_key = True
+            elif c == _LBRACKET:
+                self._stack.append(c)
+                self._expect_key = False
+            elif c == _COMMA:
+                self._expect_key = bool(self._stack) and self._stack[-1] == _LBRACE
+            elif c == _COLON:
+                self._redact = self._sensitive_key
+                self._sensitive_key = False
+            else:
+                # "}" or "]"
+                if self._stack:
+                    self._stack.pop()
+                self._expect_key = False
+            out.append(data[pos:pos + 1])
+            pos += 1
+
+        return b"".join(out)
+
+    def close(self) -> bytes:
+        """Flush whatever is left (an unterminated token is emitted as-is)"""
+        rest, self._buf = self._buf, b""
+        return rest
+
+    def _string_token(self, token: bytes) -> bytes:
+        """Handle a complete string token (key or value)"""
+        if self._expect_key:
+            self._expect_key = False
+            try:
+                self._sensitive_key = self.is_sensitive_key(json.loads(token))
+            except ValueError:
+                self._sensitive_key = False
+            return token
+        if self._redact:
+            self._redact = False
+            return _REDACTED
+        try:
+            value = json.loads(token)
+        except ValueError:
+            return token
+        masked = self.mask_string(value)
+        if masked == value:
+            return token
+        return json.dumps(masked, ensure_ascii=False).encode("utf-8")
+
+    def _skip_container(self, data: bytes, pos: int) -> int:
+        """Drop bytes of a redacted object/array; returns the next position"""
+        end = len(data)
+        while pos < end:
+            m = _CONTAINER.search(data, pos)
+            if m is None:
+                return end
+            pos = m.start()
+            c = data[pos]
+            if c == _QUOTE:
+                s = _STRING_END.match(data, pos + 1)
+                if s is None:
+                    # Only the (unemitted) string tail is buffered
+                    self._buf = data[pos:]
+                    return end
+                pos = s.end()
+                continue
+            self._skip_depth += 1 if c in _OPEN else -1
+            pos += 1
+            if not self._skip_depth:
+                return pos
+        return pos
+
+    def _give_up(self, out: List[bytes]) -> bytes:
+        logger.warning("Streaming mask token too large, passing the rest through")
+        self._passthrough = True
+        out.append(self._buf)
+        self._buf = b""
+        return b"".join(out)
+
+__all__ = ["StreamingJSONMasker"]
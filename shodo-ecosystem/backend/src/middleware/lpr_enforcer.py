@@ -4,26 +4,28 @@ MUST: Enforce LPR policies on all protected endpoints
 """
 
 import time
-import json
 import random
-from typing import Optional, Callable
+from typing import Optional
 from datetime import datetime, timezone
 
-from fastapi import Request, Response, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import structlog
 
 from ..services.auth.lpr_service import (
     LPRService, LPRScope, DeviceFingerprint, get_lpr_service
 )
 from ..core.config import settings
-from ..core.security import PIIMasking
-from ..utils.correlation import set_correlation_id
+from .json_masking import StreamingJSONMasker
+from ..utils.correlation import correlation_id_var, generate_correlation_id
+from .context import RequestContext, encode_headers, send_json, set_raw_headers
 
 logger = structlog.get_logger()
 
-class LPREnforcerMiddleware(BaseHTTPMiddleware):
+class MaskingLimitExceeded(RuntimeError):
+    """A streamed response outgrew lpr_mask_max_body_bytes while being masked"""
+
+class LPREnforcerMiddleware:
     """
     Middleware to enforce LPR policies
     
@@ -56,44 +58,50 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
         "/api/v1/preview/"
     ]
     
-    def __init__(self, app):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp):
+        self.app = app
         self.lpr_service: Optional[LPRService] = None
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Process request through LPR enforcement"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        ctx = RequestContext.from_scope(scope)
+        path = ctx.path
         
         # Set correlation ID
-        correlation_id = request.headers.get("X-Correlation-ID", "")
+        correlation_id = ctx.header("x-correlation-id") or ctx.correlation_id
         if not correlation_id:
-            correlation_id = set_correlation_id(request)
-        
-        # Check if path is exempt
-        if self._is_exempt_path(request.url.path):
-            return await call_next(request)
+            correlation_id = generate_correlation_id()
+            ctx.correlation_id = correlation_id
+            correlation_id_var.set(correlation_id)
         
-        # Check if LPR is required
-        if not self._requires_lpr(request.url.path):
+        # Check if path is exempt / LPR is required
+        if self._is_exempt_path(path) or not self._requires_lpr(path):
             # Regular authentication is sufficient
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
         
         # Initialize LPR service if needed
         if self.lpr_service is None:
             self.lpr_service = await get_lpr_service()
         
         # Extract LPR token
-        lpr_token = self._extract_lpr_token(request)
+        lpr_token = self._extract_lpr_token(ctx)
         if not lpr_token:
             logger.warning(
                 "LPR token missing for protected endpoint",
-                path=request.url.path,
+                path=path,
                 correlation_id=correlation_id
             )
             # fail-open/closed
             if settings.lpr_fail_open and not settings.is_production():
-                return await call_next(request)
+                await self.app(scope, receive, send)
             else:
-                return JSONResponse(
+                await send_json(
+                    scope, receive, send,
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     content={
                         "error": "LPR_TOKEN_REQUIRED",
@@ -101,14 +109,15 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
                         "correlation_id": correlation_id
                     }
                 )
+            return
         
         # Extract device fingerprint
-        device_fingerprint = self._extract_device_fingerprint(request)
+        device_fingerprint = self._extract_device_fingerprint(ctx)
         
         # Create required scope
         required_scope = LPRScope(
-            method=request.method,
-            url_pattern=request.url.path
+            method=ctx.method,
+            url_pattern=path
         )
         
         # Verify token
@@ -121,14 +130,15 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
         if not verification.get("valid"):
             logger.warning(
                 "LPR token verification failed",
-                path=request.url.path,
+                path=path,
                 error=verification.get("error"),
                 correlation_id=correlation_id
             )
             if settings.lpr_fail_open and not settings.is_production():
-                return await call_next(request)
+                await self.app(scope, receive, send)
             else:
-                return JSONResponse(
+                await send_json(
+                    scope, receive, send,
                     status_code=status.HTTP_403_FORBIDDEN,
                     content={
                         "error": "LPR_VERIFICATION_FAILED",
@@ -136,17 +146,16 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
                         "correlation_id": correlation_id
                     }
                 )
+            return
         
         # Extract token info
         jti = verification.get("jti")
         user_id = verification.get("user_id")
         service = verification.get("service")
         
-        # Store LPR context in request state for downstream middlewares (e.g., RateLimit)
-        request.state.lpr_jti = jti
-        request.state.lpr_user_id = user_id
-        request.state.lpr_service = service
-        request.state.correlation_id = correlation_id
+        # Store LPR context for downstream middlewares (e.g., RateLimit) and handlers
+        ctx.set_lpr_context(jti, user_id, service)
+        ctx.correlation_id = correlation_id
         
         # Add human speed jitter (if enabled)
         if await self._should_add_jitter(jti):
@@ -160,14 +169,79 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
             jti=jti,
             user_id=user_id,
             service=service,
-            method=request.method,
-            path=request.url.path,
+            method=ctx.method,
+            path=path,
             correlation_id=correlation_id
         )
         
+        status_code = 500
+        lpr_headers = encode_headers([
+            ("X-LPR-JTI", jti),
+            ("X-LPR-Service", service),
+            ("X-Correlation-ID", correlation_id),
+        ])
+        # Masking state (200 JSON responses are masked while streaming)
+        masker: Optional[StreamingJSONMasker] = None
+        pending_start: Optional[Message] = None
+        masked_bytes = 0
+        
+        async def send_wrapper(message: Message):
+            nonlocal status_code, pending_start, masker, masked_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                operation_time = time.time() - start_time
+                set_raw_headers(message, lpr_headers + [
+                    (b"x-operation-time", f"{operation_time:.3f}".encode("latin-1"))
+                ])
+                # Mask sensitive response data
+                if status_code == 200 and self._should_mask(message):
+                    masker = StreamingJSONMasker()
+                    pending_start = message
+                    return
+                await send(message)
+                return
+            
+            if masker is not None and message["type"] == "http.response.body":
+                more_body = message.get("more_body", False)
+                chunk = message.get("body", b"")
+                masked_bytes += len(chunk)
+                if masked_bytes > settings.lpr_mask_max_body_bytes:
+                    # Undeclared (streamed) length: fail closed rather than let
+                    # the rest of the body through unmasked. Before the start
+                    # message is sent this becomes a 500; after, the connection
+                    # is aborted and the client sees a truncated response.
+                    logger.error(
+                        "LPR masked response exceeded size limit",
+                        path=path,
+                        limit=settings.lpr_mask_max_body_bytes,
+                        correlation_id=correlation_id
+                    )
+                    raise MaskingLimitExceeded(path)
+                body = masker.feed(chunk)
+                if not more_body:
+                    body += masker.close()
+                if pending_start is not None:
+                    # Single-message bodies keep an exact content-length;
+                    # streamed bodies switch to chunked transfer
+                    start_message, pending_start = pending_start, None
+                    if more_body:
+                        start_message["headers"] = [
+                            h for h in start_message.get("headers", ())
+                            if h[0].lower() != b"content-length"
+                        ]
+                    else:
+                        set_raw_headers(start_message, [
+                            (b"content-length", str(len(body)).encode("latin-1"))
+                        ])
+                    await send(start_message)
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+            
+            await send(message)
+        
         # Process the request
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             # Log operation failure
             logger.error(
@@ -181,32 +255,17 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
             )
             raise
         
-        # Calculate operation time
-        operation_time = time.time() - start_time
-        
-        # Mask sensitive response data
-        if response.status_code == 200:
-            response = await self._mask_response(response)
-        
-        # Add LPR headers
-        response.headers["X-LPR-JTI"] = jti
-        response.headers["X-LPR-Service"] = service
-        response.headers["X-Correlation-ID"] = correlation_id
-        response.headers["X-Operation-Time"] = f"{operation_time:.3f}"
-        
         # Audit log the operation
         await self._audit_log(
             jti=jti,
             user_id=user_id,
             service=service,
-            method=request.method,
-            path=request.url.path,
-            status_code=response.status_code,
-            operation_time=operation_time,
+            method=ctx.method,
+            path=path,
+            status_code=status_code,
+            operation_time=time.time() - start_time,
             correlation_id=correlation_id
         )
-        
-        return response
     
     def _is_exempt_path(self, path: str) -> bool:
         """Check if path is exempt from LPR"""
@@ -222,32 +281,32 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
                 return True
         return False
     
-    def _extract_lpr_token(self, request: Request) -> Optional[str]:
+    def _extract_lpr_token(self, ctx: RequestContext) -> Optional[str]:
         """Extract LPR token from request"""
         # Check Authorization header
-        auth_header = request.headers.get("Authorization", "")
+        auth_header = ctx.header("authorization")
         if auth_header.startswith("Bearer LPR-"):
             return auth_header[11:]  # Remove "Bearer LPR-" prefix
         
         # Check X-LPR-Token header
-        lpr_header = request.headers.get("X-LPR-Token")
+        lpr_header = ctx.header("x-lpr-token")
         if lpr_header:
             return lpr_header
         
         # Check query parameter (not recommended for production)
         if not settings.is_production():
-            return request.query_params.get("lpr_token")
+            return ctx.query_param("lpr_token")
         
         return None
     
-    def _extract_device_fingerprint(self, request: Request) -> DeviceFingerprint:
+    def _extract_device_fingerprint(self, ctx: RequestContext) -> DeviceFingerprint:
         """Extract device fingerprint from request"""
         return DeviceFingerprint(
-            user_agent=request.headers.get("User-Agent", ""),
-            accept_language=request.headers.get("Accept-Language", ""),
-            screen_resolution=request.headers.get("X-Screen-Resolution"),
-            timezone=request.headers.get("X-Timezone"),
-            canvas_hash=request.headers.get("X-Canvas-Hash")
+            user_agent=ctx.header("user-agent"),
+            accept_language=ctx.header("accept-language"),
+            screen_resolution=ctx.header("x-screen-resolution") or None,
+            timezone=ctx.header("x-timezone") or None,
+            canvas_hash=ctx.header("x-canvas-hash") or None
         )
     
     # Note: レート制限は `middleware/rate_limit.py` に一本化。ここでは実施しない。
@@ -264,33 +323,25 @@ class LPREnforcerMiddleware(BaseHTTPMiddleware):
         import asyncio
         await asyncio.sleep(seconds)
     
-    async def _mask_response(self, response: Response) -> Response:
-        """Mask sensitive data in response"""
-        # Only mask JSON responses
-        if "application/json" not in response.headers.get("content-type", ""):
-            return response
-        
-        # Read response body
-        body = b""
-        async for chunk in response.body_iterator:
-            body += chunk
-        
-        try:
-            # Parse JSON
-            data = json.loads(body)
-            
-            # Mask PII
-            masked_data = PIIMasking.mask_dict(data)
-            
-            # Create new response with masked data
-            return JSONResponse(
-                content=masked_data,
-                status_code=response.status_code,
-                headers=dict(response.headers)
-            )
-        except:
-            # If parsing fails, return original
-            return response
+    @staticmethod
+    def _should_mask(message: Message) -> bool:
+        """
+        Mask JSON bodies only; bodies whose declared content-length exceeds
+        lpr_mask_max_body_bytes pass through untouched. Streamed bodies without
+        a content-length are masked and fail closed once they pass the limit.
+        """
+        is_json = False
+        for name, value in message.get("headers", ()):
+            name = name.lower()
+            if name == b"content-type":
+                is_json = b"application/json" in value
+            elif name == b"content-length":
+                try:
+                    if int(value) > settings.lpr_mask_max_body_bytes:
+                        return False
+                except ValueError:
+                    pass
+        return is_json
     
     async def _audit_log(
         self,
@@ -8,14 +8,15 @@ import hashlib
 from typing import Dict, Optional, Tuple
 from collections import defaultdict
 import asyncio
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from fastapi import status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
 from ..core.config import settings
 from ..services.database import get_redis
 from ..monitoring.metrics import MetricsCollector
+from ..monitoring.heavy_hitters import get_heavy_hitter_tracker
+from .context import RequestContext, encode_headers, send_json, set_raw_headers
 
 logger = logging.getLogger(__name__)
 
@@ -65,34 +66,32 @@ class RateLimiter:
         self.redis = None
         self._redis_checked = False
     
-    def _get_client_id(self, request: Request) -> str:
+    def _get_client_id(self, ctx: RequestContext) -> str:
         """クライアント識別子を生成"""
         # 優先順位: LPR JTI > 認証ユーザーID > X-Forwarded-For+UA
-        try:
-            lpr_jti = getattr(request.state, "lpr_jti", None)
-            if lpr_jti:
-                return f"lpr:{lpr_jti}"
-        except Exception:
-            pass
+        lpr_jti = ctx.lpr_jti
+        if lpr_jti:
+            return f"lpr:{lpr_jti}"
 
         # 認証ユーザーがいれば使用
-        if hasattr(request.state, "user") and request.state.user:
+        user = ctx.user
+        if user:
             try:
-                uid = getattr(request.state.user, "user_id", None) or request.state.user.get("sub")
+                uid = getattr(user, "user_id", None) or user.get("sub")
                 if uid:
                     return f"user:{uid}"
             except Exception:
-                return f"user:{request.state.user}"
+                return f"user:{user}"
         
         # IPアドレスベース
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        forwarded_for = ctx.header("x-forwarded-for")
         if forwarded_for:
             client_ip = forwarded_for.split(",")[0].strip()
         else:
-            client_ip = request.client.host if request.client else "unknown"
+            client_ip = ctx.client_host
         
         # User-Agentも考慮（同一IPからの異なるクライアント識別）
-        user_agent = request.headers.get("User-Agent", "")
+        user_agent = ctx.header("user-agent")
         client_str = f"{client_ip}:{user_agent[:50]}"
         
         # ハッシュ化して返す
@@ -293,7 +292,7 @@ class RateLimiter:
     
     async def check_rate_limit(
         self, 
-        request: Request
+        ctx: RequestContext
     ) -> Tuple[bool, Optional[Dict[str, int]]]:
         """
         レート制限チェック
@@ -304,8 +303,10 @@ class RateLimiter:
         if not settings.rate_limit_enabled:
             return True, None
         
-        client_id = self._get_client_id(request)
-        path = request.url.path
+        client_id = self._get_client_id(ctx)
+        # テレメトリ用に識別子を共有（再計算を避ける）
+        ctx.state["rate_limit_client_id"] = client_id
+        path = ctx.path
         limits = RateLimitConfig.get_limits(path)
         
         # Redis使用可能性を毎回チェック（接続復旧対応）
@@ -319,68 +320,97 @@ class RateLimiter:
             # 開発/テストではメモリにフォールバック
             return await self._check_memory_limit(client_id, path, limits)
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """レート制限ミドルウェア"""
+class RateLimitMiddleware:
+    """レート制限ミドルウェア（純粋ASGI）"""
     
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         self.limiter = RateLimiter(use_redis=True)
+        # ヘビーヒッター検出（全リクエスト / 制限超過）
+        self.consumption = get_heavy_hitter_tracker("requests")
+        self.throttled = get_heavy_hitter_tracker("throttled")
+    
+    def _record_heavy_hitters(self, ctx: RequestContext, allowed: bool) -> None:
+        """クライアント/ルート別の消費量をスケッチへ記録"""
+        if not settings.rate_limit_hh_enabled:
+            return
+        try:
+            client_id = ctx.state.get("rate_limit_client_id")
+            if not client_id:
+                return
+            route = ctx.path
+            self.consumption.record(client_id, route)
+            if not allowed:
+                self.throttled.record(client_id, route)
+            redis_client = self.limiter.redis
+            self.consumption.maybe_schedule_flush(redis_client)
+            self.throttled.maybe_schedule_flush(redis_client)
+        except Exception as e:
+            logger.debug(f"Heavy hitter tracking failed: {e}")
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """リクエスト処理"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        ctx = RequestContext.from_scope(scope)
         
         # レート制限チェック
-        allowed, rate_info = await self.limiter.check_rate_limit(request)
+        allowed, rate_info = await self.limiter.check_rate_limit(ctx)
+        self._record_heavy_hitters(ctx, allowed)
+        
+        limits = RateLimitConfig.get_limits(ctx.path)
         
         if not allowed:
             # 制限超過
             retry_after = rate_info.get("retry_after", 60)
             
             logger.warning(
-                f"Rate limit exceeded for {request.client.host} on {request.url.path}"
+                f"Rate limit exceeded for {ctx.client_host} on {ctx.path}"
             )
             try:
-                client_type = "lpr" if getattr(request.state, "lpr_jti", None) else "ip"
-                MetricsCollector.record_rate_limit_hit(endpoint=request.url.path, client_type=client_type)
+                client_type = "lpr" if ctx.lpr_jti else "ip"
+                MetricsCollector.record_rate_limit_hit(endpoint=ctx.path, client_type=client_type)
             except Exception:
                 pass
             
-            raise HTTPException(
+            await send_json(
+                scope, receive, send,
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded",
+                content={"detail": "Rate limit exceeded"},
                 headers={
                     "Retry-After": str(retry_after),
-                    "X-RateLimit-Limit": str(RateLimitConfig.get_limits(request.url.path)["per_minute"]),
+                    "X-RateLimit-Limit": str(limits["per_minute"]),
                     "X-RateLimit-Remaining": "0",
                     "X-RateLimit-Reset": str(int(time.time()) + retry_after)
                 }
             )
+            return
+        
+        if not rate_info:
+            await self.app(scope, receive, send)
+            return
         
         # レート情報をヘッダーに追加
-        response = await call_next(request)
+        rate_headers = [
+            ("X-RateLimit-Limit-Minute", str(limits["per_minute"])),
+            ("X-RateLimit-Remaining-Minute", str(rate_info.get("minute_remaining", 0))),
+            ("X-RateLimit-Limit-Hour", str(limits["per_hour"])),
+            ("X-RateLimit-Remaining-Hour", str(rate_info.get("hour_remaining", 0))),
+            ("X-RateLimit-Burst-Remaining", str(rate_info.get("burst_remaining", 0))),
+        ]
+        # Degradedモードのヒント
+        if settings.rate_limit_fail_open and settings.rate_limit_degraded_mode_headers:
+            rate_headers.append(("X-RateLimit-Mode", "degraded"))
+        raw_headers = encode_headers(rate_headers)
         
-        if rate_info:
-            response.headers["X-RateLimit-Limit-Minute"] = str(
-                RateLimitConfig.get_limits(request.url.path)["per_minute"]
-            )
-            response.headers["X-RateLimit-Remaining-Minute"] = str(
-                rate_info.get("minute_remaining", 0)
-            )
-            response.headers["X-RateLimit-Limit-Hour"] = str(
-                RateLimitConfig.get_limits(request.url.path)["per_hour"]
-            )
-            response.headers["X-RateLimit-Remaining-Hour"] = str(
-                rate_info.get("hour_remaining", 0)
-            )
-            response.headers["X-RateLimit-Burst-Remaining"] = str(
-                rate_info.get("burst_remaining", 0)
-            )
-            
-            # Degradedモードのヒント
-            if settings.rate_limit_fail_open and settings.rate_limit_degraded_mode_headers:
-                response.headers["X-RateLimit-Mode"] = "degraded"
+        async def send_with_rate_headers(message: Message):
+            if message["type"] == "http.response.start":
+                set_raw_headers(message, raw_headers)
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_rate_headers)
 
 # エクスポート
 __all__ = ['RateLimitMiddleware', 'RateLimitConfig', 'RateLimiter']
\ No newline at end of file
@@ -8,8 +8,10 @@ from typing import Dict, Optional
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 from ..core.config import settings
+from .context import encode_headers, set_raw_headers
 
 logger = logging.getLogger(__name__)
 
@@ -100,20 +102,15 @@ class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
         
         return response
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """セキュリティヘッダーミドルウェア"""
-    
-    async def dispatch(self, request: Request, call_next):
-        """セキュリティヘッダーを追加"""
-        response = await call_next(request)
-        
-        # セキュリティヘッダー
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        connect_src = " ".join(settings.csp_connect_src)
-        response.headers["Content-Security-Policy"] = (
+def build_security_headers() -> Dict[str, str]:
+    """既定のセキュリティヘッダー（CSP connect-src は設定値を反映）"""
+    connect_src = " ".join(settings.csp_connect_src)
+    return {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+        "Content-Security-Policy": (
             "default-src 'self'; "
             "script-src 'self'; "
             "style-src 'self'; "
@@ -122,9 +119,32 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             f"connect-src {connect_src}; "
             "frame-ancestors 'none'; "
             "base-uri 'self'"
-        )
+        ),
+    }
+
+class SecurityHeadersMiddleware:
+    """セキュリティヘッダーミドルウェア（純粋ASGI）
+
+    ヘッダーは起動時に生バイト列ペアへ変換しておき、レスポンス開始時に付与する
+    """
+    
+    def __init__(self, app: ASGIApp, headers: Optional[Dict[str, str]] = None):
+        self.app = app
+        self.raw_headers = encode_headers((headers or build_security_headers()).items())
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        return response
+        raw_headers = self.raw_headers
+        
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                set_raw_headers(message, raw_headers)
+            await send(message)
+        
+        await self.app(scope, receive, send_with_headers)
 
 class RequestValidationMiddleware(BaseHTTPMiddleware):
     """リクエスト検証ミドルウェア"""
@@ -0,0 +1,309 @@
+"""
+ヘビーヒッター検出（レート制限テレメトリ）
+Count-Min Sketch と Space-Saving（Top-K）でクライアント/ルート別の消費量を
+クライアント数に依存しない固定メモリで推定し、定期的にRedisへマージする
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+
+logger = structlog.get_logger()
+
+# 追跡する次元（クライアントID / ルート）
+DIMENSIONS = ("client", "route")
+
+class CountMinSketch:
+    """Count-Min Sketch（過大推定のみ・固定メモリの頻度推定）"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+        Args:
+            width: 各行のカウンタ数
+            depth: ハッシュ関数（行）の数
+        """
+        self.width = width
+        self.depth = depth
+        self.rows: List[List[int]] = [[0] * width for _ in range(depth)]
+        self.total = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        """キーに対応する各行の列インデックスを算出（ダブルハッシング）"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> List[int]:
+        """カウントを加算し、更新した列インデックスを返す"""
+        indexes = self._indexes(key)
+        for row, col in zip(self.rows, indexes):
+            row[col] += count
+        self.total += count
+        return indexes
+
+    def estimate(self, key: str) -> int:
+        """キーの出現回数を推定"""
+        return min(row[col] for row, col in zip(self.rows, self._indexes(key)))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        """同一形状のスケッチを加算マージ"""
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge sketches with different dimensions")
+        for row, other_row in zip(self.rows, other.rows):
+            for i, value in enumerate(other_row):
+                if value:
+                    row[i] += value
+        self.total += other.total
+
+    def clear(self) -> None:
+        """全カウンタをリセット"""
+        self.rows = [[0] * self.width for _ in range(self.depth)]
+        self.total = 0
+
+class SpaceSaving:
+    """Space-Saving アルゴリズムによるTop-K推定"""
+
+    def __init__(self, capacity: int = 64):
+        """
+        Args:
+            capacity: 保持するカウンタ数（Top-Kの候補数）
+        """
+        self.capacity = capacity
+        # key -> [count, error]
+        self.counters: Dict[str, List[int]] = {}
+
+    def offer(self, key: str, count: int = 1) -> None:
+        """要素を観測"""
+        entry = self.counters.get(key)
+        if entry is not None:
+            entry[0] += count
+            return
+
+        if len(self.counters) < self.capacity:
+            self.counters[key] = [count, 0]
+            return
+
+        # 最小カウンタを置き換え（誤差として旧カウントを保持）
+        min_key = min(self.counters, key=lambda k: self.counters[k][0])
+        min_count = self.counters.pop(min_key)[0]
+        self.counters[key] = [min_count + count, min_count]
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """上位n件を (key, count, error) で返す"""
+        items = sorted(
+            ((k, c, e) for k, (c, e) in self.counters.items()),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return items[:n] if n else items
+
+    def clear(self) -> None:
+        """全カウンタをリセット"""
+        self.counters.clear()
+
+class HeavyHitterTracker:
+    """クライアント/ルート別のヘビーヒッター追跡（ウィンドウ単位）"""
+
+    def __init__(
+        self,
+        name: str,
+        width: int = 2048,
+        depth: int = 4,
+        top_k: int = 20,
+        window_seconds: int = 300,
+        flush_interval: float = 10.0
+    ):
+        """
+        Args:
+            name: トラッカー名（Redisキー/メトリクスラベルに使用）
+            width: Count-Min Sketchの幅
+            depth: Count-Min Sketchの深さ
+            top_k: 公開する上位件数
+            window_seconds: 集計ウィンドウ（秒）
+            flush_interval: Redisへのマージ間隔（秒）
+        """
+        self.name = name
+        self.top_k = top_k
+        self.window_seconds = window_seconds
+        self.flush_interval = flush_interval
+
+        self.sketch = CountMinSketch(width=width, depth=depth)
+        self.top: Dict[str, SpaceSaving] = {d: SpaceSaving(top_k * 2) for d in DIMENSIONS}
+
+        # 前回フラッシュ以降の差分（Redisマージ用、サイズは固定上限）
+        self._pending_cells: Dict[Tuple[int, int], int] = {}
+        self._pending_top: Dict[str, SpaceSaving] = {d: SpaceSaving(top_k * 2) for d in DIMENSIONS}
+
+        self.window_id = self._current_window()
+        self._last_flush = time.time()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _current_window(self) -> int:
+        return int(time.time() // self.window_seconds)
+
+    def _redis_key(self, suffix: str, window_id: Optional[int] = None) -> str:
+        window = self.window_id if window_id is None else window_id
+        return f"ratelimit:hh:{self.name}:{window}:{suffix}"
+
+    def _roll_window(self) -> None:
+        """ウィンドウが切り替わったらローカル集計をリセット"""
+        window_id = self._current_window()
+        if window_id == self.window_id:
+            return
+        self.window_id = window_id
+        self.sketch.clear()
+        for summary in self.top.values():
+            summary.clear()
+        # 未フラッシュ差分は旧ウィンドウ扱いとなるため破棄
+        self._pending_cells.clear()
+        for summary in self._pending_top.values():
+            summary.clear()
+
+    def record(self, client_id: str, route: str, count: int = 1) -> None:
+        """1リクエスト分を記録"""
+        self._roll_window()
+        for dimension, key in (("client", client_id), ("route", route)):
+            item = f"{dimension}:{key}"
+            for row, col in enumerate(self.sketch.add(item, count)):
+                cell = (row, col)
+                self._pending_cells[cell] = self._pending_cells.get(cell, 0) + count
+            self.top[dimension].offer(key, count)
+            self._pending_top[dimension].offer(key, count)
+
+    def estimate(self, dimension: str, key: str) -> int:
+        """ローカル推定値"""
+        return self.sketch.estimate(f"{dimension}:{key}")
+
+    def snapshot(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """ローカル（ワーカー内）の上位消費者"""
+        limit = limit or self.top_k
+        return {
+            "tracker": self.name,
+            "window_start": self.window_id * self.window_seconds,
+            "window_seconds": self.window_seconds,
+            "total": self.sketch.total,
+            "top": {
+                dimension: [
+                    {"key": key, "count": count, "error": error}
+                    for key, count, error in summary.top(limit)
+                ]
+                for dimension, summary in self.top.items()
+            },
+        }
+
+    def maybe_schedule_flush(self, redis_client) -> None:
+        """フラッシュ間隔を超えていればバックグラウンドでRedisへマージ（Redis なしでもゲージは更新）"""
+        if time.time() - self._last_flush < self.flush_interval:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._last_flush = time.time()
+        if redis_client is None:
+            # マージ先がない間も差分は保持し、ローカルTop-Kのゲージだけ更新
+            self.export_gauges()
+            return
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush(redis_client))
+        except RuntimeError:
+            # イベントループ外では何もしない
+            self._flush_task = None
+
+    async def flush(self, redis_client) -> None:
+        """差分をRedisへパイプラインでマージし、ゲージを更新"""
+        cells, self._pending_cells = self._pending_cells, {}
+        pending = {d: s.top() for d, s in self._pending_top.items()}
+        for summary in self._pending_top.values():
+            summary.clear()
+
+        ttl = self.window_seconds * 2
+        try:
+            if cells or any(pending.values()):
+                pipe = redis_client.pipeline()
+                cms_key = self._redis_key("cms")
+                for (row, col), delta in cells.items():
+                    pipe.hincrby(cms_key, f"{row}:{col}", delta)
+                pipe.expire(cms_key, ttl)
+                for dimension, items in pending.items():
+                    if not items:
+                        continue
+                    zkey = self._redis_key(f"top:{dimension}")
+                    for key, count, _ in items:
+                        pipe.zincrby(zkey, count, key)
+                    # 上位候補のみ保持してメモリを固定
+                    pipe.zremrangebyrank(zkey, 0, -(self.top_k * 4) - 1)
+                    pipe.expire(zkey, ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Heavy hitter merge to Redis failed", tracker=self.name, error=str(e))
+
+        self.export_gauges()
+
+    async def global_snapshot(self, redis_client, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Redisにマージ済みの全ワーカー集計"""
+        limit = limit or self.top_k
+        result: Dict[str, Any] = {
+            "tracker": self.name,
+            "window_start": self.window_id * self.window_seconds,
+            "window_seconds": self.window_seconds,
+            "top": {},
+        }
+        for dimension in DIMENSIONS:
+            rows = await redis_client.zrevrange(
+                self._redis_key(f"top:{dimension}"), 0, limit - 1, withscores=True
+            )
+            result["top"][dimension] = [
+                {"key": key, "count": int(score)} for key, score in rows
+            ]
+        return result
+
+    async def global_estimate(self, redis_client, dimension: str, key: str) -> int:
+        """Redisにマージ済みスケッチからの推定値"""
+        indexes = self.sketch._indexes(f"{dimension}:{key}")
+        fields = [f"{row}:{col}" for row, col in enumerate(indexes)]
+        values = await redis_client.hmget(self._redis_key("cms"), fields)
+        return min(int(v or 0) for v in values)
+
+    def export_gauges(self) -> None:
+        """ローカルTop-KをPrometheusゲージへ反映"""
+        try:
+            from .metrics import MetricsCollector
+            MetricsCollector.set_rate_limit_top_consumers(
+                self.name,
+                {
+                    dimension: [(key, count) for key, count, _ in summary.top(self.top_k)]
+                    for dimension, summary in self.top.items()
+                }
+            )
+        except Exception:
+            # メトリクスが壊れても本処理は妨げない
+            pass
+
+_trackers: Dict[str, HeavyHitterTracker] = {}
+
+def get_heavy_hitter_tracker(name: str) -> HeavyHitterTracker:
+    """名前付きトラッカーのシングルトンを取得（設定値から初期化）"""
+    tracker = _trackers.get(name)
+    if tracker is None:
+        from ..core.config import settings
+        tracker = HeavyHitterTracker(
+            name=name,
+            width=settings.rate_limit_hh_sketch_width,
+            depth=settings.rate_limit_hh_sketch_depth,
+            top_k=settings.rate_limit_hh_top_k,
+            window_seconds=settings.rate_limit_hh_window_seconds,
+            flush_interval=settings.rate_limit_hh_flush_interval_seconds,
+        )
+        _trackers[name] = tracker
+    return tracker
+
+# エクスポート
+__all__ = [
+    'CountMinSketch',
+    'SpaceSaving',
+    'HeavyHitterTracker',
+    'get_heavy_hitter_tracker',
+]
@@ -4,7 +4,7 @@ Prometheus メトリクス実装
 """
 
 import time
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from prometheus_client import (
     Counter, Histogram, Gauge, Info,
     CollectorRegistry, generate_latest,
@@ -12,7 +12,6 @@ from prometheus_client import (
 )
 import structlog
 from functools import wraps
-from starlette.middleware.base import BaseHTTPMiddleware
 
 logger = structlog.get_logger()
 
@@ -72,12 +71,85 @@ lpr_tokens_revoked_total = Counter(
     registry=registry
 )
 
+lpr_verify_cache_total = Counter(
+    'lpr_verify_cache_total',
+    'LPR verified-claims cache lookups',
+    ['result'],
+    registry=registry
+)
+
+auth_identity_cache_total = Counter(
+    'auth_identity_cache_total',
+    'Authentication identity cache lookups',
+    ['cache', 'result'],
+    registry=registry
+)
+
+password_hash_queue_wait_seconds = Histogram(
+    'password_hash_queue_wait_seconds',
+    'Time password hashing requests wait for a worker',
+    ['op'],
+    buckets=[0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0],
+    registry=registry
+)
+
+password_hash_duration_seconds = Histogram(
+    'password_hash_duration_seconds',
+    'Password hash / verify computation time',
+    ['op'],
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.0],
+    registry=registry
+)
+
+password_hash_rejected_total = Counter(
+    'password_hash_rejected_total',
+    'Password hashing requests rejected by admission control',
+    ['op', 'reason'],
+    registry=registry
+)
+
 lpr_active_tokens = Gauge(
     'lpr_active_tokens',
     'Currently active LPR tokens',
     registry=registry
 )
 
+# === 外部コネクタ メトリクス ===
+connector_pool_connections = Gauge(
+    'connector_pool_connections',
+    'Shared connector pool connections per origin',
+    ['origin', 'state'],
+    registry=registry
+)
+
+connector_pool_in_flight = Gauge(
+    'connector_pool_in_flight',
+    'In-flight requests on the shared connector pool per origin',
+    ['origin'],
+    registry=registry
+)
+
+connector_cache_total = Counter(
+    'connector_cache_total',
+    'Connector response cache lookups',
+    ['connector', 'result'],
+    registry=registry
+)
+
+connector_circuit_state = Gauge(
+    'connector_circuit_state',
+    'Connector circuit breaker state per upstream host and endpoint (0=closed, 1=half_open, 2=open)',
+    ['breaker'],
+    registry=registry
+)
+
+connector_circuit_transitions_total = Counter(
+    'connector_circuit_transitions_total',
+    'Connector circuit breaker state transitions',
+    ['breaker', 'state'],
+    registry=registry
+)
+
 # === NLP メトリクス ===
 nlp_analyses_total = Counter(
     'nlp_analyses_total',
@@ -162,6 +234,13 @@ rate_limit_hits_total = Counter(
     registry=registry
 )
 
+rate_limit_top_consumers = Gauge(
+    'rate_limit_top_consumers',
+    'Estimated requests of top consumers in the current window',
+    ['tracker', 'dimension', 'key'],
+    registry=registry
+)
+
 # === エラーメトリクス ===
 errors_total = Counter(
     'errors_total',
@@ -178,6 +257,12 @@ correlation_requests_total = Counter(
     registry=registry
 )
 
+# トラッカーごとに前回エクスポートした rate_limit_top_consumers の (dimension, key)
+_exported_top_consumers: Dict[str, Set[Tuple[str, str]]] = {}
+
+# connector_circuit_state の値
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
 class MetricsCollector:
     """メトリクス収集ユーティリティクラス"""
     
@@ -218,6 +303,45 @@ class MetricsCollector:
         status = "success" if success else "failure"
         lpr_tokens_verified_total.labels(status=status).inc()
     
+    @staticmethod
+    def record_lpr_verify_cache(hit: bool):
+        """LPR 検証キャッシュの参照結果を記録"""
+        lpr_verify_cache_total.labels(result="hit" if hit else "miss").inc()
+    
+    @staticmethod
+    def record_auth_identity_cache(cache: str, hit: bool):
+        """認証ID解決キャッシュ（claims / user）の参照結果を記録"""
+        auth_identity_cache_total.labels(cache=cache, result="hit" if hit else "miss").inc()
+    
+    @staticmethod
+    def record_password_hash(op: str, wait: float, duration: float):
+        """パスワードハッシュ処理のキュー待ち時間と計算時間を記録"""
+        password_hash_queue_wait_seconds.labels(op=op).observe(wait)
+        password_hash_duration_seconds.labels(op=op).observe(duration)
+    
+    @staticmethod
+    def record_password_hash_rejected(op: str, reason: str):
+        """受付制御で拒否されたハッシュ処理を記録"""
+        password_hash_rejected_total.labels(op=op, reason=reason).inc()
+    
+    @staticmethod
+    def record_connector_pool(origin: str, active: int, idle: int, in_flight: int):
+        """共有接続プールの利用状況を記録"""
+        connector_pool_connections.labels(origin=origin, state="active").set(active)
+        connector_pool_connections.labels(origin=origin, state="idle").set(idle)
+        connector_pool_in_flight.labels(origin=origin).set(in_flight)
+    
+    @staticmethod
+    def record_connector_cache(connector: str, result: str):
+        """コネクタ応答キャッシュの結果を記録（hit / revalidated / miss）"""
+        connector_cache_total.labels(connector=connector, result=result).inc()
+    
+    @staticmethod
+    def record_circuit_state(breaker: str, state: str):
+        """サーキットブレーカーの状態遷移を記録（closed / half_open / open）"""
+        connector_circuit_state.labels(breaker=breaker).set(_CIRCUIT_STATES.get(state, 0))
+        connector_circuit_transitions_total.labels(breaker=breaker, state=state).inc()
+    
     @staticmethod
     def record_lpr_revoked(reason: str):
         """LPR 取り消しを記録"""
@@ -263,6 +387,19 @@ class MetricsCollector:
         """レート制限ヒットを記録"""
         rate_limit_hits_total.labels(endpoint=endpoint, client_type=client_type).inc()
     
+    @staticmethod
+    def set_rate_limit_top_consumers(tracker: str, top: Dict[str, List[Tuple[str, int]]]):
+        """レート制限の上位消費者を設定（上位から外れた系列は破棄）"""
+        current = {(dimension, key) for dimension, items in top.items() for key, _ in items}
+        for dimension, key in _exported_top_consumers.get(tracker, set()) - current:
+            rate_limit_top_consumers.remove(tracker, dimension, key)
+        for dimension, items in top.items():
+            for key, count in items:
+                rate_limit_top_consumers.labels(
+                    tracker=tracker, dimension=dimension, key=key
+                ).set(count)
+        _exported_top_consumers[tracker] = current
+    
     @staticmethod
     def record_error(error_type: str, component: str):
         """エラーを記録"""
@@ -344,24 +481,39 @@ def init_system_metrics(version: str, environment: str):
         environment=environment
     )
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """HTTPメトリクス収集のStarletteミドルウェア実装"""
-    async def dispatch(self, request, call_next):
+class MetricsMiddleware:
+    """HTTPメトリクス収集の純粋ASGIミドルウェア実装
+
+    レスポンス本文の送信完了までを計測し、ストリーミングレスポンスもラップしない
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.time()
         status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
         try:
-            response = await call_next(request)
-            status_code = getattr(response, 'status_code', 200)
-            return response
+            await self.app(scope, receive, send_with_status)
         finally:
             duration = time.time() - start_time
             try:
                 MetricsCollector.record_http_request(
-                    method=request.method,
-                    endpoint=request.url.path,
+                    method=scope["method"],
+                    endpoint=scope["path"],
                     status_code=status_code,
                     duration=duration
                 )
             except Exception:
                 # メトリクスが壊れても本処理は妨げない
-                pass
\ No newline at end of file
+                pass
@@ -4,13 +4,14 @@
 
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from datetime import datetime, timedelta
 import secrets
 import hashlib
 
 from ...models.models import User, Session, APIKey
-from ...core.security import get_password_hash, verify_password, JWTManager
+from ...core.security import JWTManager
+from .password_hasher import get_password_hasher
 from ...schemas.auth import UserCreate, UserLogin, TokenResponse
 
 class AuthService:
@@ -35,7 +36,7 @@ class AuthService:
         user = User(
             username=user_data.username,
             email=user_data.email,
-            password_hash=get_password_hash(user_data.password)
+            password_hash=await get_password_hasher().hash(user_data.password)
         )
         self.db.add(user)
         await self.db.commit()
@@ -49,7 +50,16 @@ class AuthService:
         )
         user = result.scalar_one_or_none()
         
-        if not user or not verify_password(login_data.password, user.password_hash):
+        if not user:
+            return None
+        
+        async def store_rehash(new_hash: str) -> None:
+            # リクエストのセッションは終了済みのため別セッションで保存
+            await _store_password_hash(user.id, new_hash)
+        
+        if not await get_password_hasher().verify_and_update(
+            login_data.password, user.password_hash, on_rehash=store_rehash
+        ):
             return None
         
         # トークン生成
@@ -121,8 +131,19 @@ class AuthService:
         user = result.scalar_one_or_none()
         
         if user:
-            user.password_hash = get_password_hash(new_password)
+            user.password_hash = await get_password_hasher().hash(new_password)
             user.updated_at = datetime.utcnow()
             await self.db.commit()
             return True
-        return False
\ No newline at end of file
+        return False
+
+async def _store_password_hash(user_id: str, password_hash: str) -> None:
+    """再ハッシュ結果の保存（バックグラウンド実行）"""
+    from .. import database
+    if database.AsyncSessionLocal is None:
+        return
+    async with database.AsyncSessionLocal() as session:
+        await session.execute(
+            update(User).where(User.id == user_id).values(password_hash=password_hash)
+        )
+        await session.commit()
@@ -0,0 +1,63 @@
+"""
+パスワード認証
+ユーザーをメールアドレスで引き、専用プールでパスワードを検証する
+
+- 検証は PasswordHasher.verify_and_update を通す（受付制御と透過的な再ハッシュ）
+- 再ハッシュ結果はレスポンス後に別セッションで保存する（リクエストのセッションは終了済み）
+- 無効化・ロック中のユーザーは、パスワードが正しくても認証しない
+"""
+
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from ...models.user import User
+from .password_hasher import get_password_hasher
+
+logger = structlog.get_logger()
+
+async def store_password_hash(user_id: str, password_hash: str) -> None:
+    """再ハッシュ結果の保存（バックグラウンド実行）"""
+    from .. import database
+    if database.AsyncSessionLocal is None:
+        return
+    async with database.AsyncSessionLocal() as session:
+        await session.execute(
+            update(User).where(User.id == user_id).values(password_hash=password_hash)
+        )
+        await session.commit()
+
+async def find_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """メールアドレスでユーザーを取得"""
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+async def verify_user_password(user: User, password: str) -> bool:
+    """
+    ユーザーのパスワードを検証
+
+    Raises:
+        PasswordHasherBusy: ハッシュ処理の受付上限超過
+    """
+    user_id = user.id
+
+    async def store_rehash(new_hash: str) -> None:
+        await store_password_hash(user_id, new_hash)
+
+    valid = await get_password_hasher().verify_and_update(
+        password, user.password_hash, on_rehash=store_rehash
+    )
+    if not valid:
+        return False
+    if not user.is_active or user.is_locked():
+        logger.info("Login rejected for inactive or locked user", user_id=user_id)
+        return False
+    return True
+
+__all__ = [
+    'find_user_by_email',
+    'store_password_hash',
+    'verify_user_password',
+]
@@ -0,0 +1,173 @@
+"""
+ユーザーID解決キャッシュ
+認証済みリクエストごとのDBセッション取得とクエリを避けるため、
+ユーザーレコード（ロール・有効状態）をプロセス内に短いTTLで保持する
+
+- 無効化はバージョン付きで Redis Pub/Sub により全ワーカーへ伝播する
+- 読み込み中に無効化された場合、読み込み結果はキャッシュしない
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from cachetools import TTLCache
+import structlog
+
+from ...monitoring.metrics import MetricsCollector
+
+logger = structlog.get_logger()
+
+INVALIDATION_CHANNEL = "auth:user-invalidations"
+
+class UserRecord:
+    """キャッシュするユーザー情報（認可に必要な項目のみ）"""
+    __slots__ = ("user_id", "username", "email", "roles", "is_active")
+
+    def __init__(self, user_id: str, username: str, email: str, roles: List[str], is_active: bool):
+        self.user_id = user_id
+        self.username = username
+        self.email = email
+        self.roles = roles
+        self.is_active = is_active
+
+Loader = Callable[[str], Awaitable[Optional[UserRecord]]]
+
+class UserIdentityCache:
+    """ユーザーレコードのプロセス内キャッシュ（Pub/Sub でバージョン付き無効化）"""
+
+    def __init__(self, ttl_seconds: int = 30, maxsize: int = 10000):
+        """
+        Args:
+            ttl_seconds: レコードの保持期間（秒）
+            maxsize: 最大保持件数
+        """
+        # user_id -> UserRecord | None（未登録ユーザーも短期間キャッシュ）
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl_seconds)
+        # user_id -> 最後に観測した無効化バージョン
+        self._versions: Dict[str, int] = {}
+        self._maxsize = maxsize
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self, user_id: str, loader: Loader) -> Optional[UserRecord]:
+        """キャッシュから取得し、無ければ loader で読み込む（失敗時は None）"""
+        if user_id in self._entries:
+            MetricsCollector.record_auth_identity_cache("user", True)
+            return self._entries[user_id]
+        MetricsCollector.record_auth_identity_cache("user", False)
+
+        version = self._versions.get(user_id, 0)
+        try:
+            record = await loader(user_id)
+        except Exception as e:
+            logger.warning("User record load failed", user_id=user_id, error=str(e))
+            return None
+        # 読み込み中に無効化が届いた場合は古い可能性があるため保持しない
+        if self._versions.get(user_id, 0) == version:
+            self._entries[user_id] = record
+        return record
+
+    def invalidate(self, user_id: str, version: Optional[int] = None) -> None:
+        """ローカルのレコードを破棄"""
+        self._entries.pop(user_id, None)
+        current = self._versions.get(user_id, 0)
+        self._versions[user_id] = max(current + 1, version or 0)
+        if len(self._versions) > self._maxsize:
+            # 進行中の読み込み以外には影響しないため丸ごと破棄
+            self._versions = {user_id: self._versions[user_id]}
+
+    async def publish_invalidation(self, redis, user_id: str) -> None:
+        """ユーザーの無効化（無効化・ロール変更時）を全ワーカーへ通知"""
+        if redis is None:
+            self.invalidate(user_id)
+            return
+        version = await redis.incr(f"auth:user:{user_id}:version")
+        self.invalidate(user_id, version)
+        await redis.publish(INVALIDATION_CHANNEL, f"{user_id} {version}")
+
+    def _handle_message(self, data) -> None:
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        user_id, _, version = str(data).partition(" ")
+        if user_id:
+            self.invalidate(user_id, int(version) if version.isdigit() else None)
+
+    async def _run(self, redis) -> None:
+        """無効化チャネルの購読ループ（切断時は全破棄して再購読）"""
+        backoff = 1.0
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # 切断中の通知を取りこぼしている可能性があるため破棄
+                self._entries.clear()
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._handle_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("User invalidation subscriber disconnected", error=str(e))
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    def start(self, redis) -> None:
+        """購読タスクを開始（多重起動しない）"""
+        if redis is None or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run(redis))
+
+    async def stop(self) -> None:
+        """購読タスクを停止"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+_identity_cache: Optional[UserIdentityCache] = None
+
+def get_user_identity_cache() -> UserIdentityCache:
+    """プロセス共有のユーザーID解決キャッシュを取得（設定値から初期化）"""
+    global _identity_cache
+    if _identity_cache is None:
+        from ...core.config import settings
+        _identity_cache = UserIdentityCache(
+            ttl_seconds=settings.auth_user_cache_ttl_seconds,
+            maxsize=settings.auth_user_cache_size,
+        )
+    return _identity_cache
+
+async def load_user_record(user_id: str) -> Optional[UserRecord]:
+    """DBからユーザーレコードを読み込む（キャッシュミス時のみ）"""
+    from ...services import database
+    session_factory = database.AsyncSessionLocal
+    if session_factory is None:
+        return None
+    from ...models.user import User
+    async with session_factory() as session:
+        user = await session.get(User, user_id)
+        if user is None:
+            return None
+        return UserRecord(
+            user_id=user.id,
+            username=user.username,
+            email=user.email,
+            roles=[user.role] if user.role else [],
+            is_active=bool(user.is_active),
+        )
+
+__all__ = [
+    'UserRecord',
+    'UserIdentityCache',
+    'get_user_identity_cache',
+    'load_user_record',
+    'INVALIDATION_CHANNEL',
+]
@@ -2,6 +2,7 @@
 JTI Revocation Store
 - Access トークンの JTI を無効化（ブラックリスト）するためのストア
 - 本番では Redis、開発ではメモリフォールバック
+- 失効チェックはワーカー内レプリカ（revocation_replica）で完結し、同期前のみ Redis を参照
 """
 
 from __future__ import annotations
@@ -11,6 +12,7 @@ from typing import Optional
 
 from ...services.database import get_redis
 from ...core.config import settings
+from .revocation_replica import get_revocation_replica
 
 
 class JTIRevocationStore:
@@ -18,8 +20,8 @@ class JTIRevocationStore:
 
     def __init__(self) -> None:
         self.redis = get_redis()
-        # メモリフォールバック: jti -> expiry_epoch_seconds
-        self._memory_revoked: dict[str, float] = {}
+        # ワーカー内レプリカ（Redis 不在時はメモリフォールバックを兼ねる）
+        self.replica = get_revocation_replica("jwt")
 
     def _key(self, jti: str) -> str:
         return f"auth:revoked_jti:{jti}"
@@ -27,11 +29,11 @@ class JTIRevocationStore:
     def _now(self) -> float:
         return time.time()
 
-    def _cleanup_memory(self) -> None:
-        now = self._now()
-        expired = [j for j, exp in self._memory_revoked.items() if exp <= now]
-        for j in expired:
-            self._memory_revoked.pop(j, None)
+    def _get_redis(self):
+        # 起動前に生成された場合に備え、接続は遅延取得する
+        if self.redis is None:
+            self.redis = get_redis()
+        return self.redis
 
     async def revoke_jti(self, jti: Optional[str], *, exp_epoch: Optional[int] = None, ttl_seconds: Optional[int] = None) -> bool:
         """
@@ -55,10 +57,13 @@ class JTIRevocationStore:
             # デフォルト 1 時間
             ttl = 3600
 
-        if self.redis:
+        redis = self._get_redis()
+        if redis:
             try:
                 # 値は簡易（監査は別途）
-                await self.redis.setex(self._key(jti), ttl, "revoked")
+                await redis.setex(self._key(jti), ttl, "revoked")
+                # 全ワーカーのレプリカへ通知
+                await self.replica.publish(redis, jti, now + ttl)
                 return True
             except Exception:
                 # フォールバックに切り替え
@@ -68,8 +73,7 @@ class JTIRevocationStore:
         if settings.is_production():
             # 本番で Redis 不在時は失敗とする
             return False
-        self._memory_revoked[jti] = now + ttl
-        self._cleanup_memory()
+        self.replica.add(jti, now + ttl)
         return True
 
     async def is_revoked(self, jti: Optional[str]) -> bool:
@@ -77,19 +81,33 @@ class JTIRevocationStore:
         if not jti:
             return False
 
-        if self.redis:
+        # レプリカ同期済みならメモリ内参照のみ
+        if self.replica.ready:
+            return self.replica.is_revoked(jti)
+
+        redis = self._get_redis()
+        if redis:
             try:
-                exists = await self.redis.exists(self._key(jti))
+                exists = await redis.exists(self._key(jti))
                 # redis-py returns int count
-                return bool(exists)
+                return bool(exists) or self.replica.is_revoked(jti)
             except Exception:
                 # fall back to memory
-                pass
+                if settings.is_production():
+                    raise
 
         # メモリフォールバック
-        self._cleanup_memory()
-        return jti in self._memory_revoked
+        return self.replica.is_revoked(jti)
+
+
+_store: Optional[JTIRevocationStore] = None
 
+def get_jti_revocation_store() -> JTIRevocationStore:
+    """プロセス共有の失効ストアを取得"""
+    global _store
+    if _store is None:
+        _store = JTIRevocationStore()
+    return _store
 
-__all__ = ["JTIRevocationStore"]
 
+__all__ = ["JTIRevocationStore", "get_jti_revocation_store"]
@@ -0,0 +1,211 @@
+"""
+LPR signing keyring
+Keys are loaded once per process (file / env / Vault) and parsed into key
+objects up front, so signing and verification never re-parse PEMs.
+
+- Several keys can be active for verification at once; tokens select theirs
+  by the "kid" header, which allows rotation without invalidating tokens
+- The active key signs new tokens; ES256 is preferred over RS256 for speed
+  and token size (python-jose has no EdDSA support)
+
+Keyring document format (file, LPR_KEYRING_JSON or Vault secret "lpr/keyring"):
+    {"active_kid": "2024-06",
+     "keys": [{"kid": "2024-06", "alg": "ES256", "private_key": "<PEM>"},
+              {"kid": "2024-01", "alg": "RS256", "public_key": "<PEM>"}]}
+"""
+
+import json
+import hashlib
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+import structlog
+
+from ...core.config import settings
+
+logger = structlog.get_logger()
+
+SUPPORTED_ALGORITHMS = ("ES256", "ES384", "RS256", "RS384", "RS512")
+
+class KeyringError(ValueError):
+    """Raised when the keyring cannot be loaded or used"""
+
+class KeyEntry:
+    """One keyring key with its parsed signing / verifying key objects"""
+    __slots__ = ("kid", "algorithm", "signing_key", "verifying_key")
+
+    def __init__(self, kid: str, algorithm: str, signing_key: Optional[Key], verifying_key: Key):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+
+    @classmethod
+    def from_pem(
+        cls,
+        kid: str,
+        algorithm: str,
+        private_key: Optional[str] = None,
+        public_key: Optional[str] = None
+    ) -> "KeyEntry":
+        """Parse PEM material once; the public key is derived when omitted"""
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise KeyringError(f"Unsupported LPR signing algorithm: {algorithm}")
+        if not private_key and not public_key:
+            raise KeyringError(f"Key {kid} has no key material")
+        signing = jwk.construct(private_key, algorithm) if private_key else None
+        if not public_key:
+            parsed = serialization.load_pem_private_key(private_key.encode(), password=None)
+            public_key = parsed.public_key().public_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PublicFormat.SubjectPublicKeyInfo
+            ).decode()
+        return cls(kid, algorithm, signing, jwk.construct(public_key, algorithm))
+
+class Keyring:
+    """Active signing key plus every key accepted for verification"""
+
+    def __init__(self, entries: List[KeyEntry], active_kid: Optional[str] = None):
+        if not entries:
+            raise KeyringError("Keyring is empty")
+        self._entries: Dict[str, KeyEntry] = {e.kid: e for e in entries}
+        active_kid = active_kid or entries[0].kid
+        active = self._entries.get(active_kid)
+        if active is None or active.signing_key is None:
+            raise KeyringError(f"Active key {active_kid} is missing or has no private key")
+        self.active = active
+
+    @property
+    def kid(self) -> str:
+        return self.active.kid
+
+    @property
+    def kids(self) -> List[str]:
+        return list(self._entries)
+
+    def get(self, kid: str) -> Optional[KeyEntry]:
+        return self._entries.get(kid)
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        """Sign claims with the active key, stamping its kid"""
+        return jwt.encode(
+            claims,
+            self.active.signing_key,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid}
+        )
+
+    def verify(self, token: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Verify with the key named by the token's kid (only its algorithm is accepted)"""
+        kid = jwt.get_unverified_header(token).get("kid")
+        entry = self._entries.get(kid) if kid else None
+        if entry is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, entry.verifying_key, algorithms=[entry.algorithm], options=options)
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "Keyring":
+        """Build a keyring from the JSON document format"""
+        keys = document.get("keys")
+        if isinstance(keys, str):
+            # Flat secret stores (Vault KV) hold the key list as a JSON string
+            keys = json.loads(keys)
+        try:
+            entries = [
+                KeyEntry.from_pem(
+                    kid=item["kid"],
+                    algorithm=item.get("alg", "ES256"),
+                    private_key=item.get("private_key"),
+                    public_key=item.get("public_key"),
+                )
+                for item in keys
+            ]
+        except (KeyError, TypeError) as e:
+            raise KeyringError(f"Malformed keyring document: {e}")
+        return cls(entries, document.get("active_kid"))
+
+def generate_document(algorithm: str = "ES256") -> Dict[str, Any]:
+    """Generate a single-key keyring document (development only)"""
+    if algorithm.startswith("ES"):
+        curve = ec.SECP256R1() if algorithm == "ES256" else ec.SECP384R1()
+        private_key = ec.generate_private_key(curve)
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode()
+    kid = hashlib.sha256(pem.encode()).hexdigest()[:16]
+    return {"active_kid": kid, "keys": [{"kid": kid, "alg": algorithm, "private_key": pem}]}
+
+def _configured_document() -> Optional[Dict[str, Any]]:
+    """Keyring document from file, env, or the legacy JWT key pair"""
+    if settings.lpr_keyring_file:
+        with open(settings.lpr_keyring_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if settings.lpr_keyring_json:
+        return json.loads(settings.lpr_keyring_json.get_secret_value())
+    if settings.jwt_private_key:
+        return {"keys": [{
+            "kid": hashlib.sha256(settings.jwt_private_key.encode()).hexdigest()[:16],
+            "alg": "RS256",
+            "private_key": settings.jwt_private_key,
+        }]}
+    return None
+
+def _development_document() -> Dict[str, Any]:
+    """Generate once per host so every local worker shares the same key"""
+    path = os.path.join(tempfile.gettempdir(), "shodo-lpr-keyring.json")
+    if not os.path.exists(path):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(generate_document(settings.lpr_signing_algorithm), f)
+        try:
+            # Atomic publish: the first worker wins, the rest read its key
+            os.link(tmp_path, path)
+            logger.warning("Generated development LPR keyring", path=path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_keyring() -> Keyring:
+    """Load the keyring from local sources (file / env / development key)"""
+    document = _configured_document()
+    if document is None:
+        if settings.is_production():
+            raise KeyringError("LPR keyring is not configured")
+        document = _development_document()
+    return Keyring.from_document(document)
+
+_keyring: Optional[Keyring] = None
+
+async def get_keyring() -> Keyring:
+    """Process-wide keyring; production without local sources reads Vault"""
+    global _keyring
+    if _keyring is None:
+        document = _configured_document()
+        if document is None and settings.is_production():
+            from ..secrets.vault_client import get_vault_client
+            vault = await get_vault_client()
+            document = await vault.get_secret("lpr/keyring", use_cache=False)
+        _keyring = Keyring.from_document(document) if document else load_keyring()
+        logger.info("LPR keyring loaded", active_kid=_keyring.kid, kids=_keyring.kids)
+    return _keyring
+
+__all__ = [
+    'KeyEntry',
+    'Keyring',
+    'KeyringError',
+    'generate_document',
+    'load_keyring',
+    'get_keyring',
+]
@@ -0,0 +1,167 @@
+"""
+パスワードハッシュのオフロード
+bcrypt の計算（12ラウンドで約250ms）をイベントループ外の専用スレッドプールで実行する
+
+- bcrypt はハッシュ計算中に GIL を解放するため、プロセスプールではなくスレッドプールで十分
+- 待機数に上限を設け、超過時は即座に 503 を返す（ログイン集中で他のルートを枯渇させない）
+- キュー待ちが上限を超えた要求は計算せずに破棄する
+- パラメータ更新（deprecated="auto"）による再ハッシュはレスポンス後にバックグラウンドで行う
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Set
+
+from passlib.context import CryptContext
+import structlog
+
+from ...core.exceptions import ServiceUnavailableException
+from ...monitoring.metrics import MetricsCollector
+
+logger = structlog.get_logger()
+
+RehashCallback = Callable[[str], Awaitable[None]]
+
+class PasswordHasherBusy(ServiceUnavailableException):
+    """ハッシュ処理の受付上限超過"""
+    detail = "Authentication service is busy, please retry"
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(headers={"Retry-After": str(retry_after)})
+
+class PasswordHasher:
+    """専用スレッドプールでパスワードのハッシュ・検証を行う"""
+
+    def __init__(
+        self,
+        context: CryptContext,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        queue_timeout: float = 5.0
+    ):
+        """
+        Args:
+            context: passlib の CryptContext
+            max_workers: ハッシュ計算スレッド数
+            max_pending: 実行中 + キュー待ちの上限（超過分は即時拒否）
+            queue_timeout: キュー待ちの上限秒数（超過分は計算せず拒否）
+        """
+        self.context = context
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pwhash")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._rehash_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def _submit(self, op: str, fn: Callable, *args, limit: Optional[int] = None):
+        """受付制御付きでプールに投入"""
+        if self._pending >= (limit or self.max_pending):
+            MetricsCollector.record_password_hash_rejected(op, "admission")
+            raise PasswordHasherBusy()
+
+        submitted = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            wait = started - submitted
+            if wait > self.queue_timeout:
+                return None, wait, 0.0, True
+            result = fn(*args)
+            return result, wait, time.perf_counter() - started, False
+
+        # 枠はスレッドの完了時に戻す（待機側がキャンセルされても計算中は枠を占有したまま）
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(run)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        result, wait, duration, expired = await asyncio.wrap_future(future)
+
+        if expired:
+            MetricsCollector.record_password_hash_rejected(op, "queue_timeout")
+            raise PasswordHasherBusy()
+        MetricsCollector.record_password_hash(op, wait, duration)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """パスワードをハッシュ化"""
+        return await self._submit("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """パスワードを検証"""
+        return await self._submit("verify", self.context.verify, password, hashed)
+
+    async def verify_and_update(
+        self,
+        password: str,
+        hashed: str,
+        on_rehash: Optional[RehashCallback] = None
+    ) -> bool:
+        """
+        パスワードを検証し、ハッシュのパラメータが古ければ再ハッシュを予約
+
+        再ハッシュはレスポンスを待たせないようバックグラウンドで実行し、
+        結果は on_rehash に渡す（保存は呼び出し側の責務）
+        """
+        valid = await self.verify(password, hashed)
+        if valid and on_rehash is not None and self.context.needs_update(hashed):
+            task = asyncio.create_task(self._rehash(password, on_rehash))
+            self._rehash_tasks.add(task)
+            task.add_done_callback(self._rehash_tasks.discard)
+        return valid
+
+    async def _rehash(self, password: str, on_rehash: RehashCallback) -> None:
+        """再ハッシュ（混雑時は見送り、次回ログインで再試行）"""
+        try:
+            new_hash = await self._submit(
+                "rehash", self.context.hash, password,
+                limit=max(1, self.max_pending // 2)
+            )
+            await on_rehash(new_hash)
+        except PasswordHasherBusy:
+            logger.debug("Password rehash deferred under load")
+        except Exception as e:
+            logger.warning("Password rehash failed", error=str(e))
+
+    async def close(self) -> None:
+        """保留中の再ハッシュを待ってプールを停止"""
+        if self._rehash_tasks:
+            await asyncio.gather(*self._rehash_tasks, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+_password_hasher: Optional[PasswordHasher] = None
+
+def get_password_hasher() -> PasswordHasher:
+    """プロセス共有のパスワードハッシャーを取得（設定値から初期化）"""
+    global _password_hasher
+    if _password_hasher is None:
+        from ...core.config import settings
+        from ...core.security import pwd_context
+        _password_hasher = PasswordHasher(
+            pwd_context,
+            max_workers=settings.password_hash_workers,
+            max_pending=settings.password_hash_max_pending,
+            queue_timeout=settings.password_hash_queue_timeout_seconds,
+        )
+    return _password_hasher
+
+__all__ = [
+    'PasswordHasher',
+    'PasswordHasherBusy',
+    'get_password_hasher',
+]
@@ -1,6 +1,12 @@
 """
 リフレッシュトークン管理
 Redisに保存し、ローテーションと失効を提供
+
+- ローテーションは旧トークンを読み、新しいペイロードを組み立てた上で、
+  旧トークンの削除 → 新トークン作成 → ユーザー集合更新を Lua スクリプトで原子的に実行する。
+  スクリプトは旧トークンの値が読み取り時のままの場合だけ入れ替えるため、同時リフレッシュは二重成功しない
+- 全端末ログアウトはユーザー集合を読み、トークンキーの削除をパイプラインでまとめて送る
+- ローテーションのスクリプトは別スロットのキーを同時に触るため、Redis Cluster では動作しない
 """
 
 from __future__ import annotations
@@ -14,20 +20,43 @@ from ...core.config import settings
 from ...services.database import get_redis
 from ...core.security import SecureTokenGenerator
 
+# KEYS: 旧トークンキー, 新トークンキー, ユーザー集合キー
+# ARGV: 読み取った旧トークンの値, 旧トークン, 新トークン, TTL秒, 新トークンの値
+# 旧トークンの値が読み取り時から変わっていなければ（= 未使用なら）入れ替える。
+# トークンキーとユーザー集合は別スロットになり得るため Redis Cluster には対応しない（単一ノード / Sentinel 前提）
+_ROTATE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[3], ARGV[2])
+redis.call('SETEX', KEYS[2], ARGV[4], ARGV[5])
+redis.call('SADD', KEYS[3], ARGV[3])
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+return 1
+"""
+
+# 全端末ログアウトで1回のパイプラインに載せるトークン数
+REVOKE_BATCH_SIZE = 1000
+
 
 class RefreshTokenManager:
     """Refresh Token storage backed by Redis."""
 
+    KEY_PREFIX = "auth:refresh:"
+    USER_SET_PREFIX = "auth:refresh_user:"
+
     def __init__(self):
         self.redis = get_redis()
         self.ttl_seconds = int(settings.refresh_token_ttl_days) * 24 * 3600
         self.cookie_name = settings.refresh_cookie_name
+        self._rotate_script = self.redis.register_script(_ROTATE_SCRIPT) if self.redis else None
 
     def _key(self, token: str) -> str:
-        return f"auth:refresh:{token}"
+        return f"{self.KEY_PREFIX}{token}"
 
     def _user_set_key(self, user_id: str) -> str:
-        return f"auth:refresh_user:{user_id}"
+        return f"{self.USER_SET_PREFIX}{user_id}"
 
     async def generate(
         self,
@@ -56,8 +85,12 @@ class RefreshTokenManager:
         }
 
         if self.redis:
-            await self.redis.setex(self._key(token), self.ttl_seconds, json.dumps(payload))
-            await self.redis.sadd(self._user_set_key(user_id), token)
+            # 保存とユーザー集合への登録を1往復で実行
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.setex(self._key(token), self.ttl_seconds, json.dumps(payload))
+            pipe.sadd(self._user_set_key(user_id), token)
+            pipe.expire(self._user_set_key(user_id), self.ttl_seconds)
+            await pipe.execute()
         return token
 
     async def validate(self, token: str) -> Optional[Dict[str, Any]]:
@@ -81,38 +114,59 @@ class RefreshTokenManager:
             return None
 
     async def rotate(self, token: str) -> Optional[tuple[str, Dict[str, Any]]]:
-        """Rotate refresh token and return (new_token, payload)."""
-        payload = await self.validate(token)
-        if not payload:
+        """Rotate refresh token atomically and return (new_token, payload)."""
+        if not token or not self.redis:
+            return None
+        data = await self.redis.get(self._key(token))
+        if not data:
+            return None
+        try:
+            payload = json.loads(data)
+            user_id = payload["user_id"]
+            expired = bool(payload.get("expires_at")) and (
+                datetime.fromisoformat(payload["expires_at"]) < datetime.now(timezone.utc)
+            )
+        except Exception:
             return None
-        # Invalidate old token
-        await self.revoke(token, payload.get("user_id"))
-        # Issue new token with same principal
-        new_token = await self.generate(
-            user_id=payload["user_id"],
-            username=payload.get("username") or f"user_{payload['user_id']}",
-            roles=payload.get("roles") or ["user"],
-            device_id=payload.get("device_id"),
-            session_id=payload.get("session_id"),
+        if expired:
+            await self.revoke(token, user_id)
+            return None
+
+        new_token = SecureTokenGenerator.generate_token(48)
+        now = datetime.now(timezone.utc)
+        payload.update(
+            issued_at=now.isoformat(),
+            expires_at=(now + timedelta(seconds=self.ttl_seconds)).isoformat(),
+            version=int(payload.get("version") or 1) + 1,
+        )
+        swapped = await self._rotate_script(
+            keys=[self._key(token), self._key(new_token), self._user_set_key(user_id)],
+            args=[data, token, new_token, self.ttl_seconds, json.dumps(payload)],
         )
-        new_payload = await self.validate(new_token)
-        return new_token, new_payload or {}
+        if not swapped:
+            # 同時リフレッシュで既に使用済み（または失効済み）
+            return None
+        return new_token, payload
 
     async def revoke(self, token: str, user_id: Optional[str] = None):
         if not self.redis:
             return
-        await self.redis.delete(self._key(token))
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self._key(token))
         if user_id:
-            await self.redis.srem(self._user_set_key(user_id), token)
+            pipe.srem(self._user_set_key(user_id), token)
+        await pipe.execute()
 
     async def revoke_all_for_user(self, user_id: str) -> int:
         if not self.redis:
             return 0
-        tokens = await self.redis.smembers(self._user_set_key(user_id))
-        count = 0
-        for t in tokens:
-            await self.redis.delete(self._key(t))
-            count += 1
-        await self.redis.delete(self._user_set_key(user_id))
-        return count
-
+        user_set = self._user_set_key(user_id)
+        tokens = list(await self.redis.smembers(user_set))
+        # 集合は読んだトークンだけ外す（その間に発行されたトークンは集合に残す）
+        for i in range(0, len(tokens), REVOKE_BATCH_SIZE):
+            batch = tokens[i:i + REVOKE_BATCH_SIZE]
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(*(self._key(t.decode() if isinstance(t, bytes) else t) for t in batch))
+            pipe.srem(user_set, *batch)
+            await pipe.execute()
+        return len(tokens)
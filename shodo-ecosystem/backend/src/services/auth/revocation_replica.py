@@ -0,0 +1,307 @@
+"""
+失効リストのワーカー内レプリカ
+Redis の失効キーを起動時に取り込み、Pub/Sub で差分を受け取り続けることで
+認証リクエストごとの失効チェックをメモリ内の参照だけで完結させる
+
+- 否定（未失効）判定は Bloom フィルタで高速に返す
+- 肯定候補は正確な集合（jti -> exp）で確認し、exp を過ぎたものは失効扱いしない
+- Pub/Sub 切断中は ready=False となり、呼び出し側は Redis 直参照へフォールバックする
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from typing import Dict, List, Optional
+
+import structlog
+
+from ...utils.expiring_map import ExpiringMap
+
+logger = structlog.get_logger()
+
+class BloomFilter:
+    """固定長ビット配列の Bloom フィルタ（偽陽性のみ・偽陰性なし）"""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: 想定要素数
+            error_rate: 想定要素数における偽陽性率
+        """
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        """キーに対応するビット位置（ダブルハッシング）"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+class RevocationReplica:
+    """Redis 失効キーのローカルレプリカ（Pub/Sub で同期）"""
+
+    def __init__(
+        self,
+        name: str,
+        key_prefix: str,
+        channel: str,
+        capacity: int = 100000,
+        error_rate: float = 0.001,
+        resync_interval: float = 300.0
+    ):
+        """
+        Args:
+            name: レプリカ名（メトリクス/ログ用）
+            key_prefix: 失効キーのプレフィックス（例: "lpr:revoked:"）
+            channel: 失効通知の Pub/Sub チャネル
+            capacity: Bloom フィルタの想定要素数
+            error_rate: Bloom フィルタの偽陽性率
+            resync_interval: 取りこぼし対策の全量再同期間隔（秒）
+        """
+        self.name = name
+        self.key_prefix = key_prefix
+        self.channel = channel
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.resync_interval = resync_interval
+        # jti -> exp（Epoch秒、期限順のヒープで管理）
+        self._revoked: ExpiringMap[str, float] = ExpiringMap(clock=self._now)
+        self._bloom = BloomFilter(capacity, error_rate)
+        # Bloom に残っているが集合から消えた要素数（再構築の判断に使用）
+        self._stale = 0
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    def _now(self) -> float:
+        return time.time()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    # === ローカル参照/更新 ===
+
+    def add(self, jti: str, exp_ts: float) -> None:
+        """失効をローカルに登録（exp は既存より長い方を採用）"""
+        if not jti or exp_ts <= self._now():
+            return
+        current = self._revoked.expires_at(jti)
+        if current is None:
+            self._revoked.set(jti, exp_ts, exp_ts)
+            self._bloom.add(jti)
+            if len(self._revoked) + self._stale > self.capacity:
+                self._rebuild()
+        elif exp_ts > current:
+            self._revoked.set(jti, exp_ts, exp_ts)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """JTI が失効済みかをメモリ内で判定"""
+        if not jti or jti not in self._bloom:
+            return False
+        # 期限切れの記録は不要（削除は purge_expired でまとめて行う）
+        return jti in self._revoked
+
+    def purge_expired(self) -> int:
+        """期限切れの失効記録を削除し、必要なら Bloom を再構築"""
+        expired = self._revoked.purge()
+        self._stale += len(expired)
+        if self._stale > max(len(self._revoked), 1024):
+            self._rebuild()
+        return len(expired)
+
+    def _rebuild(self) -> None:
+        """現集合から Bloom フィルタを作り直す（削除済み要素の偽陽性を解消）"""
+        self._revoked.purge()
+        # 想定要素数を超えた場合は容量を拡張して偽陽性率を維持
+        while len(self._revoked) * 2 > self.capacity:
+            self.capacity *= 2
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._stale = 0
+
+    def _replace(self, revoked: Dict[str, float]) -> None:
+        """全量同期結果で置き換え（同期中に届いた通知も保持）"""
+        for jti, exp_ts, _ in self._revoked.items():
+            if revoked.get(jti, 0) < exp_ts:
+                revoked[jti] = exp_ts
+        merged: ExpiringMap[str, float] = ExpiringMap(clock=self._now)
+        for jti, exp_ts in revoked.items():
+            merged.set(jti, exp_ts, exp_ts)
+        self._revoked = merged
+        self._rebuild()
+
+    # === Redis 同期 ===
+
+    async def bootstrap(self, redis, batch_size: int = 500) -> int:
+        """Redis の失効キーを SCAN で取り込み、ローカル集合を置き換える"""
+        revoked: Dict[str, float] = {}
+        prefix_len = len(self.key_prefix)
+        batch: List[str] = []
+
+        async def load(keys: List[str]) -> None:
+            pipe = redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.pttl(key)
+            now = self._now()
+            for key, pttl in zip(keys, await pipe.execute()):
+                # -2: 既に消滅, -1: TTLなし（exp 不明のため既定1時間）
+                if pttl is None or pttl == -2:
+                    continue
+                ttl = 3600.0 if pttl < 0 else pttl / 1000.0
+                if isinstance(key, bytes):
+                    key = key.decode("utf-8")
+                revoked[key[prefix_len:]] = now + ttl
+
+        async for key in redis.scan_iter(match=f"{self.key_prefix}*", count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                await load(batch)
+                batch = []
+        if batch:
+            await load(batch)
+
+        self._replace(revoked)
+        logger.info("Revocation replica synchronized", replica=self.name, entries=len(self._revoked))
+        return len(self._revoked)
+
+    @staticmethod
+    def encode(jti: str, exp_ts: float) -> str:
+        """Pub/Sub 通知メッセージ（パイプラインでまとめて送る場合にも使用）"""
+        return f"{jti} {int(exp_ts)}"
+
+    async def publish(self, redis, jti: str, exp_ts: float) -> None:
+        """失効をローカルへ即時反映し、他ワーカーへ通知"""
+        self.add(jti, exp_ts)
+        if redis is None:
+            return
+        try:
+            await redis.publish(self.channel, self.encode(jti, exp_ts))
+        except Exception as e:
+            # 他ワーカーは次回の再同期で取り込む
+            logger.warning("Revocation publish failed", replica=self.name, jti=jti, error=str(e))
+
+    def _handle_message(self, data) -> None:
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        jti, _, exp = str(data).partition(" ")
+        try:
+            exp_ts = float(exp) if exp else self._now() + 3600
+        except ValueError:
+            return
+        self.add(jti, exp_ts)
+
+    async def _run(self, redis) -> None:
+        """購読→全量同期→差分適用のループ（切断時は再接続して再同期）"""
+        backoff = 1.0
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                # 取りこぼしを防ぐため購読開始後に全量同期する
+                await pubsub.subscribe(self.channel)
+                await self.bootstrap(redis)
+                self.ready = True
+                backoff = 1.0
+                next_resync = self._now() + self.resync_interval
+                next_purge = self._now() + 60.0
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._handle_message(message.get("data"))
+                    if self._now() >= next_resync:
+                        await self.bootstrap(redis)
+                        next_resync = self._now() + self.resync_interval
+                    elif self._now() >= next_purge:
+                        self.purge_expired()
+                        next_purge = self._now() + 60.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.ready = False
+                logger.warning("Revocation replica disconnected", replica=self.name, error=str(e))
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    def start(self, redis) -> None:
+        """同期タスクを開始（多重起動しない）"""
+        if redis is None or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run(redis))
+
+    async def stop(self) -> None:
+        """同期タスクを停止"""
+        self.ready = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+# レプリカ定義: 名前 -> (キープレフィックス, Pub/Sub チャネル)
+REPLICA_SPECS = {
+    "lpr": ("lpr:revoked:", "lpr:revocations"),
+    "jwt": ("auth:revoked_jti:", "auth:revocations"),
+}
+
+_replicas: Dict[str, RevocationReplica] = {}
+
+def get_revocation_replica(name: str) -> RevocationReplica:
+    """名前付きレプリカのシングルトンを取得（設定値から初期化）"""
+    replica = _replicas.get(name)
+    if replica is None:
+        from ...core.config import settings
+        key_prefix, channel = REPLICA_SPECS[name]
+        replica = RevocationReplica(
+            name=name,
+            key_prefix=key_prefix,
+            channel=channel,
+            capacity=settings.revocation_bloom_capacity,
+            error_rate=settings.revocation_bloom_error_rate,
+            resync_interval=settings.revocation_resync_interval_seconds,
+        )
+        _replicas[name] = replica
+    return replica
+
+def start_revocation_replicas(redis) -> None:
+    """全レプリカの同期を開始（アプリ起動時）"""
+    from ...core.config import settings
+    if redis is None or not settings.revocation_replica_enabled:
+        return
+    for name in REPLICA_SPECS:
+        get_revocation_replica(name).start(redis)
+
+async def stop_revocation_replicas() -> None:
+    """全レプリカの同期を停止（シャットダウン時）"""
+    for replica in list(_replicas.values()):
+        await replica.stop()
+
+__all__ = [
+    'BloomFilter',
+    'RevocationReplica',
+    'get_revocation_replica',
+    'start_revocation_replicas',
+    'stop_revocation_replicas',
+]
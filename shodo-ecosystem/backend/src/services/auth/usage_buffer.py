@@ -0,0 +1,142 @@
+"""
+LPR 利用状況の write-behind バッファ
+検証成功ごとの最終利用時刻・利用回数を JTI 単位で集約し、
+一定時間ごと（または一定件数ごと）にパイプラインでまとめて Redis へ書き込む
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+class UsageWriteBehind:
+    """JTI 単位で利用状況を集約する write-behind バッファ"""
+
+    def __init__(self, flush_interval_ms: int = 500, max_entries: int = 1000):
+        """
+        Args:
+            flush_interval_ms: 最初の記録からフラッシュまでの最大遅延（ミリ秒）
+            max_entries: 即時フラッシュする集約 JTI 数
+        """
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_entries = max_entries
+        # jti -> [last_used_ts, count]
+        self._pending: Dict[str, List] = {}
+        self._redis = None
+        self._timer: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+
+    def _key(self, jti: str) -> str:
+        return f"lpr:token:{jti}:usage"
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, jti: str, redis, ts: Optional[float] = None) -> None:
+        """利用を記録（Redis へのI/Oは行わない）"""
+        if not jti or redis is None:
+            return
+        self._redis = redis
+        ts = ts or time.time()
+        entry = self._pending.get(jti)
+        if entry is None:
+            self._pending[jti] = [ts, 1]
+        else:
+            if ts > entry[0]:
+                entry[0] = ts
+            entry[1] += 1
+
+        if len(self._pending) >= self.max_entries:
+            self._schedule(0.0)
+        elif self._timer is None or self._timer.done():
+            self._schedule(self.flush_interval)
+
+    def _schedule(self, delay: float) -> None:
+        if delay == 0.0 and self._flushing is not None and not self._flushing.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # イベントループ外では次回の記録/シャットダウン時にフラッシュ
+            return
+        if delay == 0.0:
+            self._flushing = loop.create_task(self.flush())
+        else:
+            self._timer = loop.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    def _rearm(self) -> None:
+        """フラッシュ中に記録された分・繰り越した分のためにタイマーを張り直す"""
+        if not self._pending:
+            return
+        # フラッシュ中のタイマー自身は「実行中」に見えるため、張り直しを妨げない
+        if self._timer is None or self._timer.done() or self._timer is asyncio.current_task():
+            self._schedule(self.flush_interval)
+
+    async def flush(self) -> int:
+        """集約済みの利用状況をパイプラインで書き込み、書き込んだ JTI 数を返す"""
+        if not self._pending or self._redis is None:
+            return 0
+        batch, self._pending = self._pending, {}
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for jti, (last_used, count) in batch.items():
+                key = self._key(jti)
+                pipe.hset(
+                    key,
+                    "last_used",
+                    datetime.fromtimestamp(last_used, tz=timezone.utc).isoformat()
+                )
+                pipe.hincrby(key, "usage_count", count)
+            await pipe.execute()
+        except Exception as e:
+            # 失敗分は次回へ繰り越す（上限を超える場合は破棄）
+            logger.warning("LPR usage flush failed", entries=len(batch), error=str(e))
+            if len(self._pending) + len(batch) <= self.max_entries * 10:
+                for jti, (last_used, count) in batch.items():
+                    entry = self._pending.get(jti)
+                    if entry is None:
+                        self._pending[jti] = [last_used, count]
+                    else:
+                        entry[0] = max(entry[0], last_used)
+                        entry[1] += count
+            self._rearm()
+            return 0
+        self._rearm()
+        return len(batch)
+
+    async def close(self) -> None:
+        """タイマーを止めて残りをフラッシュ（シャットダウン時）"""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()
+        # 失敗分の再試行タイマーはシャットダウン後に残さない
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+
+_usage_buffer: Optional[UsageWriteBehind] = None
+
+def get_usage_buffer() -> UsageWriteBehind:
+    """プロセス共有の利用状況バッファを取得（設定値から初期化）"""
+    global _usage_buffer
+    if _usage_buffer is None:
+        from ...core.config import settings
+        _usage_buffer = UsageWriteBehind(
+            flush_interval_ms=settings.lpr_usage_flush_interval_ms,
+            max_entries=settings.lpr_usage_flush_max_entries,
+        )
+    return _usage_buffer
+
+__all__ = [
+    'UsageWriteBehind',
+    'get_usage_buffer',
+]
@@ -0,0 +1,65 @@
+"""
+ユーザー権限の管理
+ロール変更・有効/無効の切り替えを保存し、全ワーカーのユーザーID解決キャッシュを無効化する
+
+- 無効化はコミット後に通知する（先に通知すると他ワーカーが古い行を読み直してキャッシュし得る）
+- 通知に失敗しても変更は取り消さない（キャッシュは TTL で失効する）
+"""
+
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from ...models.user import User
+from ..database import get_redis
+from .identity_cache import get_user_identity_cache
+
+logger = structlog.get_logger()
+
+async def publish_user_change(user_id: str) -> None:
+    """ユーザーの変更を全ワーカーのキャッシュへ通知"""
+    try:
+        await get_user_identity_cache().publish_invalidation(get_redis(), user_id)
+    except Exception as e:
+        logger.warning("User invalidation publish failed", user_id=user_id, error=str(e))
+
+async def update_user_access(
+    db: AsyncSession,
+    user_id: str,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None
+) -> Optional[User]:
+    """
+    ロール・有効状態を更新
+
+    Args:
+        db: DBセッション
+        user_id: ユーザーID
+        role: 新しいロール（省略時は変更しない）
+        is_active: 有効状態（省略時は変更しない）
+
+    Returns:
+        更新後のユーザー（存在しなければ None）
+    """
+    user = await db.get(User, user_id)
+    if user is None:
+        return None
+    if role is not None:
+        user.role = role
+    if is_active is not None:
+        user.is_active = is_active
+    await db.commit()
+    await publish_user_change(user_id)
+    logger.info("User access updated", user_id=user_id, role=user.role, is_active=user.is_active)
+    return user
+
+async def deactivate_user(db: AsyncSession, user_id: str) -> bool:
+    """ユーザーを無効化"""
+    return await update_user_access(db, user_id, is_active=False) is not None
+
+__all__ = [
+    'deactivate_user',
+    'publish_user_change',
+    'update_user_access',
+]
@@ -0,0 +1,284 @@
+"""
+ストリーミングエクスポート
+行の非同期イテレーター（stream_resources / bulk_export）を CSV / NDJSON / XLSX へ逐次書き出す
+
+- 行はチャンク単位でスレッドへ渡して書き込み、保持するのは1チャンク分のみ（件数によらずメモリ一定）
+- CSV/XLSX の列は先頭のサンプル行から推定する（ネストした辞書はドット区切りの列に展開、
+  リストは JSON 文字列）。サンプル以降に現れた列は出力しない
+- CSV/NDJSON は gzip で逐次圧縮できる（チャンクごとに圧縮ストリームへ書き込む）
+- XLSX は openpyxl の write_only モード（行を保持しない）を使う
+- 出力先は ExportStorage（既定はローカルディスク。オブジェクトストアの代替として同じ操作を提供）
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+import structlog
+
+from ...core.config import settings
+
+logger = structlog.get_logger()
+
+try:
+    from openpyxl import Workbook
+    _XLSX_AVAILABLE = True
+except ImportError:
+    _XLSX_AVAILABLE = False
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "json": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+EXTENSIONS = {"csv": "csv", "json": "ndjson", "xlsx": "xlsx"}
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*$")
+
+ProgressCallback = Callable[[int], None]
+
+def flatten(row: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """ネストした辞書をドット区切りのキーに展開（リストは JSON 文字列）"""
+    flat: Dict[str, Any] = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            flat[name] = json.dumps(value, ensure_ascii=False, default=str)
+        else:
+            flat[name] = value
+    return flat
+
+def infer_columns(sample: List[Dict[str, Any]]) -> List[str]:
+    """サンプル行から列を推定（出現順）"""
+    columns: Dict[str, None] = {}
+    for row in sample:
+        for key in flatten(row):
+            columns.setdefault(key, None)
+    return list(columns)
+
+class ExportWriter(ABC):
+    """形式ごとの書き出し（同期 I/O。スレッド上で呼ばれる）"""
+
+    def __init__(self, path: str, compress: bool = False):
+        self.path = path
+        self.compress = compress
+        self.columns: Optional[List[str]] = None
+
+    @abstractmethod
+    def open(self, columns: List[str]) -> None:
+        """出力を開く（CSV/XLSX はヘッダー行を書く）"""
+
+    @abstractmethod
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """1チャンク分の行を書く"""
+
+    @abstractmethod
+    def close(self) -> None:
+        """出力を閉じる"""
+
+    def _text_stream(self):
+        if self.compress:
+            return io.TextIOWrapper(gzip.open(self.path, "wb"), encoding="utf-8", newline="")
+        return open(self.path, "w", encoding="utf-8", newline="")
+
+class NDJSONWriter(ExportWriter):
+    """1行1 JSON オブジェクト（列推定なし、構造をそのまま保持）"""
+
+    def open(self, columns: List[str]) -> None:
+        self._stream = self._text_stream()
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._stream.write("".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows))
+
+    def close(self) -> None:
+        self._stream.close()
+
+class CSVWriter(ExportWriter):
+    """CSV（推定した列で出力、UTF-8 BOM 付きで Excel でも文字化けしない）"""
+
+    def open(self, columns: List[str]) -> None:
+        self.columns = columns
+        self._stream = self._text_stream()
+        self._stream.write("\ufeff")
+        self._writer = csv.DictWriter(self._stream, fieldnames=columns, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(flatten(row) for row in rows)
+
+    def close(self) -> None:
+        self._stream.close()
+
+class XLSXWriter(ExportWriter):
+    """XLSX（write_only モードで行を保持しない）"""
+
+    def open(self, columns: List[str]) -> None:
+        if not _XLSX_AVAILABLE:
+            raise ValueError("XLSX export requires openpyxl")
+        self.columns = columns
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("export")
+        self._sheet.append(columns)
+
+    def write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            flat = flatten(row)
+            self._sheet.append([_cell(flat.get(column)) for column in self.columns])
+
+    def close(self) -> None:
+        self._workbook.save(self.path)
+
+def _cell(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+WRITERS = {"csv": CSVWriter, "json": NDJSONWriter, "xlsx": XLSXWriter}
+
+class ExportStorage:
+    """エクスポートファイルの保存先（所有者ごとのディレクトリ）"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, owner: str, name: str) -> str:
+        """保存パス（名前にパス区切り等を含むものは拒否）"""
+        if not _SAFE_NAME.match(name) or not _SAFE_NAME.match(owner):
+            raise ValueError("Invalid export name")
+        return os.path.join(self.root, owner, name)
+
+    def prepare(self, owner: str, name: str) -> str:
+        path = self.path(owner, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def exists(self, owner: str, name: str) -> bool:
+        return os.path.isfile(self.path(owner, name))
+
+    def iter_chunks(self, owner: str, name: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        """ダウンロード用にチャンク単位で読み出す（StreamingResponse がスレッドで回す）"""
+        with open(self.path(owner, name), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def delete(self, owner: str, name: str) -> None:
+        try:
+            os.unlink(self.path(owner, name))
+        except FileNotFoundError:
+            pass
+
+_export_storage: Optional[ExportStorage] = None
+
+def get_export_storage() -> ExportStorage:
+    """エクスポート保存先を取得（設定値から初期化）"""
+    global _export_storage
+    if _export_storage is None:
+        _export_storage = ExportStorage(settings.export_dir)
+    return _export_storage
+
+@dataclass
+class ExportResult:
+    name: str
+    row_count: int
+    size: int
+    content_type: str
+    columns: Optional[List[str]] = None
+
+def export_file_name(base: str, fmt: str, compress: bool = False) -> str:
+    """形式に応じたファイル名"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    name = f"{base}.{EXTENSIONS[fmt]}"
+    return f"{name}.gz" if compress and fmt != "xlsx" else name
+
+async def write_export(
+    rows: AsyncIterator[Dict[str, Any]],
+    fmt: str,
+    owner: str,
+    name: str,
+    storage: Optional[ExportStorage] = None,
+    compress: bool = False,
+    sample_size: int = 100,
+    chunk_size: int = 500,
+    progress: Optional[ProgressCallback] = None
+) -> ExportResult:
+    """
+    行を逐次ファイルへ書き出す
+
+    Args:
+        rows: 書き出す行の非同期イテレーター
+        fmt: csv / json（NDJSON）/ xlsx
+        owner: 所有者（ユーザーID）
+        name: ファイル名（export_file_name で生成）
+        compress: gzip 圧縮（csv / json のみ）
+        sample_size: 列推定に使う先頭の行数
+        chunk_size: 1回の書き込みにまとめる行数
+        progress: 書き込み済み行数の通知先
+    """
+    storage = storage or get_export_storage()
+    path = storage.prepare(owner, name)
+    writer = WRITERS[fmt](path, compress=compress and fmt != "xlsx")
+    buffer: List[Dict[str, Any]] = []
+    row_count = 0
+    opened = False
+
+    async def flush() -> None:
+        nonlocal buffer, row_count, opened
+        if not opened:
+            await asyncio.to_thread(writer.open, infer_columns(buffer[:sample_size]))
+            opened = True
+        chunk, buffer = buffer, []
+        await asyncio.to_thread(writer.write_rows, chunk)
+        row_count += len(chunk)
+        if progress:
+            progress(row_count)
+
+    try:
+        async for row in rows:
+            buffer.append(row)
+            # 列推定のサンプルが揃うまでは最初のチャンクを溜める
+            threshold = chunk_size if opened else max(chunk_size, sample_size)
+            if len(buffer) >= threshold:
+                await flush()
+        if buffer or not opened:
+            await flush()
+        await asyncio.to_thread(writer.close)
+    except BaseException:
+        if opened:
+            try:
+                await asyncio.to_thread(writer.close)
+            except Exception:
+                pass
+        storage.delete(owner, name)
+        raise
+
+    size = os.path.getsize(path)
+    logger.info("Export written", name=name, format=fmt, rows=row_count, size=size)
+    return ExportResult(
+        name=name,
+        row_count=row_count,
+        size=size,
+        content_type="application/gzip" if writer.compress else CONTENT_TYPES[fmt],
+        columns=writer.columns,
+    )
+
+__all__ = [
+    'ExportResult',
+    'ExportStorage',
+    'export_file_name',
+    'get_export_storage',
+    'infer_columns',
+    'write_export',
+]
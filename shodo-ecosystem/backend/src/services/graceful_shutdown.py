@@ -126,6 +126,31 @@ async def close_redis_connections():
     except Exception as e:
         logger.error(f"Error closing Redis connections: {e}")
 
+async def flush_write_behind_buffers():
+    """write-behind バッファのフラッシュ（Redis 切断前に実行）"""
+    try:
+        from .auth.usage_buffer import get_usage_buffer
+        await get_usage_buffer().close()
+        logger.info("Usage buffer flushed")
+    except Exception as e:
+        logger.error(f"Error flushing usage buffer: {e}")
+    
+    try:
+        from .auth.password_hasher import get_password_hasher
+        await get_password_hasher().close()
+        logger.info("Password hasher closed")
+    except Exception as e:
+        logger.error(f"Error closing password hasher: {e}")
+
+async def close_connector_pools():
+    """外部API共有接続プールのクローズ"""
+    try:
+        from ..connectors.transport import close_shared_transport
+        await close_shared_transport()
+        logger.info("Connector pools closed")
+    except Exception as e:
+        logger.error(f"Error closing connector pools: {e}")
+
 async def flush_logs():
     """ログのフラッシュ"""
     try:
@@ -180,7 +205,10 @@ def register_default_handlers():
     add_shutdown_handler(save_application_state)
     add_shutdown_handler(cleanup_background_tasks)
     add_shutdown_handler(close_redis_connections)
+    # 逆順実行のため Redis 切断より先にフラッシュされる
+    add_shutdown_handler(flush_write_behind_buffers)
     add_shutdown_handler(close_database_connections)
+    add_shutdown_handler(close_connector_pools)
     add_shutdown_handler(flush_logs)
     
     logger.info("Default shutdown handlers registered")
@@ -11,11 +11,14 @@ from sqlalchemy import select, and_
 
 
 from .celery_app import celery_app
+from ..core.config import settings
 from ..models.base import AsyncSessionLocal
 from ..models.api_key import APIKey, APIKeyStatus
 from ..models.user import UserSession
 from ..models.service_connection import ServiceConnection
 from ..services.auth.api_key_manager_db import DatabaseAPIKeyManager
+from ..connectors.manager import build_connector_for_connection
+from ..connectors.sync_engine import SyncEngine, SyncSpec, WatermarkStore
 
 logger = logging.getLogger(__name__)
 
@@ -262,9 +265,9 @@ def sync_service_connections(self):
                 try:
                     # サービス別の同期処理
                     if connection.service_type == "shopify":
-                        await _sync_shopify(connection)
+                        await _sync_shopify(db, connection)
                     elif connection.service_type == "stripe":
-                        await _sync_stripe(connection)
+                        await _sync_stripe(db, connection)
                     # 他のサービスも同様に実装
                     
                     connection.record_sync()
@@ -288,13 +291,77 @@ def sync_service_connections(self):
     
     return self.run_async(_sync_connections())
 
-async def _sync_shopify(connection: ServiceConnection):
+class _ConnectionWatermarkStore(WatermarkStore):
+    """ServiceConnection.settings["sync_watermarks"] にウォーターマークを保存"""
+    
+    def __init__(self, connection: ServiceConnection):
+        super().__init__((connection.settings or {}).get("sync_watermarks"))
+        self.connection = connection
+    
+    async def set(self, key: str, value):
+        await super().set(key, value)
+        # JSON 列は再代入しないと変更が検知されない
+        self.connection.settings = {**(self.connection.settings or {}), "sync_watermarks": dict(self.values)}
+
+async def _sync_connection(db, connection: ServiceConnection):
+    """
+    settings["sync_targets"] の定義に従って差分同期
+    
+    例: [{"connection_id": "...", "resource_type": "customer", "mapping": {"email": "email"}}]
+    
+    増分同期に加え、connector_sync_full_interval_hours ごとに全件パスを行う
+    """
+    targets = (connection.settings or {}).get("sync_targets") or []
+    if not targets:
+        return
+    
+    source = await build_connector_for_connection(db, connection)
+    store = _ConnectionWatermarkStore(connection)
+    failures = []
+    try:
+        for definition in targets:
+            target_connection = await db.get(ServiceConnection, definition["connection_id"])
+            if target_connection is None or not target_connection.is_active():
+                failures.append(f"{definition['connection_id']}: inactive target")
+                continue
+            target = await build_connector_for_connection(db, target_connection)
+            try:
+                spec = SyncSpec(
+                    resource_type=definition["resource_type"],
+                    target_resource_type=definition.get("target_resource_type"),
+                    mapping=definition.get("mapping"),
+                    external_id_field=definition.get("external_id_field"),
+                    compare_fields=definition.get("compare_fields"),
+                )
+                try:
+                    result = await SyncEngine(source, target, store, target_id=str(target_connection.id)).run(
+                        spec, full_every=settings.connector_sync_full_interval_hours * 3600
+                    )
+                except ValueError as e:
+                    # ソースのIDを保持できないターゲット（重複作成になるため同期しない）
+                    failures.append(f"{spec.resource_type}: {e}")
+                    continue
+                logger.info(
+                    f"Synced {spec.resource_type} {connection.id} -> {target_connection.id}: "
+                    f"{result['synced']} written, {result['skipped']} unchanged, {result['failed']} failed"
+                )
+                if result["failed"]:
+                    failures.append(f"{spec.resource_type}: {result['failed']} failed")
+            finally:
+                await target.close()
+    finally:
+        await source.close()
+    
+    if failures:
+        raise RuntimeError("; ".join(failures))
+
+async def _sync_shopify(db, connection: ServiceConnection):
     """Shopifyデータを同期"""
-    # TODO: Shopify APIを使用してデータを同期
+    await _sync_connection(db, connection)
 
-async def _sync_stripe(connection: ServiceConnection):
+async def _sync_stripe(db, connection: ServiceConnection):
     """Stripeデータを同期"""
-    # TODO: Stripe APIを使用してデータを同期
+    await _sync_connection(db, connection)
 
 @celery_app.task(
     name='src.tasks.api_key_tasks.rotate_api_key',
@@ -80,14 +80,16 @@ class CorrelationIDMiddleware:
             await self.app(scope, receive, send)
             return
         
-        # Extract or generate correlation ID
-        headers = dict(scope.get("headers", []))
-        correlation_id = headers.get(b"x-correlation-id", b"").decode()
+        # Extract or generate correlation ID (shared request context)
+        from ..middleware.context import RequestContext
+        ctx = RequestContext.from_scope(scope)
+        correlation_id = ctx.header("x-correlation-id")
         
         if not correlation_id:
             correlation_id = generate_correlation_id()
         
         # Set in context
+        ctx.correlation_id = correlation_id
         correlation_id_var.set(correlation_id)
         
         async def send_with_correlation(message):
@@ -0,0 +1,94 @@
+"""
+Expiring map
+Dict whose entries carry a numeric expiry epoch, indexed by a min-heap so
+cleanup only touches what has actually expired.
+
+- set: O(log n) (one heap push)
+- purge: O(k log n) for the k expired entries, no full scan
+- get / contains: O(1), expired entries are treated as absent
+Heap entries left behind by overwrites or deletes are skipped lazily and
+compacted away when they outnumber live entries.
+"""
+
+import heapq
+import itertools
+import time
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_MISSING = object()
+
+class ExpiringMap(Generic[K, V]):
+    """Mapping of key -> value with per-entry expiry (epoch seconds)"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        # key -> (value, expires_at)
+        self._data: Dict[K, Tuple[V, float]] = {}
+        # (expires_at, seq, key); seq keeps ordering stable for equal epochs
+        self._heap: List[Tuple[float, int, K]] = []
+        self._seq = itertools.count()
+
+    def set(self, key: K, value: V, expires_at: float) -> None:
+        """Insert or replace an entry"""
+        current = self._data.get(key)
+        self._data[key] = (value, expires_at)
+        if current is None or current[1] != expires_at:
+            heapq.heappush(self._heap, (expires_at, next(self._seq), key))
+            if len(self._heap) > 2 * len(self._data) + 64:
+                self._compact()
+
+    def get(self, key: K, default: Any = None) -> Any:
+        """Value for key, or default when missing or expired"""
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= self._clock():
+            return default
+        return entry[0]
+
+    def expires_at(self, key: K) -> Optional[float]:
+        """Expiry epoch of a live entry"""
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= self._clock():
+            return None
+        return entry[1]
+
+    def pop(self, key: K, default: Any = None) -> Any:
+        """Remove an entry (its heap slot is discarded lazily)"""
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def purge(self, now: Optional[float] = None) -> List[Tuple[K, V]]:
+        """Remove and return every entry that expired at or before now"""
+        now = self._clock() if now is None else now
+        removed: List[Tuple[K, V]] = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            # Skip slots superseded by a later set() or already popped
+            if entry is not None and entry[1] == expires_at:
+                del self._data[key]
+                removed.append((key, entry[0]))
+        return removed
+
+    def _compact(self) -> None:
+        self._heap = [(exp, next(self._seq), key) for key, (_, exp) in self._data.items()]
+        heapq.heapify(self._heap)
+
+    def items(self) -> Iterator[Tuple[K, V, float]]:
+        """Snapshot of (key, value, expires_at) for live entries"""
+        now = self._clock()
+        return iter([(k, v, exp) for k, (v, exp) in self._data.items() if exp > now])
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key)  # type: ignore[arg-type]
+        return entry is not None and entry[1] > self._clock()
+
+    def __len__(self) -> int:
+        """Number of stored entries (expired ones count until purged)"""
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._data))
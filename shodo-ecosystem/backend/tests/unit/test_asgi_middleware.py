@@ -0,0 +1,188 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from httpx import AsyncClient
+
+from src.core.config import settings
+from src.middleware.csrf import CSRFMiddleware
+from src.middleware.lpr_enforcer import LPREnforcerMiddleware, MaskingLimitExceeded
+from src.middleware.rate_limit import RateLimitMiddleware
+from src.middleware.security import SecurityHeadersMiddleware
+from src.utils.correlation import CorrelationIDMiddleware
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/echo")
+    async def echo(request: Request):
+        return {"correlation_id": request.state.correlation_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield b"chunk"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.post("/change")
+    async def change():
+        return {"ok": True}
+
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(CSRFMiddleware)
+    app.add_middleware(CorrelationIDMiddleware)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_security_headers_and_shared_correlation_id():
+    async with AsyncClient(app=_build_app(), base_url="http://test") as client:
+        response = await client.get("/echo", headers={"X-Correlation-ID": "cid-1"})
+    assert response.status_code == 200
+    assert response.json()["correlation_id"] == "cid-1"
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["x-correlation-id"] == "cid-1"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_passes_through():
+    async with AsyncClient(app=_build_app(), base_url="http://test") as client:
+        response = await client.get("/stream")
+    assert response.text == "chunk" * 3
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
+@pytest.mark.asyncio
+async def test_csrf_rejects_mismatched_token():
+    async with AsyncClient(app=_build_app(), base_url="http://test") as client:
+        rejected = await client.post("/change", headers={"X-CSRF-Token": "a"}, cookies={"csrf_token": "b"})
+        accepted = await client.post("/change", headers={"X-CSRF-Token": "a"}, cookies={"csrf_token": "a"})
+    assert rejected.status_code == 403
+    assert rejected.json()["code"] == "CSRF_FAILED"
+    assert accepted.status_code == 200
+
+
+class _FakeLPRService:
+    async def verify_token(self, token, device_fingerprint, required_scope):
+        if token != "good":
+            return {"valid": False, "error": "bad token"}
+        return {"valid": True, "jti": "jti-1", "user_id": "user-1", "service": "shopify"}
+
+
+def _lpr_app() -> FastAPI:
+    """RateLimit inside the LPR enforcer, as in main.py"""
+    app = FastAPI()
+
+    @app.get("/api/v1/external/whoami")
+    async def whoami(request: Request):
+        return {
+            "client_id": request.state.rate_limit_client_id,
+            "lpr_user_id": request.state.lpr_user_id,
+        }
+
+    @app.get("/limited")
+    async def limited():
+        return {"ok": True}
+
+    @app.get("/api/v1/external/stream")
+    async def stream():
+        async def chunks():
+            yield b'{"email": "taro@example.com", "items": ['
+            for i in range(5):
+                yield b'"0123456789",' if i < 4 else b'"0123456789"'
+            yield b"]}"
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(LPREnforcerMiddleware)
+    enforcer = app.build_middleware_stack()
+    app.middleware_stack = enforcer
+    # Inject the fake service into the built enforcer instance
+    _find(enforcer, LPREnforcerMiddleware).lpr_service = _FakeLPRService()
+    return app
+
+
+def _contains(error, cls):
+    if isinstance(error, BaseExceptionGroup):
+        return any(_contains(e, cls) for e in error.exceptions)
+    return isinstance(error, cls)
+
+
+def _find(app, cls):
+    while not isinstance(app, cls):
+        app = app.app
+    return app
+
+
+@pytest.mark.asyncio
+async def test_lpr_masks_streamed_json_and_fails_closed_past_the_limit(monkeypatch):
+    app = _lpr_app()
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/api/v1/external/stream", headers={"X-LPR-Token": "good"})
+        assert response.status_code == 200
+        assert "taro@example.com" not in response.text
+        assert response.headers["x-lpr-jti"] == "jti-1"
+
+        monkeypatch.setattr(settings, "lpr_mask_max_body_bytes", 64)
+        # StreamingResponse runs the body in a task group, so the error arrives wrapped
+        with pytest.raises(Exception) as exc:
+            await client.get("/api/v1/external/stream", headers={"X-LPR-Token": "good"})
+        assert _contains(exc.value, MaskingLimitExceeded)
+
+
+@pytest.fixture
+def memory_rate_limits(monkeypatch):
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setattr(settings, "rate_limit_fail_open", False)
+    monkeypatch.setattr(settings, "rate_limit_hh_enabled", False)
+    limits = {"per_minute": 2, "per_hour": 100, "burst": 100}
+    monkeypatch.setitem(settings.rate_limit_endpoint_limits, "/limited", limits)
+    monkeypatch.setitem(settings.rate_limit_endpoint_limits, "/api/v1/external/whoami", limits)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_headers_then_429(memory_rate_limits):
+    async with AsyncClient(app=_lpr_app(), base_url="http://test") as client:
+        first = await client.get("/limited")
+        second = await client.get("/limited")
+        rejected = await client.get("/limited")
+
+    assert first.status_code == 200
+    assert first.headers["x-ratelimit-limit-minute"] == "2"
+    assert first.headers["x-ratelimit-remaining-minute"] == "1"
+    assert second.headers["x-ratelimit-remaining-minute"] == "0"
+    assert rejected.status_code == 429
+    assert rejected.json() == {"detail": "Rate limit exceeded"}
+    assert rejected.headers["x-ratelimit-limit"] == "2"
+    assert rejected.headers["x-ratelimit-remaining"] == "0"
+    assert int(rejected.headers["retry-after"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_lpr_rejects_missing_token(monkeypatch, memory_rate_limits):
+    monkeypatch.setattr(settings, "lpr_fail_open", False)
+    async with AsyncClient(app=_lpr_app(), base_url="http://test") as client:
+        missing = await client.get("/api/v1/external/whoami")
+        invalid = await client.get("/api/v1/external/whoami", headers={"X-LPR-Token": "bad"})
+
+    assert missing.status_code == 401
+    assert missing.json()["error"] == "LPR_TOKEN_REQUIRED"
+    assert invalid.status_code == 403
+    assert invalid.json()["error"] == "LPR_VERIFICATION_FAILED"
+
+
+@pytest.mark.asyncio
+async def test_lpr_context_reaches_rate_limit(memory_rate_limits):
+    async with AsyncClient(app=_lpr_app(), base_url="http://test") as client:
+        responses = [
+            await client.get("/api/v1/external/whoami", headers={"X-LPR-Token": "good"})
+            for _ in range(3)
+        ]
+
+    # RateLimit keys the client on the JTI set by the enforcer in the shared context
+    assert responses[0].json() == {"client_id": "lpr:jti-1", "lpr_user_id": "user-1"}
+    assert responses[0].headers["x-lpr-jti"] == "jti-1"
+    assert responses[0].headers["x-ratelimit-remaining-minute"] == "1"
+    assert responses[2].status_code == 429
@@ -0,0 +1,99 @@
+import httpx
+import pytest
+
+from src.connectors.circuit_breaker import (
+    BreakerState,
+    BreakerTransport,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_circuit_breaker,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock, **kwargs):
+    options = dict(window_seconds=10, min_requests=4, error_rate=0.5, open_seconds=5, max_open_seconds=20, jitter=0, probes=2)
+    options.update(kwargs)
+    return CircuitBreaker("api.example.com:charges", clock=clock, **options)
+
+
+def test_opens_on_window_error_rate_and_closes_after_probes():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for success in (True, False, False):
+        breaker.record(success)
+    assert breaker.state == BreakerState.CLOSED  # below min_requests
+    breaker.record(False)
+    assert breaker.state == BreakerState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    clock.now += 5
+    assert breaker.acquire() is True
+    assert breaker.acquire() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()  # probe slots exhausted
+    breaker.record(True, probe=True)
+    breaker.record(True, probe=True)
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_failed_probe_reopens_with_longer_duration():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record(False)
+    clock.now += 5
+    breaker.record(False, probe=breaker.acquire())
+    assert breaker.state == BreakerState.OPEN
+    clock.now += 5
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+    clock.now += 5
+    assert breaker.acquire() is True
+
+
+def test_old_failures_leave_the_window():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record(False)
+    clock.now += 11
+    for _ in range(4):
+        breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.failure_rate == pytest.approx(0.2)
+
+
+@pytest.mark.asyncio
+async def test_transport_shares_breaker_per_host_and_endpoint():
+    breaker = get_circuit_breaker("degraded.example.com", "charges")
+    breaker.min_requests = 2
+
+    def handler(request):
+        return httpx.Response(503 if request.url.path == "/charges" else 404)
+
+    clients = [
+        httpx.AsyncClient(
+            base_url="https://degraded.example.com",
+            transport=BreakerTransport(httpx.MockTransport(handler), lambda url: url.path.strip("/")),
+        )
+        for _ in range(2)
+    ]
+    for client in clients:
+        assert (await client.get("/charges")).status_code == 503
+    # another instance of the same upstream is rejected without a request
+    with pytest.raises(CircuitOpenError):
+        await clients[0].get("/charges")
+    # other endpoints and client errors are unaffected
+    assert (await clients[1].get("/customers")).status_code == 404
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.connectors.base import ConnectorCredentials
+from src.connectors.shopify import ShopifyConnector
+
+
+class _CountingShopify(ShopifyConnector):
+    def __init__(self, handler):
+        super().__init__("shop.example.com", ConnectorCredentials(access_token="token"))
+        self.config.batch_concurrency = 3
+        self._session = httpx.AsyncClient(
+            base_url=self.config.base_url, transport=httpx.MockTransport(handler)
+        )
+        self.in_flight = 0
+        self.peak = 0
+
+    async def create_resource(self, resource_type, data):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if data.get("fail"):
+            raise RuntimeError("boom")
+        return data
+
+
+@pytest.mark.asyncio
+async def test_batch_write_is_bounded_ordered_and_isolates_errors():
+    connector = _CountingShopify(lambda request: httpx.Response(404))
+    ops = [{"action": "create", "resource_type": "product", "data": {"n": i, "fail": i == 4}} for i in range(10)]
+    ops.append({"action": "archive", "resource_type": "product"})
+
+    results = await connector.batch_write(ops)
+
+    assert [r.get("n") for r in results[:4]] == [0, 1, 2, 3]
+    assert results[4] == {"error": "boom"}
+    assert results[10] == {"error": "Unknown action: archive"}
+    assert connector.peak == 3
+
+    with pytest.raises(RuntimeError):
+        await connector.batch_write(ops, fail_fast=True)
+
+
+@pytest.mark.asyncio
+async def test_shopify_batch_read_uses_ids_filter():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path.endswith("/products.json"):
+            ids = request.url.params["ids"].split(",")
+            return httpx.Response(200, json={"products": [{"id": int(i)} for i in ids if i != "3"]})
+        return httpx.Response(200, json={"collect": {"id": 9}})
+
+    connector = _CountingShopify(handler)
+    ops = [{"resource_type": "product", "resource_id": i} for i in (1, 2, 3, 1)]
+    ops.insert(1, {"resource_type": "collect", "resource_id": 9})
+
+    results = await connector.batch_read(ops)
+
+    assert results == [{"id": 1}, {"id": 9}, {"id": 2}, None, {"id": 1}]
+    product_calls = [r for r in requests if r.url.path.endswith("/products.json")]
+    assert len(product_calls) == 1
+    assert product_calls[0].url.params["ids"] == "1,2,3"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_coalesce_into_one_request():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        ids = request.url.params["ids"].split(",")
+        return httpx.Response(200, json={"products": [{"id": int(i)} for i in ids if i != "404"]})
+
+    connector = _CountingShopify(handler)
+    snapshots = await asyncio.gather(*(connector.create_snapshot("product", i) for i in (1, 2, 2, 3)))
+    assert [s.data["id"] for s in snapshots] == [1, 2, 2, 3]
+    assert len(requests) == 1
+    assert requests[0].url.params["ids"] == "1,2,3"
+
+    assert await connector.load_resource("product", 404) is None
+    assert len(requests) == 2
@@ -0,0 +1,70 @@
+import httpx
+import pytest
+
+from src.connectors import transport as transport_module
+from src.connectors.transport import SharedTransport
+
+
+@pytest.mark.asyncio
+async def test_clients_share_origin_pools_but_not_headers_or_cookies(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.host, request.headers.get("x-tenant"), request.headers.get("cookie")))
+        return httpx.Response(200, headers={"set-cookie": f"sid={request.headers.get('x-tenant')}"})
+
+    created = []
+
+    def fake_transport(**kwargs):
+        created.append(kwargs)
+        return httpx.MockTransport(handler)
+
+    monkeypatch.setattr(transport_module.httpx, "AsyncHTTPTransport", fake_transport)
+    shared = SharedTransport()
+
+    a = httpx.AsyncClient(transport=shared, base_url="https://shop.example.com/admin", headers={"x-tenant": "a"})
+    b = httpx.AsyncClient(transport=shared, base_url="https://shop.example.com/admin", headers={"x-tenant": "b"})
+    await a.get("/products.json")
+    await b.get("/products.json")
+    await a.get("/orders.json")
+    await a.aclose()
+    await b.get("https://api.example.org/v1/balance")
+
+    assert len(created) == 2
+    assert seen[1] == ("shop.example.com", "b", None)
+    assert seen[2] == ("shop.example.com", "a", "sid=a")
+
+    stats = shared.stats()
+    assert stats["https://shop.example.com:443"]["requests"] == 3
+    assert stats["https://api.example.org:443"]["in_flight"] == 0
+    await shared.close_all()
+    assert shared.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_idle_pools_beyond_the_origin_limit_are_closed(monkeypatch):
+    closed = []
+
+    class _Transport(httpx.MockTransport):
+        def __init__(self):
+            super().__init__(lambda request: httpx.Response(200, content=b"body"))
+
+        async def aclose(self):
+            closed.append(self)
+
+    monkeypatch.setattr(transport_module.httpx, "AsyncHTTPTransport", lambda **kwargs: _Transport())
+    shared = SharedTransport(max_origins=2)
+    client = httpx.AsyncClient(transport=shared)
+
+    await client.get("https://a.example.com/")
+    # An unread streamed body keeps its pool in flight, so it is not evicted
+    async with client.stream("GET", "https://b.example.com/") as response:
+        await client.get("https://a.example.com/")
+        await client.get("https://c.example.com/")
+        assert set(shared.stats()) == {"https://b.example.com:443", "https://c.example.com:443"}
+        assert shared.stats()["https://b.example.com:443"]["in_flight"] == 1
+        assert await response.aread() == b"body"
+    assert shared.stats()["https://b.example.com:443"]["in_flight"] == 0
+
+    await shared.close_all()
+    assert len(closed) == 3
@@ -0,0 +1,26 @@
+from src.utils.expiring_map import ExpiringMap
+
+
+def test_purge_removes_only_expired_entries_in_expiry_order():
+    now = [1000.0]
+    entries = ExpiringMap(clock=lambda: now[0])
+    for i in range(100):
+        entries.set(f"k{i}", i, 1000.0 + i)
+    # Overwrites and deletes leave stale heap slots that must be skipped
+    entries.set("k1", "extended", 5000.0)
+    entries.pop("k2")
+
+    now[0] = 1005.0
+    assert "k4" not in entries
+    assert entries.get("k4") is None
+    assert entries.get("k1") == "extended"
+
+    removed = entries.purge()
+    assert [key for key, _ in removed] == ["k0", "k3", "k4", "k5"]
+    assert len(entries) == 95
+    assert entries.expires_at("k1") == 5000.0
+
+    for _ in range(500):
+        entries.set("k99", "again", now[0] + 10)
+        entries.set("k99", "again", now[0] + 20)
+    assert len(entries._heap) <= 2 * len(entries) + 65
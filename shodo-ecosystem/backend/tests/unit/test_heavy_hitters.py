@@ -0,0 +1,56 @@
+from src.monitoring.heavy_hitters import CountMinSketch, SpaceSaving, HeavyHitterTracker
+
+
+def test_count_min_sketch_never_underestimates():
+    sketch = CountMinSketch(width=256, depth=4)
+    for i in range(2000):
+        sketch.add(f"client:{i % 50}")
+    sketch.add("client:hot", 500)
+    assert sketch.estimate("client:hot") >= 500
+    assert sketch.estimate("client:7") >= 40
+    assert sketch.total == 2500
+
+
+def test_space_saving_keeps_heavy_hitters_with_fixed_capacity():
+    summary = SpaceSaving(capacity=10)
+    for i in range(5000):
+        summary.offer(f"noise-{i}")
+        if i % 2 == 0:
+            summary.offer("hot")
+    assert len(summary.counters) == 10
+    key, count, _ = summary.top(1)[0]
+    assert key == "hot"
+    assert count >= 2500
+
+
+def test_tracker_snapshot_reports_clients_and_routes():
+    tracker = HeavyHitterTracker("test", width=128, depth=3, top_k=3)
+    for _ in range(20):
+        tracker.record("user:1", "/api/v1/nlp/analyze")
+    tracker.record("user:2", "/api/v1/preview/generate")
+    snapshot = tracker.snapshot()
+    assert snapshot["top"]["client"][0]["key"] == "user:1"
+    assert snapshot["top"]["route"][0]["key"] == "/api/v1/nlp/analyze"
+    assert tracker.estimate("client", "user:1") >= 20
+
+
+def test_gauges_update_without_redis_and_drop_stale_series():
+    from src.monitoring.metrics import rate_limit_top_consumers
+
+    def exported():
+        return {
+            (sample.labels["dimension"], sample.labels["key"])
+            for metric in rate_limit_top_consumers.collect()
+            for sample in metric.samples
+            if sample.labels["tracker"] == "gauge-test"
+        }
+
+    tracker = HeavyHitterTracker("gauge-test", width=128, depth=3, top_k=1, flush_interval=0)
+    tracker.record("user:1", "/a")
+    tracker.maybe_schedule_flush(None)
+    assert exported() == {("client", "user:1"), ("route", "/a")}
+
+    for _ in range(5):
+        tracker.record("user:2", "/b")
+    tracker.maybe_schedule_flush(None)
+    assert exported() == {("client", "user:2"), ("route", "/b")}
@@ -0,0 +1,66 @@
+import httpx
+import pytest
+
+from src.connectors.base import ConnectorCredentials
+from src.connectors.http_cache import CachingTransport, ResponseCache
+from src.connectors.shopify import ShopifyConnector
+
+
+def _client(handler, cache):
+    connector = ShopifyConnector("shop.example.com", ConnectorCredentials(access_token="token"))
+    transport = CachingTransport(
+        httpx.MockTransport(handler),
+        cache,
+        name="Shopify",
+        scope="Shopify:test",
+        resource_of=lambda url: connector._resource_from_url("/admin/api/2024-01", url),
+        cacheable={"products"},
+    )
+    return httpx.AsyncClient(base_url=connector.config.base_url, transport=transport)
+
+
+@pytest.mark.asyncio
+async def test_revalidates_with_etag_and_serves_cached_body_on_304():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"product": {"id": 1}}, headers={"ETag": '"v1"'})
+
+    cache = ResponseCache()
+    client = _client(handler, cache)
+
+    first = await client.get("/products/1.json")
+    second = await client.get("/products/1.json")
+
+    assert seen == [None, '"v1"']
+    assert second.status_code == 200
+    assert second.json() == first.json() == {"product": {"id": 1}}
+
+
+@pytest.mark.asyncio
+async def test_fresh_entries_skip_upstream_until_a_write_invalidates():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(200, json={"products": []}, headers={"Cache-Control": "max-age=60"})
+
+    cache = ResponseCache()
+    client = _client(handler, cache)
+
+    await client.get("/products.json")
+    await client.get("/products.json")
+    assert calls == ["GET"]
+
+    await client.put("/products/1.json", json={"product": {}})
+    await client.get("/products.json")
+    assert calls == ["GET", "PUT", "GET"]
+
+    # Resource types outside the opt-in set are never cached
+    await client.get("/orders.json")
+    await client.get("/orders.json")
+    assert calls[-2:] == ["GET", "GET"]
+    assert cache.invalidate("Shopify:test", "products") == 1
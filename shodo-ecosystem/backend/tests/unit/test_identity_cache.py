@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from src.services.auth.identity_cache import INVALIDATION_CHANNEL, UserIdentityCache, UserRecord
+
+
+def _record(user_id, active=True):
+    return UserRecord(user_id, f"name-{user_id}", f"{user_id}@example.com", ["user"], active)
+
+
+@pytest.mark.asyncio
+async def test_records_are_cached_until_invalidated():
+    cache = UserIdentityCache(ttl_seconds=60, maxsize=10)
+    calls = []
+
+    async def loader(user_id):
+        calls.append(user_id)
+        return _record(user_id, active=len(calls) == 1)
+
+    assert (await cache.get("u1", loader)).is_active
+    assert (await cache.get("u1", loader)).is_active
+    assert calls == ["u1"]
+
+    cache._handle_message("u1 7")
+    assert not (await cache.get("u1", loader)).is_active
+    assert calls == ["u1", "u1"]
+
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_cached():
+    cache = UserIdentityCache(ttl_seconds=60, maxsize=10)
+    gate = asyncio.Event()
+    calls = []
+
+    async def loader(user_id):
+        calls.append(user_id)
+        await gate.wait()
+        return _record(user_id)
+
+    pending = asyncio.create_task(cache.get("u1", loader))
+    await asyncio.sleep(0)
+    cache.invalidate("u1")
+    gate.set()
+    assert (await pending).user_id == "u1"
+
+    gate.set()
+    await cache.get("u1", loader)
+    assert calls == ["u1", "u1"]
+
+
+async def _wait_until(predicate):
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_publish_evicts_entry_in_another_worker():
+    import fakeredis.aioredis
+
+    redis = fakeredis.aioredis.FakeRedis()
+    publisher = UserIdentityCache(ttl_seconds=60, maxsize=10)
+    subscriber = UserIdentityCache(ttl_seconds=60, maxsize=10)
+    subscriber.start(redis)
+    for _ in range(200):
+        if (await redis.pubsub_numsub(INVALIDATION_CHANNEL))[0][1]:
+            break
+        await asyncio.sleep(0.01)
+
+    async def loader(user_id):
+        return _record(user_id)
+
+    await subscriber.get("u1", loader)
+    assert "u1" in subscriber._entries
+
+    await publisher.publish_invalidation(redis, "u1")
+    await _wait_until(lambda: "u1" not in subscriber._entries)
+    assert subscriber._versions["u1"] == 1
+    await subscriber.stop()
+
+
+@pytest.mark.asyncio
+async def test_access_update_publishes_after_commit(monkeypatch):
+    from src.services.auth import user_admin
+
+    events = []
+
+    class _User:
+        role = "admin"
+        is_active = True
+
+    user = _User()
+
+    class _Session:
+        async def get(self, model, user_id):
+            return user if user_id == "u1" else None
+
+        async def commit(self):
+            events.append("commit")
+
+    async def publish(user_id):
+        events.append(("publish", user_id))
+
+    monkeypatch.setattr(user_admin, "publish_user_change", publish)
+
+    assert await user_admin.deactivate_user(_Session(), "u1")
+    assert (user.role, user.is_active) == ("admin", False)
+    assert events == ["commit", ("publish", "u1")]
+    assert not await user_admin.deactivate_user(_Session(), "missing")
@@ -16,4 +16,35 @@ def test_sanitize_string_removes_control_chars_and_truncates():
     text = "Hello\x00World\x01\x02\x03" + "A" * 200
     cleaned = InputSanitizer.sanitize_string(text, max_length=50)
     assert "\x00" not in cleaned
-    assert len(cleaned) <= 50
\ No newline at end of file
+    assert len(cleaned) <= 50
+
+def test_fast_path_matches_per_character_category_filter():
+    import unicodedata
+
+    def legacy(value: str) -> str:
+        return "".join(
+            ch for ch in value
+            if ch in ("\n", "\t") or unicodedata.category(ch) not in ("Cc", "Cf")
+        ).strip()
+
+    samples = [
+        "日本語のみ",
+        "全角\u3000スペースと\u200bゼロ幅\ufeffBOM\u202e逆方向",
+        "\x7f\x85\x9f制御\r\n\tタブ",
+        "絵文字😊と\U000e0001タグ",
+    ]
+    for text in samples:
+        assert InputSanitizer.sanitize_string(text) == legacy(text)
+    assert InputSanitizer.sanitize_many(samples) == [legacy(t) for t in samples]
+    assert InputSanitizer.sanitize_json({"a": [{"b": "x\x00"}, "y\u200b", 1]}) == {"a": [{"b": "x"}, "y", 1]}
+
+def test_control_char_class_covers_exactly_cc_and_cf():
+    import sys
+    import unicodedata
+
+    from src.core.security_utils import _CONTROL_CHARS
+
+    for cp in range(sys.maxunicode + 1):
+        ch = chr(cp)
+        expected = ch not in ("\n", "\t") and unicodedata.category(ch) in ("Cc", "Cf")
+        assert bool(_CONTROL_CHARS.match(ch)) == expected, hex(cp)
@@ -0,0 +1,46 @@
+import json
+
+from src.middleware.json_masking import StreamingJSONMasker
+
+
+def _mask(raw: bytes, chunk_size: int) -> bytes:
+    masker = StreamingJSONMasker()
+    out = [masker.feed(raw[i:i + chunk_size]) for i in range(0, len(raw), chunk_size)]
+    out.append(masker.close())
+    return b"".join(out)
+
+
+def test_streaming_mask_is_chunking_independent():
+    doc = {
+        "items": [
+            {
+                "id": i,
+                "email": "a@example.com",
+                "note": "連絡先 x@example.org",
+                "credentials": {"password": [1, {"a": "}"}]},
+                "tags": ["192.168.0.1", "esc\"ape\\"],
+            }
+            for i in range(20)
+        ],
+        "token": 12345,
+        "plain": "日本語",
+    }
+    raw = json.dumps(doc, ensure_ascii=False, indent=2).encode("utf-8")
+    whole = _mask(raw, len(raw))
+    for size in (1, 3, 64):
+        assert _mask(raw, size) == whole
+
+    masked = json.loads(whole)
+    first = masked["items"][0]
+    assert first["email"] == "[REDACTED]"
+    assert first["note"] == "連絡先 [REDACTED_EMAIL]"
+    assert first["credentials"] == {"password": "[REDACTED]"}
+    assert first["tags"][0].startswith("[REDACTED_")
+    assert first["tags"][1] == "esc\"ape\\"
+    assert masked["token"] == "[REDACTED]"
+    assert masked["plain"] == "日本語"
+
+
+def test_clean_body_is_emitted_unchanged():
+    raw = b'{"id": 1, "name": "widget", "sizes": [1, 2.5, null, true]}'
+    assert _mask(raw, 5) == raw
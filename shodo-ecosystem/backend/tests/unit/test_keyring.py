@@ -0,0 +1,33 @@
+import time
+
+import pytest
+from jose import JWTError
+
+from src.services.auth.keyring import Keyring, KeyringError, generate_document
+
+
+def test_rotation_keeps_tokens_from_previous_keys_valid():
+    old = generate_document("RS256")
+    new = generate_document("ES256")
+    claims = {"sub": "u1", "exp": int(time.time()) + 60}
+
+    token = Keyring.from_document(old).sign(claims)
+    rotated = Keyring.from_document({
+        "active_kid": new["active_kid"],
+        "keys": new["keys"] + old["keys"],
+    })
+
+    assert rotated.verify(token)["sub"] == "u1"
+    fresh = rotated.sign(claims)
+    assert rotated.verify(fresh)["sub"] == "u1"
+    assert len(fresh) < len(token)
+
+    with pytest.raises(JWTError):
+        Keyring.from_document(new).verify(token)
+
+
+def test_active_key_must_have_private_material():
+    doc = generate_document("ES256")
+    verifier_only = Keyring.from_document(doc).active
+    with pytest.raises(KeyringError):
+        Keyring([type(verifier_only)(verifier_only.kid, "ES256", None, verifier_only.verifying_key)])
@@ -20,4 +20,119 @@ async def test_check_scope_authorization_method_mismatch(monkeypatch):
     granted = [
         LPRScope(method="GET", url_pattern="/api/v1/nlp/")
     ]
-    assert service._check_scope_authorization(required, granted) is False
\ No newline at end of file
+    assert service._check_scope_authorization(required, granted) is False
+
+@pytest.mark.asyncio
+async def test_verify_token_reuses_verified_claims(monkeypatch):
+    from src.services.auth.lpr_service import DeviceFingerprint
+
+    service = LPRService(redis_client=None)
+    fingerprint = DeviceFingerprint(user_agent="ua", accept_language="ja")
+    issued = await service.issue_token(
+        service="shopify",
+        purpose="test",
+        scopes=[LPRScope(method="GET", url_pattern="/api/v1/nlp/*")],
+        device_fingerprint=fingerprint,
+        user_id="user-1",
+        consent=True,
+    )
+
+    decode_calls = []
+    original_verify = service.keyring.verify
+
+    def counting_verify(*args, **kwargs):
+        decode_calls.append(1)
+        return original_verify(*args, **kwargs)
+
+    monkeypatch.setattr(service.keyring, "verify", counting_verify)
+    required = LPRScope(method="GET", url_pattern="/api/v1/nlp/analyze")
+    first = await service.verify_token(issued["token"], fingerprint, required)
+    second = await service.verify_token(issued["token"], fingerprint, required)
+    assert first["valid"] and second["valid"]
+    assert len(decode_calls) == 1
+
+    # Revocation is still honoured for cached tokens
+    await service.revoke_token(issued["jti"], reason="test", user_id="user-1")
+    revoked = await service.verify_token(issued["token"], fingerprint, required)
+    assert revoked["valid"] is False
+
+
+def test_compiled_scope_matcher_hosts_and_wildcards():
+    from src.services.auth.lpr_service import ScopeMatcher
+
+    granted = [LPRScope(method="GET", url_pattern=f"/api/v1/items/{i}") for i in range(30)]
+    granted += [
+        LPRScope(method="*", url_pattern="/api/v1/orders/*"),
+        LPRScope(method="POST", url_pattern="https://shop.example.com/admin/*"),
+    ]
+    matcher = ScopeMatcher(granted)
+    assert matcher.matches(LPRScope(method="GET", url_pattern="/api/v1/items/29"))
+    assert not matcher.matches(LPRScope(method="GET", url_pattern="/api/v1/items/30"))
+    assert matcher.matches(LPRScope(method="DELETE", url_pattern="/api/v1/orders"))
+    assert matcher.matches(LPRScope(method="PUT", url_pattern="/api/v1//orders/1/lines"))
+    assert matcher.matches(LPRScope(method="POST", url_pattern="https://shop.example.com/admin/x"))
+    assert not matcher.matches(LPRScope(method="POST", url_pattern="https://evil.example.com/admin/x"))
+    assert not matcher.matches(LPRScope(method="POST", url_pattern="/admin/x"))
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((name, args))
+        return queue
+
+    async def execute(self, raise_on_error=True):
+        self.redis.round_trips += 1
+        return [getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.sets = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def ttl(self, key):
+        return 1200 if key in self.data else -2
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+        return True
+
+    def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+        return 1
+
+    def publish(self, channel, message):
+        return 0
+
+
+@pytest.mark.asyncio
+async def test_revoke_tokens_is_pipelined():
+    import json
+
+    redis = _FakeRedis()
+    for jti in ("a", "b"):
+        redis.data[f"lpr:token:{jti}"] = json.dumps({"jti": jti, "revoked": False})
+    redis.sets["lpr:user:u1:tokens"] = {"a", "b"}
+
+    service = LPRService(redis_client=redis)
+    results = await service.revoke_tokens(["a", "b", "c"], reason="incident", user_id="u1")
+    assert results == {"a": True, "b": True, "c": True}
+    assert redis.round_trips == 2
+    assert json.loads(redis.data["lpr:token:a"])["revoked"] is True
+    assert "lpr:revoked:c" in redis.data
+    assert redis.sets["lpr:user:u1:tokens"] == set()
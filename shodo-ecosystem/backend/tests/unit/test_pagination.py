@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.connectors.base import ConnectorCredentials
+from src.connectors.pagination import Page, iterate_pages
+from src.connectors.shopify import ShopifyConnector
+
+
+@pytest.mark.asyncio
+async def test_iterate_pages_prefetches_next_page_while_consuming():
+    fetched = []
+
+    async def fetch(cursor):
+        n = int(cursor or 0)
+        fetched.append(n)
+        return Page([{"n": n}], str(n + 1) if n < 4 else None)
+
+    stream = iterate_pages(fetch, prefetch=1)
+    first = await stream.__anext__()
+    await asyncio.sleep(0.01)
+    # Page 1 was fetched (and page 2 is waiting on the bounded buffer) before page 0 was consumed further
+    assert first == {"n": 0}
+    assert fetched == [0, 1, 2]
+
+    rest = [item["n"] async for item in stream]
+    assert rest == [1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_iterate_pages_propagates_errors_and_graphql_cursor():
+    async def fetch(cursor):
+        if cursor:
+            raise RuntimeError("page failed")
+        return Page.from_graphql({
+            "edges": [{"node": {"id": "a"}}],
+            "pageInfo": {"hasNextPage": True, "endCursor": "c1"},
+        })
+
+    items = []
+    with pytest.raises(RuntimeError):
+        async for item in iterate_pages(fetch):
+            items.append(item)
+    assert items == [{"id": "a"}]
+
+
+@pytest.mark.asyncio
+async def test_shopify_streams_with_page_info_cursor():
+    seen = []
+
+    def handler(request):
+        params = dict(request.url.params)
+        seen.append(params)
+        if "page_info" not in params:
+            link = '<https://shop.example.com/admin/api/2024-01/products.json?limit=250&page_info=abc>; rel="next"'
+            return httpx.Response(200, json={"products": [{"id": 1}, {"id": 2}]}, headers={"Link": link})
+        return httpx.Response(200, json={"products": [{"id": 3}]})
+
+    connector = ShopifyConnector("shop.example.com", ConnectorCredentials(access_token="token"))
+    connector._session = httpx.AsyncClient(base_url=connector.config.base_url, transport=httpx.MockTransport(handler))
+
+    ids = [p["id"] async for p in connector.stream_resources("product", {"status": "active"})]
+
+    assert ids == [1, 2, 3]
+    assert seen == [{"limit": "250", "status": "active"}, {"limit": "250", "page_info": "abc"}]
+    assert [p["id"] for p in await connector.list_resources("product", limit=2, offset=1)] == [2, 3]
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from src.services.auth.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def _context():
+    return CryptContext(
+        schemes=["sha256_crypt", "md5_crypt"],
+        deprecated="auto",
+        sha256_crypt__rounds=1000,
+    )
+
+
+@pytest.mark.asyncio
+async def test_verify_schedules_rehash_off_the_request_path():
+    context = _context()
+    hasher = PasswordHasher(context, max_workers=2)
+    legacy = context.handler("md5_crypt").hash("s3cret")
+    stored = []
+
+    async def on_rehash(new_hash):
+        stored.append(new_hash)
+
+    assert await hasher.verify_and_update("s3cret", legacy, on_rehash=on_rehash)
+    assert not await hasher.verify("wrong", legacy)
+    await hasher.close()
+    assert len(stored) == 1
+    assert stored[0].startswith("$5$")
+    assert context.verify("s3cret", stored[0])
+
+
+@pytest.mark.asyncio
+async def test_admission_control_rejects_when_saturated():
+    release = threading.Event()
+    hasher = PasswordHasher(_context(), max_workers=1, max_pending=1)
+
+    blocked = asyncio.create_task(hasher._submit("hash", release.wait))
+    await asyncio.sleep(0.01)
+    with pytest.raises(PasswordHasherBusy) as exc:
+        await hasher.hash("other")
+    assert exc.value.status_code == 503
+
+    release.set()
+    assert await blocked is True
+    assert hasher.pending == 0
+    await hasher.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_slot_until_thread_finishes():
+    started = threading.Event()
+    release = threading.Event()
+    hasher = PasswordHasher(_context(), max_workers=1, max_pending=1)
+
+    def work():
+        started.set()
+        return release.wait()
+
+    waiter = asyncio.create_task(hasher._submit("hash", work))
+    while not started.is_set():
+        await asyncio.sleep(0.001)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    # the bcrypt thread is still running, so the slot stays taken
+    assert hasher.pending == 1
+    with pytest.raises(PasswordHasherBusy):
+        await hasher.hash("other")
+
+    release.set()
+    for _ in range(100):
+        if hasher.pending == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert hasher.pending == 0
+    await hasher.close()
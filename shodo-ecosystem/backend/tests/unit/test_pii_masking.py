@@ -0,0 +1,64 @@
+import random
+import re
+
+from src.core.security import PIIMasking
+
+# Patterns before the fused pass, frozen as the oracle (one re.sub per pattern, in order)
+_BASELINE_PATTERNS = {
+    'email': r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+    'phone': r'[\+]?[(]?[0-9]{1,4}[)]?[-\s\.]?[(]?[0-9]{1,4}[)]?[-\s\.]?[0-9]{1,5}[-\s\.]?[0-9]{1,5}',
+    'credit_card': r'\b(?:\d{4}[-\s]?){3}\d{4}\b',
+    'ssn': r'\b\d{3}-\d{2}-\d{4}\b',
+    'ip_address': r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
+}
+
+
+def _sequential_mask(text: str) -> str:
+    for name, pattern in _BASELINE_PATTERNS.items():
+        text = re.sub(pattern, f"[REDACTED_{name.upper()}]", text)
+    return text
+
+
+def _leaks(text: str) -> bool:
+    return any(re.search(pattern, text) for pattern in _BASELINE_PATTERNS.values())
+
+
+def test_fused_mask_matches_sequential_passes():
+    samples = [
+        "mail a@example.com now",
+        "call +81 90-1234-5678",
+        "user123456@example.com",
+        "555 1234@x.com",
+        "電話 090-1234-5678@自宅",
+        "call 5551234567@home",
+        "call 5551234567@home or a@example.com",
+        "call 090 1234 5678 or 555 1234@example.co.jp",
+        "ip 10.0.0.1 and ssn 123-45-6789",
+        "日本語のみのテキスト",
+    ]
+    for text in samples:
+        assert PIIMasking.mask_pii(text) == _sequential_mask(text)
+    assert PIIMasking.mask_pii("555 1234@x.com") == "555 [REDACTED_EMAIL]"
+    assert PIIMasking.mask_pii("電話 090-1234-5678@自宅") == "電話 [REDACTED_PHONE]@自宅"
+    clean = "日本語のみのテキスト"
+    assert PIIMasking.mask_pii(clean) is clean
+    assert not PIIMasking.contains_pii(clean)
+
+
+def test_fused_mask_leaves_nothing_the_baseline_patterns_match():
+    alphabet = list("0123456789") * 3 + list("ab.-_+@ ()") + ["x.com", "@x.com", "@自宅", "@home", "example.co.jp"]
+    rnd = random.Random(7)
+    for _ in range(5000):
+        text = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(3, 25)))
+        assert not _leaks(PIIMasking.mask_pii(text)), text
+
+
+def test_mask_dict_recurses_into_lists():
+    masked = PIIMasking.mask_dict({
+        "users": [{"Email": "a@example.com", "name": "太郎"}, "b@example.com"],
+        "count": 2,
+    })
+    assert masked == {
+        "users": [{"Email": "[REDACTED]", "name": "太郎"}, "[REDACTED_EMAIL]"],
+        "count": 2,
+    }
@@ -0,0 +1,76 @@
+import time
+
+import httpx
+import pytest
+
+from src.connectors.rate_governor import GovernedTransport, RateGovernor
+
+
+@pytest.mark.asyncio
+async def test_governor_follows_upstream_headers():
+    governor = RateGovernor("test", capacity=40, refill_per_second=1000)
+    calls = []
+
+    def handler(request):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            return httpx.Response(200, headers={"X-Shopify-Shop-Api-Call-Limit": "39/80"})
+        if len(calls) == 2:
+            return httpx.Response(429, headers={"Retry-After": "0.2"})
+        return httpx.Response(200)
+
+    client = httpx.AsyncClient(transport=GovernedTransport(httpx.MockTransport(handler), governor))
+    await client.get("https://shop.example.com/products.json")
+    assert governor.capacity == 80
+
+    await client.get("https://shop.example.com/products.json")
+    await client.get("https://shop.example.com/products.json")
+    # The send after the 429 waited for Retry-After
+    assert calls[2] - calls[1] >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_governor_paces_to_refill_rate_and_tracks_remaining():
+    governor = RateGovernor("test", capacity=2, refill_per_second=20)
+    start = time.monotonic()
+    for _ in range(6):
+        await governor.acquire()
+    # 2 burst + 4 refilled at 20/s
+    assert time.monotonic() - start >= 0.18
+    assert governor.throttled > 0
+
+    governor.observe(httpx.Response(200, headers={"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "3"}))
+    status = governor.status()
+    assert status["limit"] == 100
+    assert status["remaining"] <= 2
+
+    governor.observe_graphql_cost({"cost": {"throttleStatus": {
+        "maximumAvailable": 1000.0, "currentlyAvailable": 50, "restoreRate": 50.0}}})
+    assert governor.capacity == 1000.0 and governor.refill_per_second == 50.0
+
+
+@pytest.mark.asyncio
+async def test_graphql_cost_does_not_leak_into_the_rest_bucket():
+    rest = RateGovernor("shop", capacity=40, refill_per_second=2)
+    graphql = RateGovernor("shop:graphql", capacity=1000, refill_per_second=50)
+
+    def handler(request):
+        if request.url.path.endswith("/graphql.json"):
+            return httpx.Response(200)
+        return httpx.Response(200, headers={"X-Shopify-Shop-Api-Call-Limit": "1/40"})
+
+    route = lambda request: graphql if request.url.path.endswith("/graphql.json") else None
+    client = httpx.AsyncClient(transport=GovernedTransport(httpx.MockTransport(handler), rest, route=route))
+    await client.post("https://shop.example.com/admin/api/graphql.json")
+    graphql.observe_graphql_cost({"cost": {"throttleStatus": {
+        "maximumAvailable": 2000.0, "currentlyAvailable": 1990, "restoreRate": 100.0}}})
+    await client.get("https://shop.example.com/admin/api/products.json")
+
+    assert (rest.capacity, rest.refill_per_second) == (40, 2)
+    assert (graphql.capacity, graphql.refill_per_second) == (2000.0, 100.0)
+
+    # a REST header seen after GraphQL costs were applied restores the REST refill rate
+    rest.observe_graphql_cost({"cost": {"throttleStatus": {
+        "maximumAvailable": 1000.0, "currentlyAvailable": 1000, "restoreRate": 50.0}}})
+    rest.observe(httpx.Response(200, headers={"X-Shopify-Shop-Api-Call-Limit": "1/40"}))
+    assert (rest.capacity, rest.refill_per_second) == (40, 2)
@@ -0,0 +1,62 @@
+import fakeredis.aioredis
+import pytest
+
+from src.services.auth import refresh_manager
+from src.services.auth.refresh_manager import RefreshTokenManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(refresh_manager, "get_redis", lambda: redis)
+    return RefreshTokenManager()
+
+
+@pytest.mark.asyncio
+async def test_rotate_revokes_old_token_and_rejects_reuse(manager):
+    token = await manager.generate("user-1", "alice", ["viewer"])
+
+    rotated = await manager.rotate(token)
+
+    assert rotated is not None
+    new_token, payload = rotated
+    assert payload["user_id"] == "user-1"
+    assert payload["version"] == 2
+    assert await manager.validate(token) is None
+    assert (await manager.validate(new_token))["username"] == "alice"
+    members = await manager.redis.smembers(manager._user_set_key("user-1"))
+    assert members == {new_token.encode()}
+    # Reusing the rotated-out token fails
+    assert await manager.rotate(token) is None
+
+
+@pytest.mark.asyncio
+async def test_rotate_only_swaps_the_value_that_was_read(manager):
+    token = await manager.generate("user-1", "alice", [])
+    key = manager._key(token)
+    read = await manager.redis.get(key)
+    # A concurrent refresh already replaced the token between read and swap
+    await manager.redis.set(key, read + b" ")
+
+    swapped = await manager._rotate_script(
+        keys=[key, manager._key("other"), manager._user_set_key("user-1")],
+        args=[read, token, "other", 60, "{}"],
+    )
+
+    assert swapped == 0
+    assert await manager.redis.exists(manager._key("other")) == 0
+
+
+@pytest.mark.asyncio
+async def test_revoke_all_for_user_keeps_other_users(manager, monkeypatch):
+    monkeypatch.setattr(refresh_manager, "REVOKE_BATCH_SIZE", 2)
+    tokens = [await manager.generate("user-1", "alice", []) for _ in range(3)]
+    other = await manager.generate("user-2", "bob", [])
+
+    assert await manager.revoke_all_for_user("user-1") == 3
+
+    for token in tokens:
+        assert await manager.validate(token) is None
+    assert await manager.redis.exists(manager._user_set_key("user-1")) == 0
+    assert await manager.validate(other) is not None
+    assert await manager.revoke_all_for_user("user-1") == 0
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from src.services.auth.revocation_replica import BloomFilter, RevocationReplica
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_replica_honours_exp_and_rebuilds():
+    replica = RevocationReplica("test", "test:revoked:", "test:revocations", capacity=4)
+    now = time.time()
+    replica.add("live", now + 60)
+    replica.add("expired", now - 1)
+    assert replica.is_revoked("live")
+    assert not replica.is_revoked("expired")
+    assert not replica.is_revoked("unknown")
+
+    # Growing past capacity rebuilds the filter without losing entries
+    for i in range(10):
+        replica.add(f"jti-{i}", now + 60)
+    assert all(replica.is_revoked(f"jti-{i}") for i in range(10))
+    assert replica.capacity >= len(replica)
+
+
+class _FakePipeline:
+    def __init__(self, ttls):
+        self.ttls = ttls
+        self.keys = []
+
+    def pttl(self, key):
+        self.keys.append(key)
+
+    async def execute(self):
+        return [self.ttls.get(key, -2) for key in self.keys]
+
+
+class _FakeRedis:
+    def __init__(self, ttls):
+        self.ttls = ttls
+        self.published = []
+
+    async def scan_iter(self, match, count):
+        for key in list(self.ttls):
+            yield key
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self.ttls)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_and_pubsub_message():
+    redis = _FakeRedis({"test:revoked:a": 30000, "test:revoked:b": -1})
+    replica = RevocationReplica("test", "test:revoked:", "test:revocations")
+    assert await replica.bootstrap(redis) == 2
+    assert replica.is_revoked("a") and replica.is_revoked("b")
+
+    # Messages from other workers are applied locally
+    replica._handle_message(f"c {int(time.time()) + 60}")
+    assert replica.is_revoked("c")
+
+    await replica.publish(redis, "d", time.time() + 60)
+    assert replica.is_revoked("d")
+    assert redis.published[0][0] == "test:revocations"
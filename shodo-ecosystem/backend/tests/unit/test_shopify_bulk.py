@@ -0,0 +1,79 @@
+import json
+
+import httpx
+import pytest
+
+from src.connectors.base import ConnectorCredentials
+from src.connectors.shopify import ShopifyConnector
+from src.connectors.shopify_bulk import BulkOperationError
+
+JSONL = "\n".join(json.dumps(line) for line in [
+    {"id": "gid://shopify/Product/1", "title": "A"},
+    {"id": "gid://shopify/ProductVariant/11", "sku": "A-1", "__parentId": "gid://shopify/Product/1"},
+    {"id": "gid://shopify/ProductVariant/12", "sku": "A-2", "__parentId": "gid://shopify/Product/1"},
+    {"id": "gid://shopify/Product/2", "title": "B"},
+]) + "\n"
+
+
+def _fixture_server(statuses):
+    """Local stand-in for the Admin GraphQL API and the bulk result file"""
+    polls = []
+
+    def handler(request):
+        if request.url.host == "storage.example.com":
+            return httpx.Response(200, text=JSONL)
+        body = json.loads(request.content)
+        if "bulkOperationRunQuery" in body["query"]:
+            assert "products(query: \"created_at:>=2024-01-01\")" in body["variables"]["query"]
+            return httpx.Response(200, json={"data": {"bulkOperationRunQuery": {
+                "bulkOperation": {"id": "gid://shopify/BulkOperation/9", "status": "CREATED"},
+                "userErrors": [],
+            }}})
+        status = statuses[min(len(polls), len(statuses) - 1)]
+        polls.append(status)
+        url = "https://storage.example.com/result.jsonl" if status == "COMPLETED" else None
+        return httpx.Response(200, json={"data": {"node": {"status": status, "url": url, "errorCode": "ACCESS_DENIED"}}})
+
+    return httpx.MockTransport(handler), polls
+
+
+def _connector(transport):
+    connector = ShopifyConnector("shop.example.com", ConnectorCredentials(access_token="token"))
+    connector._session = httpx.AsyncClient(base_url=connector.config.base_url, transport=transport)
+    return connector
+
+
+@pytest.mark.asyncio
+async def test_bulk_export_polls_and_rebuilds_parent_child_tree():
+    transport, polls = _fixture_server(["CREATED", "RUNNING", "COMPLETED"])
+    connector = _connector(transport)
+    download = httpx.AsyncClient(transport=transport)
+
+    products = [
+        p async for p in connector.bulk_export(
+            "products", "created_at:>=2024-01-01", download_client=download, poll_interval=0.001
+        )
+    ]
+
+    assert polls == ["CREATED", "RUNNING", "COMPLETED"]
+    assert [p["title"] for p in products] == ["A", "B"]
+    assert [v["sku"] for v in products[0]["variants"]] == ["A-1", "A-2"]
+    assert "variants" not in products[1]
+
+
+@pytest.mark.asyncio
+async def test_bulk_export_surfaces_failed_operations():
+    transport, _ = _fixture_server(["FAILED"])
+    connector = _connector(transport)
+
+    with pytest.raises(BulkOperationError):
+        async for _ in connector.bulk_export("products", "created_at:>=2024-01-01", poll_interval=0.001):
+            pass
+
+
+def test_graphql_requests_use_their_own_cost_bucket():
+    connector = ShopifyConnector("bucket.example.com", ConnectorCredentials(access_token="token"))
+    graphql = connector._route_rate_governor(httpx.Request("POST", f"{connector.config.base_url}/graphql.json"))
+    assert graphql is connector._get_graphql_governor()
+    assert graphql is not connector._get_rate_governor()
+    assert connector._route_rate_governor(httpx.Request("GET", f"{connector.config.base_url}/products.json")) is None
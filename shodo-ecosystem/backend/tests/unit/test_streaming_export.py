@@ -0,0 +1,67 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from src.services.export.streaming_export import ExportStorage, ExportWriter, export_file_name, write_export
+
+
+async def _rows(n):
+    for i in range(n):
+        row = {"id": i, "title": f"item {i}", "price": {"amount": i * 10, "currency": "JPY"}}
+        if i == 0:
+            row["tags"] = ["a", "b"]
+        if i == 150:
+            # Columns first seen after the sample are not exported
+            row["late"] = "x"
+        yield row
+
+
+@pytest.mark.asyncio
+async def test_csv_export_infers_columns_compresses_and_reports_progress(tmp_path):
+    storage = ExportStorage(str(tmp_path))
+    progress = []
+    name = export_file_name("products", "csv", compress=True)
+
+    result = await write_export(
+        _rows(1200), "csv", owner="user-1", name=name, storage=storage,
+        compress=True, chunk_size=500, progress=progress.append
+    )
+
+    assert name == "products.csv.gz"
+    assert result.row_count == 1200
+    assert progress == [500, 1000, 1200]
+    assert result.columns == ["id", "title", "price.amount", "price.currency", "tags"]
+
+    data = b"".join(storage.iter_chunks("user-1", name))
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(data).decode("utf-8-sig"))))
+    assert len(rows) == 1200
+    assert rows[0]["tags"] == '["a", "b"]'
+    assert rows[1]["price.amount"] == "10"
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_keeps_structure_and_rejects_unsafe_names(tmp_path):
+    storage = ExportStorage(str(tmp_path))
+    result = await write_export(_rows(3), "json", owner="user-1", name="p.ndjson", storage=storage)
+
+    lines = b"".join(storage.iter_chunks("user-1", "p.ndjson")).decode().splitlines()
+    assert result.row_count == 3
+    assert json.loads(lines[2])["price"] == {"amount": 20, "currency": "JPY"}
+
+    with pytest.raises(ValueError):
+        storage.path("user-1", "../secrets")
+
+
+def test_writer_missing_an_override_fails_at_construction(tmp_path):
+    class _Incomplete(ExportWriter):
+        def open(self, columns):
+            pass
+
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        _Incomplete(str(tmp_path / "out"))
@@ -0,0 +1,176 @@
+import pytest
+
+from src.connectors.sync_engine import SyncEngine, SyncSpec, WatermarkStore
+
+
+class _Config:
+    def __init__(self, name):
+        self.name = name
+
+
+class _FakeConnector:
+    """Minimal connector surface used by the sync engine"""
+
+    MAX_PAGE_SIZE = 2
+    INCREMENTAL_FIELD = "updated_at"
+    INCREMENTAL_FILTER = "updated_at_min"
+    EXTERNAL_ID_FIELD = "metadata.source_id"
+
+    def __init__(self, name, records):
+        self.config = _Config(name)
+        self.records = records
+        self.writes = []
+        self.filters = []
+
+    async def stream_resources(self, resource_type, filters=None):
+        self.filters.append(filters)
+        for record in self.records:
+            if filters and record["updated_at"] < filters["updated_at_min"]:
+                continue
+            yield record
+
+    async def create_resource(self, resource_type, data):
+        self.writes.append(("create", data))
+        self.records.append({"id": f"t{len(self.records)}", "updated_at": 0, **data})
+
+    async def update_resource(self, resource_type, resource_id, data):
+        self.writes.append(("update", resource_id, data))
+
+
+@pytest.mark.asyncio
+async def test_sync_skips_unchanged_and_advances_watermark():
+    source = _FakeConnector("src", [
+        {"id": 1, "title": "a", "updated_at": 10},
+        {"id": 2, "title": "b", "updated_at": 20},
+        {"id": 3, "title": "c", "updated_at": 30},
+    ])
+    target = _FakeConnector("dst", [
+        {"id": "t1", "name": "a", "metadata": {"source_id": "1"}, "updated_at": 0},
+        {"id": "t2", "name": "old", "metadata": {"source_id": "2"}, "updated_at": 0},
+    ])
+    store = WatermarkStore()
+    engine = SyncEngine(source, target, store)
+    spec = SyncSpec(resource_type="product", mapping={"title": "name"}, concurrency=2)
+
+    result = await engine.run(spec)
+
+    assert (result["total"], result["synced"], result["skipped"], result["failed"]) == (3, 2, 1, 0)
+    assert ("update", "t2", {"name": "b", "metadata": {"source_id": "2"}}) in target.writes
+    assert ("create", {"name": "c", "metadata": {"source_id": "3"}}) in target.writes
+    assert await store.get("src:dst:product") == 30
+
+    # The next run only reads records changed since the watermark
+    target.writes.clear()
+    result = await engine.run(spec)
+    assert source.filters[-1] == {"updated_at_min": 30}
+    assert (result["total"], result["skipped"]) == (1, 1)
+    assert target.writes == []
+
+
+@pytest.mark.asyncio
+async def test_targets_of_the_same_type_keep_separate_watermarks():
+    source = _FakeConnector("shopify", [
+        {"id": 1, "title": "a", "updated_at": 10},
+        {"id": 2, "title": "b", "updated_at": 20},
+    ])
+    store = WatermarkStore()
+    spec = SyncSpec(resource_type="customer", mapping={"title": "name"})
+    first = _FakeConnector("stripe", [])
+    second = _FakeConnector("stripe", [])
+
+    await SyncEngine(source, first, store, target_id="conn-a").run(spec)
+    # A newly added target still gets the full backfill
+    result = await SyncEngine(source, second, store, target_id="conn-b").run(spec)
+
+    assert source.filters[-1] is None
+    assert result["synced"] == 2
+    assert await store.get("shopify:conn-a:customer") == 20
+    assert await store.get("shopify:conn-b:customer") == 20
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_do_not_advance_watermark():
+    source = _FakeConnector("src", [
+        {"id": 1, "title": "a", "updated_at": 10},
+        {"id": 2, "title": "b", "updated_at": 20},
+    ])
+    target = _FakeConnector("dst", [])
+
+    async def failing_create(resource_type, data):
+        if data["name"] == "b":
+            raise RuntimeError("upstream rejected")
+        target.writes.append(("create", data))
+
+    target.create_resource = failing_create
+    store = WatermarkStore({"src:dst:product": 5})
+    engine = SyncEngine(source, target, store)
+    spec = SyncSpec(resource_type="product", mapping={"title": "name"})
+
+    result = await engine.run(spec)
+
+    assert (result["synced"], result["failed"]) == (1, 1)
+    assert result["errors"] == [{"resource_id": "2", "error": "upstream rejected"}]
+    assert await store.get("src:dst:product") == 5
+
+    # The retry reads from the old watermark again, not past the failed record
+    await engine.run(spec)
+    assert source.filters[-1] == {"updated_at_min": 5}
+
+
+@pytest.mark.asyncio
+async def test_unmapped_sync_compares_source_fields_only():
+    source = _FakeConnector("src", [
+        {"id": 1, "title": "a", "updated_at": 10},
+        {"id": 2, "title": "b", "updated_at": 20},
+    ])
+    target = _FakeConnector("dst", [])
+    engine = SyncEngine(source, target, WatermarkStore())
+    spec = SyncSpec(resource_type="product")
+
+    result = await engine.run(spec)
+    assert result["synced"] == 2
+
+    # Target records carry their own id, but the second full run writes nothing
+    target.writes.clear()
+    result = await engine.run(spec, full=True)
+    assert (result["total"], result["skipped"]) == (2, 2)
+    assert target.writes == []
+
+    source.records[0]["title"] = "changed"
+    result = await engine.run(spec, full=True)
+    assert result["synced"] == 1
+    assert target.writes[0][0] == "update"
+
+
+@pytest.mark.asyncio
+async def test_targets_that_cannot_store_source_ids_are_rejected():
+    source = _FakeConnector("src", [{"id": 1, "title": "a", "updated_at": 10}])
+    target = _FakeConnector("shopify", [])
+    target.EXTERNAL_ID_FIELD = None
+    engine = SyncEngine(source, target, WatermarkStore())
+
+    with pytest.raises(ValueError):
+        await engine.run(SyncSpec(resource_type="product", mapping={"title": "name"}))
+    assert target.writes == []
+
+    # An explicit field the target round-trips is accepted
+    spec = SyncSpec(resource_type="product", mapping={"title": "name"}, external_id_field="source_ref")
+    assert (await engine.run(spec))["synced"] == 1
+    assert target.writes == [("create", {"name": "a", "source_ref": "1"})]
+
+
+@pytest.mark.asyncio
+async def test_full_every_forces_periodic_full_pass():
+    source = _FakeConnector("src", [{"id": 1, "title": "a", "updated_at": 10}])
+    target = _FakeConnector("dst", [])
+    store = WatermarkStore()
+    engine = SyncEngine(source, target, store)
+    spec = SyncSpec(resource_type="product", mapping={"title": "name"})
+
+    assert (await engine.run(spec, full_every=3600))["full"] is True
+    assert (await engine.run(spec, full_every=3600))["full"] is False
+    assert source.filters[-1] == {"updated_at_min": 10}
+
+    await store.set("src:dst:product:full_at", 0)
+    assert (await engine.run(spec, full_every=3600))["full"] is True
+    assert source.filters[-1] is None
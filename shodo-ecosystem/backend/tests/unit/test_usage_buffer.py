@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from src.services.auth.usage_buffer import UsageWriteBehind
+
+
+class _FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def hset(self, key, field, value):
+        self.ops.append(("hset", key, field, value))
+
+    def hincrby(self, key, field, amount):
+        self.ops.append(("hincrby", key, field, amount))
+
+    async def execute(self):
+        for op, key, field, value in self.ops:
+            bucket = self.store.setdefault(key, {})
+            if op == "hset":
+                bucket[field] = value
+            else:
+                bucket[field] = bucket.get(field, 0) + value
+        self.store["_executions"] = self.store.get("_executions", 0) + 1
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self.store)
+
+
+@pytest.mark.asyncio
+async def test_usage_is_coalesced_into_one_pipeline():
+    redis = _FakeRedis()
+    buffer = UsageWriteBehind(flush_interval_ms=60000, max_entries=1000)
+    for _ in range(50):
+        buffer.record("jti-a", redis, ts=1700000000.0)
+    buffer.record("jti-b", redis, ts=1700000001.0)
+    assert len(buffer) == 2
+
+    await buffer.close()
+    assert redis.store["_executions"] == 1
+    assert redis.store["lpr:token:jti-a:usage"]["usage_count"] == 50
+    assert redis.store["lpr:token:jti-b:usage"]["last_used"].startswith("2023-11-14")
+    assert len(buffer) == 0
+
+
+@pytest.mark.asyncio
+async def test_entries_recorded_during_a_flush_are_flushed_later():
+    redis = _FakeRedis()
+    release = asyncio.Event()
+    executing = asyncio.Event()
+
+    class _SlowPipeline(_FakePipeline):
+        async def execute(self):
+            executing.set()
+            await release.wait()
+            await super().execute()
+
+    redis.pipeline = lambda transaction=False: _SlowPipeline(redis.store)
+    buffer = UsageWriteBehind(flush_interval_ms=10, max_entries=1000)
+    buffer.record("jti-a", redis, ts=1700000000.0)
+    await executing.wait()
+    # The timer task is inside flush(), so this record arms nothing itself
+    buffer.record("jti-b", redis, ts=1700000001.0)
+    release.set()
+
+    for _ in range(100):
+        if "lpr:token:jti-b:usage" in redis.store:
+            break
+        await asyncio.sleep(0.01)
+    assert redis.store["lpr:token:jti-b:usage"]["usage_count"] == 1
+    assert redis.store["_executions"] == 2
+    await buffer.close()